@@ -0,0 +1,304 @@
+"""
+API HTTP untuk mengirim kuesioner tanpa melewati halaman Streamlit (CAPI, aplikasi desa lain).
+
+    POST /submisi  satu kuesioner {"form_data": {...}, "usaha_data": [...], "submission_id": "..."}
+                   atau beberapa sekaligus {"kuesioner": [{...}, {...}]}
+    GET  /health   status antrean pengiriman ke Google Sheets
+    GET  /metrics  durasi tahap pipeline (format teks Prometheus, jika tracing aktif)
+
+form_data memakai key yang sama dengan form di app.py (provinsi ... tanggal,
+jml_industri_*); setiap usaha berisi nama_usaha, nama_pemilik,
+kode_industri (list atau teks "3.1, 3.4") dan jumlah_tenaga_kerja.
+Aturan validasi sama dengan form (validation.py) dan baris sheet disusun
+dengan build_rows. Kuesioner yang valid masuk jurnal pengiriman dengan satu
+fsync per request, lalu dikirim ke sheet per batch oleh SheetWriter.
+submission_id dari pengirim membuat pengiriman ulang tidak menambah baris ganda.
+
+Secara default server hanya mendengarkan 127.0.0.1; host lain (mis. 0.0.0.0)
+wajib disertai --api-key. Jika --api-key diisi, semua endpoint (termasuk
+/health dan /metrics) memerlukan header X-API-Key.
+
+Contoh:
+    python api.py --port 8502
+    python api.py --host 0.0.0.0 --api-key ...
+    curl -X POST localhost:8502/submisi -H "X-API-Key: ..." -d @kuesioner.json
+"""
+import argparse
+import datetime
+import hmac
+import ipaddress
+import json
+import logging
+import os
+import re
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from gsheet import RowCountIndex, SheetConnection, ShardDirectory, build_rows, open_worksheet
+from mirror import SheetMirror
+from spans import spans
+from usaha import KODE_INDUSTRI, Usaha
+from validation import BLOK_I_FIELDS, BLOK_II_FIELDS, JML_KEYS, as_int, validate_submission
+from writer import start_sheet_writer
+
+logger = logging.getLogger(__name__)
+
+# Jurnal terpisah dari aplikasi Streamlit: setiap proses memegang antrean jurnalnya sendiri
+API_JOURNAL_PATH = os.path.join("data", "journal_api.jsonl")
+
+# Batas satu request
+MAX_BODY_BYTES = 8 * 1024 * 1024
+MAX_KUESIONER = 500
+
+TEXT_KEYS = [key for key, _ in BLOK_I_FIELDS + BLOK_II_FIELDS]
+KODE_SEPARATOR = re.compile(r"[,;/\s]+")
+
+
+class PayloadError(ValueError):
+    """Payload tidak berbentuk kuesioner (bukan objek JSON, field bertipe salah, dsb.)."""
+
+
+# Fungsi untuk menyusun form_data seperti hasil save_form_data (teks di-strip, jumlah sebagai int)
+def form_from_json(data):
+    if not isinstance(data, dict):
+        raise PayloadError("form_data harus berupa objek")
+    form_data = {key: str(data.get(key) or "").strip() for key in TEXT_KEYS}
+    form_data["tanggal"] = str(data.get("tanggal") or "").strip()
+    for key in JML_KEYS:
+        number = as_int(data.get(key))
+        form_data[key] = number if number is not None else data.get(key)
+    return form_data
+
+
+# Fungsi untuk mengubah satu usaha JSON menjadi Usaha; mengembalikan (Usaha, pesan kesalahan kode industri)
+def usaha_from_json(data, position):
+    if not isinstance(data, dict):
+        raise PayloadError(f"usaha ke-{position} harus berupa objek")
+    kode = data.get("kode_industri") or []
+    if isinstance(kode, str):
+        kode = [token for token in KODE_SEPARATOR.split(kode) if token]
+    if not isinstance(kode, list):
+        raise PayloadError(f"usaha ke-{position}: kode_industri harus berupa list atau teks")
+    unknown = [str(token) for token in kode if token not in KODE_INDUSTRI]
+    errors = [f"BLOK IV usaha ke-{position}: Kode tidak dikenal: {', '.join(unknown)}"] if unknown else []
+    jumlah = as_int(data.get("jumlah_tenaga_kerja"))
+    usaha = Usaha.from_kode(
+        str(data.get("nama_usaha") or "").strip(),
+        str(data.get("nama_pemilik") or "").strip(),
+        [token for token in kode if token in KODE_INDUSTRI],
+        jumlah if jumlah is not None else 0,
+    )
+    return usaha, errors
+
+
+# Fungsi untuk memvalidasi satu kuesioner JSON; mengembalikan (form_data, usaha_data, submission_id, errors)
+def parse_kuesioner(item):
+    if not isinstance(item, dict):
+        raise PayloadError("kuesioner harus berupa objek")
+    usaha_items = item.get("usaha_data")
+    if not isinstance(usaha_items, list):
+        raise PayloadError("usaha_data harus berupa list")
+    submission_id = item.get("submission_id")
+    if submission_id is not None and not (isinstance(submission_id, str) and submission_id.strip()):
+        raise PayloadError("submission_id harus berupa teks")
+    form_data = form_from_json(item.get("form_data"))
+    usaha_data, kode_errors = [], []
+    for i, data in enumerate(usaha_items):
+        usaha, errors = usaha_from_json(data, i + 1)
+        usaha_data.append(usaha)
+        kode_errors.extend(errors)
+    return form_data, usaha_data, submission_id, kode_errors + validate_submission(form_data, usaha_data)
+
+
+# Fungsi untuk memproses satu body request; mengembalikan (status HTTP, isi respons).
+# Setiap kuesioner divalidasi sendiri: yang valid tetap diterima walaupun ada yang ditolak.
+def process_submissions(payload, writer):
+    if isinstance(payload, dict) and "kuesioner" in payload:
+        items = payload["kuesioner"]
+    else:
+        items = [payload]
+    if not isinstance(items, list) or not items:
+        return 400, {"error": "kuesioner harus berupa list yang tidak kosong"}
+    if len(items) > MAX_KUESIONER:
+        return 413, {"error": f"maksimal {MAX_KUESIONER} kuesioner per request"}
+
+    timestamp = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    results, accepted = [], []
+    with spans.span("api.validate", kuesioner=len(items)):
+        for index, item in enumerate(items):
+            try:
+                form_data, usaha_data, submission_id, errors = parse_kuesioner(item)
+            except PayloadError as e:
+                results.append({"index": index, "status": "ditolak", "errors": [str(e)]})
+                continue
+            if errors:
+                results.append({"index": index, "status": "ditolak", "errors": errors})
+                continue
+            submission_id = submission_id or uuid.uuid4().hex
+            rows = build_rows(form_data, usaha_data, timestamp, submission_id)
+            results.append({"index": index, "status": "diterima", "submission_id": submission_id, "rows": len(rows)})
+            accepted.append((results[-1], rows))
+
+    if accepted:
+        futures = writer.submit_many([(rows, result["submission_id"]) for result, rows in accepted])
+        for (result, _), future in zip(accepted, futures):
+            # Submisi yang sudah pernah tertulis langsung selesai dengan lokasi lamanya
+            if future.done() and future.result().get("duplicate"):
+                ack = future.result()
+                result.update(status="duplikat", sheet=ack["sheet"], first_row=ack["first_row"], last_row=ack["last_row"])
+    status = 202 if accepted else 422
+    return status, {
+        "diterima": sum(result["status"] == "diterima" for result in results),
+        "duplikat": sum(result["status"] == "duplikat" for result in results),
+        "ditolak": sum(result["status"] == "ditolak" for result in results),
+        "hasil": results,
+    }
+
+
+class SubmissionHandler(BaseHTTPRequestHandler):
+    """Handler HTTP/1.1 (keep-alive); writer dan api_key diambil dari server."""
+
+    protocol_version = "HTTP/1.1"
+    # Header dan body respons dikirim terpisah; tanpa TCP_NODELAY klien keep-alive tertahan delayed ACK (~40 ms)
+    disable_nagle_algorithm = True
+
+    def _send_json(self, status, body):
+        data = json.dumps(body, ensure_ascii=False, default=str).encode("utf-8")
+        self._send(status, data, "application/json; charset=utf-8")
+
+    def _send(self, status, data, content_type):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    # Tolak request tanpa membaca body; koneksi ditutup karena body masih ada di socket
+    def _reject(self, status, message):
+        self.close_connection = True
+        self._send_json(status, {"error": message})
+
+    def _authorized(self):
+        api_key = self.server.api_key
+        if api_key and not hmac.compare_digest(self.headers.get("X-API-Key", "").encode(), api_key.encode()):
+            self._reject(401, "X-API-Key tidak valid")
+            return False
+        return True
+
+    # Panjang body dari Content-Length; None (dan respons 400/413 terkirim) jika tidak valid
+    def _content_length(self):
+        try:
+            length = int(self.headers.get("Content-Length") or 0)
+        except ValueError:
+            length = -1
+        if length < 0:
+            self._reject(400, "Content-Length tidak valid")
+            return None
+        if length > MAX_BODY_BYTES:
+            self._reject(413, f"body maksimal {MAX_BODY_BYTES} byte")
+            return None
+        return length
+
+    def do_POST(self):
+        # Path dan API key diperiksa sebelum body dibaca
+        if self.path != "/submisi":
+            return self._reject(404, "endpoint tidak ditemukan")
+        if not self._authorized():
+            return
+        length = self._content_length()
+        if length is None:
+            return
+        body = self.rfile.read(length)
+        try:
+            payload = json.loads(body)
+        except (json.JSONDecodeError, UnicodeDecodeError) as e:
+            return self._send_json(400, {"error": f"body bukan JSON yang valid: {e}"})
+        with spans.span("api.submisi"):
+            try:
+                status, response = process_submissions(payload, self.server.writer)
+            except Exception as e:
+                logger.exception("Gagal memproses submisi API")
+                status, response = 500, {"error": f"gagal menyimpan ke jurnal: {e}"}
+        self._send_json(status, response)
+
+    # /health dan /metrics berisi pesan error dan statistik antrean, jadi diperiksa dengan X-API-Key yang sama
+    def do_GET(self):
+        if self.path not in ("/health", "/metrics"):
+            return self._send_json(404, {"error": "endpoint tidak ditemukan"})
+        if not self._authorized():
+            return
+        if self.path == "/health":
+            writer = self.server.writer
+            return self._send_json(200, {
+                "pending_rows": writer.journal.pending_rows(),
+                "last_error": writer.last_error,
+                "last_flush": writer.last_flush,
+                "stats": writer.stats,
+            })
+        self._send(200, spans.prometheus_text().encode("utf-8"), "text/plain; version=0.0.4")
+
+    def log_message(self, format, *args):
+        logger.debug("%s - %s", self.address_string(), format % args)
+
+
+# Fungsi untuk memeriksa apakah host hanya bisa diakses dari mesin ini
+def is_loopback(host):
+    if host == "localhost":
+        return True
+    try:
+        return ipaddress.ip_address(host).is_loopback
+    except ValueError:
+        return False
+
+
+# Fungsi untuk membuat server API (port=0 memilih port bebas, mis. untuk benchmark).
+# Host selain loopback hanya diizinkan dengan api_key.
+def make_server(writer, host="127.0.0.1", port=8502, api_key=None):
+    if not api_key and not is_loopback(host):
+        raise ValueError(f"host {host} bisa diakses dari jaringan; api_key wajib diisi")
+    server = ThreadingHTTPServer((host, port), SubmissionHandler)
+    server.daemon_threads = True
+    server.writer = writer
+    server.api_key = api_key
+    return server
+
+
+# Fungsi untuk membuat SheetWriter ke Google Sheets dengan helper yang sama seperti app.py;
+# baris yang tertulis ikut disalin ke mirror lokal supaya rekap langsung melihatnya
+def make_sheet_writer(journal_path=API_JOURNAL_PATH):
+    connection = SheetConnection(open_worksheet).start()
+    shards = ShardDirectory(RowCountIndex())
+    return start_sheet_writer(connection, shards, journal_path, on_written=SheetMirror().record_rows)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="API HTTP submisi kuesioner pendataan industri.")
+    parser.add_argument("--host", default="127.0.0.1",
+                        help="alamat yang didengarkan; selain loopback wajib memakai --api-key")
+    parser.add_argument("--port", type=int, default=8502)
+    parser.add_argument("--api-key", default=os.environ.get("API_KEY_SUBMISI"),
+                        help="kunci yang wajib dikirim di header X-API-Key (default: env API_KEY_SUBMISI)")
+    parser.add_argument("--spans", metavar="PATH", help="aktifkan tracing dan tulis span ke file JSONL ini")
+    args = parser.parse_args(argv)
+    if not args.api_key and not is_loopback(args.host):
+        parser.error(f"--host {args.host} bisa diakses dari jaringan; isi --api-key atau env API_KEY_SUBMISI")
+
+    logging.basicConfig(level=logging.INFO)
+    if args.spans:
+        spans.configure(True, args.spans)
+    writer = make_sheet_writer()
+    server = make_server(writer, args.host, args.port, args.api_key)
+    print(f"API submisi berjalan di http://{args.host}:{server.server_port}/submisi")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        writer.stop(timeout=30)
+        spans.flush()
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -1,17 +1,30 @@
-import os
-import io
-import json
-import base64
+import time
+import functools
+import hmac
+import logging
+import uuid
 import pandas as pd
 import streamlit as st
-import gspread
 from datetime import date
-from google.oauth2.service_account import Credentials
-from reportlab.lib import colors
-from reportlab.lib.pagesizes import letter
-from reportlab.lib.styles import ParagraphStyle
-from reportlab.pdfgen import canvas
-from reportlab.platypus import Table, TableStyle, Paragraph
+from gsheet import FLAG_COLUMNS, SHEET_MAX_ROWS, RowCountIndex, SheetConnection, ShardDirectory, build_rows, open_worksheet
+from writer import start_sheet_writer
+from mirror import SheetMirror
+import rekap
+import consistency
+from pdf_form import pdf_cache, pdf_content_key
+from usaha import KODE_INDUSTRI, Usaha
+from usaha_import import UsahaImportError, apply_usaha_frame, import_usaha, template_csv, usaha_frame
+from ratelimit import sheets_limiter
+from run_timing import RunTimings, measure
+from spans import SPANS_PATH, spans
+from drafts import DRAFT_FIELDS, DraftStore, format_code
+from validation import FORM_KEYS, JML_KEYS, as_int, count_usaha, validate_form, validate_usaha
+from streamlit.runtime.scriptrunner import get_script_run_ctx
+
+# Waktu mulai eksekusi skrip, untuk mengukur time-to-first-render dan durasi setiap eksekusi
+_run_started = time.perf_counter()
+_cpu_started = time.thread_time()
+logger = logging.getLogger(__name__)
 
 # Judul dan konfigurasi halaman
 st.set_page_config(page_title="Formulir Pendataan Industri Pengolahan", layout="wide")
@@ -20,490 +33,267 @@ st.set_page_config(page_title="Formulir Pendataan Industri Pengolahan", layout="
 st.title("Pendataan Industri Pengolahan di Kelurahan Kejambon")
 st.markdown("#### Kelurahan Cinta Statistik 2025")
 
+# Span per tahap pipeline (connect, validate, pdf.*, sheet.*, rerun) diaktifkan lewat secrets:
+#   [tracing]
+#   enabled = true
+#   path = "data/spans.jsonl"   # "" = hanya di memori, tanpa file JSONL
+#   admin = true                # tampilkan panel p50/p95/p99 di sidebar
+@st.cache_resource
+def configure_spans():
+    config = {}
+    try:
+        if "tracing" in st.secrets:
+            config = dict(st.secrets["tracing"])
+    except Exception:
+        pass  # Tidak ada secrets.toml: span nonaktif
+    enabled = bool(config.get("enabled", False))
+    spans.configure(enabled, config.get("path", SPANS_PATH) or None)
+    return {"enabled": enabled, "admin": enabled and bool(config.get("admin", True))}
+
+tracing_config = configure_spans()
+
+# Statistik durasi eksekusi script/fragment dari semua sesi
+@st.cache_resource
+def get_run_timings():
+    return RunTimings()
+
+# True jika eksekusi ini hanya menjalankan ulang fragment (bukan seluruh app.py)
+def in_fragment_rerun():
+    ctx = get_script_run_ctx()
+    return bool(getattr(ctx, "fragment_ids_this_run", None))
+
+# Render ulang halaman yang sedang tampil: cukup fragment-nya jika sedang dalam fragment rerun
+def rerun_page():
+    st.rerun(scope="fragment" if in_fragment_rerun() else "app")
+
+# Halaman dijalankan sebagai fragment: interaksi di dalamnya hanya menjalankan ulang
+# fungsi halaman, bukan seluruh app.py. Durasi rerun fragment dicatat per proses dan per sesi.
+def page_fragment(func):
+    kind = f"fragment:{func.__name__}"
+
+    @functools.wraps(func)
+    def timed(*args, **kwargs):
+        if not in_fragment_rerun():
+            return func(*args, **kwargs)  # bagian dari eksekusi penuh, sudah dicatat sebagai "app"
+        with measure(kind, get_run_timings(), st.session_state.run_timings):
+            return func(*args, **kwargs)
+
+    return st.fragment(timed)
+
+# Indeks jumlah baris dipakai bersama oleh semua sesi
+@st.cache_resource
+def get_row_index():
+    return RowCountIndex()
+
+# Direktori shard "Data Industri", "Data Industri 2", ... dipakai bersama oleh semua sesi
+@st.cache_resource
+def get_shard_directory():
+    return ShardDirectory(get_row_index())
+
 # Fungsi untuk menghubungkan ke Google Sheets
+# Koneksi dibangun di thread latar belakang agar form bisa langsung dirender
 @st.cache_resource
 def connect_to_gsheet():
-    scope = ["https://spreadsheets.google.com/feeds", "https://www.googleapis.com/auth/drive"]
-    
+    # Baca secrets di thread utama; thread latar belakang tidak memanggil st.*
+    credentials_info = None
     try:
-        # Cek apakah ada secrets yang tersedia
         if "gcp_service_account" in st.secrets:
-            # Gunakan secrets jika tersedia
-            credentials = Credentials.from_service_account_info(
-                st.secrets["gcp_service_account"],
-                scopes=scope
-            )
-            st.success("Berhasil menggunakan kredensial dari secrets.")
-        else:
-            # Definisikan path kredensial yang mungkin
-            cred_paths = [
-                r"D:\Perkuliahan\PRIGEL\Form Pendataan Desa Cantik\brave-reason-460003-d0-af9a852a98c9.json",
-                # Tambahkan path alternatif lain jika ada
-                "credentials.json",  # Untuk path relatif di direktori yang sama
-                os.path.join(os.path.expanduser("~"), "credentials.json")  # Di home directory
-            ]
-
-            credentials_found = False
-            for cred_path in cred_paths:
-                if os.path.exists(cred_path):
-                    st.info(f"Menggunakan kredensial dari file: {cred_path}")
-                    credentials = Credentials.from_service_account_file(
-                        cred_path,
-                        scopes=scope
-                    )
-                    credentials_found = True
-                    break
-            
-            if not credentials_found:
-                st.error("Tidak dapat menemukan file kredensial Google Cloud. Pastikan Anda telah menempatkan file credentials.json di direktori yang benar.")
-                return None
-        
-        # Authorize dengan gspread
-        client = gspread.authorize(credentials)
-        
-        # Buka spreadsheet dengan ID
-        spreadsheet_id = '1bb8_rTHLUKANZyi30FGRZO5vl44siHheV2AaFomH-D4'  
-        
-        try:
-            spreadsheet = client.open_by_key(spreadsheet_id)
-        except gspread.exceptions.SpreadsheetNotFound:
-            st.error(f"Spreadsheet dengan ID {spreadsheet_id} tidak ditemukan. Periksa ID dan pastikan kredensial memiliki akses.")
-            return None
-        except gspread.exceptions.APIError as e:
-            if "quota" in str(e).lower():
-                st.error("Kuota Google Sheets API terlampaui. Coba lagi nanti.")
-            else:
-                st.error(f"Error API Google Sheets: {e}")
-            return None
-        
-        # Coba dapatkan worksheet, jika tidak ada, buat baru
+            credentials_info = dict(st.secrets["gcp_service_account"])
+    except Exception:
+        pass  # Tidak ada secrets.toml, lanjut mencari file kredensial
+
+    shards = get_shard_directory()
+
+    def opener():
+        worksheet, source = open_worksheet(credentials_info)
+        # Muat direktori shard dan indeks baris shard aktif sekalian,
+        # supaya simpan pertama tidak perlu menghitung
         try:
-            worksheet = spreadsheet.worksheet("Data Industri")
-            
-            # Periksa jumlah baris yang sudah ada
-            try:
-                all_values = worksheet.get_all_values()
-                current_rows = len(all_values)
-                if current_rows > 900:  # Warning jika mendekati batas
-                    st.warning(f"Perhatian: Sheet sudah berisi {current_rows} baris data dari 1000 baris. Pertimbangkan untuk membuat sheet baru.")
-            except:
-                pass  # Jika gagal mendapatkan jumlah baris, lanjutkan saja
-                
-        except gspread.exceptions.WorksheetNotFound:
-            # Worksheet tidak ditemukan, buat baru
-            worksheet = spreadsheet.add_worksheet(title="Data Industri", rows=1000, cols=30)
-            
-            # Tambahkan header
-            headers = [
-                "Provinsi", "Kabupaten/Kota", "Kecamatan", "Desa/Kelurahan", "RT/RW", 
-                "Nama Pendata", "Nama Pemeriksa", "Tanggal", "Timestamp",
-                "Jumlah Industri Makanan", "Jumlah Industri Alat Rumah Tangga", 
-                "Jumlah Industri Material Bahan Bangunan", "Jumlah Industri Alat Pertanian",
-                "Jumlah Industri Kerajinan selain logam", "Jumlah Industri Logam", 
-                "Jumlah Industri Lainnya", "Nama Usaha", "Nama Pemilik", "Jumlah Tenaga Kerja",
-                "Ind.Makanan(3.1)", "Ind.Alat RT(3.2)", "Ind.Material(3.3)", 
-                "Ind.Alat Pertanian(3.4)", "Ind.Kerajinan(3.5)", "Ind.Logam(3.6)", 
-                "Ind.Lainnya(3.7)"
-            ]
-            worksheet.append_row(headers)
-            st.success("Worksheet 'Data Industri' berhasil dibuat!")
-            
-        return worksheet
-        
+            worksheet, _ = shards.route(worksheet.spreadsheet, 0)
+        except Exception:
+            pass
+        return worksheet, source
+
+    return SheetConnection(opener).start()
+
+# Salinan SQLite lokal dari semua shard untuk laporan tanpa memanggil API
+# Diisi dari SheetWriter dan penarikan delta berkala di latar belakang
+@st.cache_resource
+def get_sheet_mirror():
+    connection = connect_to_gsheet()
+    shards = get_shard_directory()
+
+    def worksheets_provider():
+        if not connection.ready() or connection.worksheet is None:
+            return []
+        return shards.shards(connection.worksheet.spreadsheet)
+
+    return SheetMirror().start_sync(worksheets_provider)
+
+# Antrean penyimpanan (jurnal lokal + pekerja latar belakang) dipakai bersama oleh semua sesi
+@st.cache_resource
+def get_sheet_writer():
+    # Worksheet baru ditunggu saat ada data yang akan dikirim, lalu diarahkan ke shard aktif
+    return start_sheet_writer(connect_to_gsheet(), get_shard_directory(), on_written=get_sheet_mirror().record_rows)
+
+# Fungsi untuk menampilkan status koneksi tanpa menunggu koneksi selesai
+def show_connection_status():
+    connection = connect_to_gsheet()
+    if not connection.ready():
+        st.info("Menghubungkan ke Google Sheets di latar belakang... Anda sudah bisa mulai mengisi form.")
+    elif connection.worksheet is not None:
+        st.success(f"Berhasil terhubung ke Google Sheets! ({connection.source})")
+        current_rows = get_row_index().peek(connection.worksheet)
+        if current_rows is not None:
+            st.caption(f"Sheet aktif: {connection.worksheet.title} ({current_rows} dari {SHEET_MAX_ROWS} baris). Sheet baru dibuat otomatis jika penuh.")
+    else:
+        st.error("Tidak dapat terhubung ke Google Sheets. Pastikan credentials sudah benar.")
+        st.error(connection.error)
+
+# Draf kuesioner yang belum dikirim, dipakai bersama oleh semua sesi
+@st.cache_resource
+def get_draft_store():
+    return DraftStore()
+
+# Parameter URL berisi ID draf; membuka ulang tautan yang sama (mis. setelah koneksi putus) melanjutkan draf
+DRAFT_PARAM = "draf"
+
+# Fungsi untuk menyimpan kuesioner yang sedang diisi ke draf lokal di server.
+# Dipanggil setelah setiap langkah yang mengubah data; kegagalan menulis draf tidak menghentikan pengisian.
+def persist_draft():
+    if not st.session_state.form_data or st.session_state.data_saved:
+        return
+    if st.session_state.draft_id is None:
+        st.session_state.draft_id = uuid.uuid4().hex
+        st.query_params[DRAFT_PARAM] = st.session_state.draft_id
+    try:
+        with spans.span("draft.save", usaha=len(st.session_state.usaha_data)):
+            get_draft_store().save(st.session_state.draft_id, {
+                field: st.session_state[field] for field in DRAFT_FIELDS
+            })
     except Exception as e:
-        st.error(f"Terjadi kesalahan dalam koneksi ke Google Sheets: {str(e)}")
-        import traceback
-        st.error(traceback.format_exc())  # Untuk debugging
-        return None
+        logger.warning("Gagal menyimpan draf %s: %s", st.session_state.draft_id, e)
 
-# Fungsi untuk membuat PDF
-def create_pdf(form_data, usaha_data):
-    # Perbaikan import statement - mengubah import ParagraphStyle
-    from reportlab.platypus import Paragraph
-    from reportlab.lib.styles import ParagraphStyle, getSampleStyleSheet
-    
-    buffer = io.BytesIO()
-    c = canvas.Canvas(buffer, pagesize=letter)
-    width, height = letter
-
-    # Konstanta untuk mengelola tata letak PDF
-    page_margin = 50 # Margin dari tepi halaman
-    max_text_width = width - (2 * page_margin) # Lebar maksimum untuk text
-    header_height = 100 # Ruang untuk header halaman
-    block_spacing = 30 # Spasi antar blok
-    row_height = 25 # Tinggi baris standar
-    
-    # Fungsi utilitas untuk membuat text yang bisa wrap
-    def get_wrapped_text(text, max_width, font_name, font_size):
-        if not text:
-            return [""]
-        
-        c.setFont(font_name, font_size)
-        words = text.split()
-        lines = []
-        current_line = []
-        
-        for word in words:
-            test_line = ' '.join(current_line + [word])
-            if c.stringWidth(test_line, font_name, font_size) <= max_width:
-                current_line.append(word)
-            else:
-                if current_line:
-                    lines.append(' '.join(current_line))
-                    current_line = [word]
-                else:
-                    # Jika satu kata sudah terlalu panjang, potong saja kata tersebut
-                    truncated_word = word
-                    while c.stringWidth(truncated_word, font_name, font_size) > max_width:
-                        truncated_word = truncated_word[:-1]
-                    
-                    lines.append(truncated_word)
-                    current_line = []
-        
-        if current_line:
-            lines.append(' '.join(current_line))
-        
-        return lines
-    
-    # Fungsi untuk membuat header pada setiap halaman
-    def create_header(canvas, page_number=1):
-        canvas.setFont("Times-Bold", 14)
-        
-        # Judul dalam huruf kapital
-        judul = "PENDATAAN INDUSTRI PENGOLAHAN DI KELURAHAN KEJAMBON"
-        text_width = canvas.stringWidth(judul, "Times-Bold", 14)
-        canvas.drawString((width - text_width) / 2, height - 50, judul)
-
-        # Subjudul
-        canvas.setFont("Times-Bold", 14)
-        subjudul = "KELURAHAN CINTA STATISTIK 2025"
-        text_width = canvas.stringWidth(subjudul, "Times-Bold", 14)
-        canvas.drawString((width - text_width) / 2, height - 80, subjudul)
-        
-        # Nomor halaman
-        if page_number > 1:
-            canvas.setFont("Times-Roman", 10)
-            page_text = f"Halaman {page_number}"
-            canvas.drawString(width - 80, height - 30, page_text)
-
-    # Halaman pertama - Header, BLOK I, BLOK II, dan BLOK III
-    create_header(c)
-    y_position = height - header_height
-    
-    # Sediakan ruang untuk setiap blok data
-    block_heights = {
-        "blok_i": 120,   # Estimasi tinggi BLOK I
-        "blok_ii": 90,   # Estimasi tinggi BLOK II
-        "blok_iii": 180  # Estimasi tinggi BLOK III
-    }
+# Fungsi untuk mengisi ulang widget halaman form dari form_data (tanggal sebagai date, jumlah sebagai int)
+def restore_form_widgets(form_data):
+    for key in FORM_KEYS:
+        if key not in form_data:
+            continue
+        value = form_data[key]
+        if key == "tanggal":
+            try:
+                value = date.fromisoformat(str(value))
+            except ValueError:
+                continue
+        elif key in JML_KEYS:
+            value = as_int(value) or 0
+        st.session_state[key] = value
 
-    # BLOK I
-    data = [
-        ["BLOK I. KETERANGAN TEMPAT", "", ""],
-        ["1.1", "Provinsi", form_data["provinsi"]],
-        ["1.2", "Kabupaten/Kota", form_data["kabupaten"]],
-        ["1.3", "Kecamatan", form_data["kecamatan"]],
-        ["1.4", "Desa/Kelurahan", form_data["desa"]],
-        ["1.5", "SLS (RT/RW)", f"RT {form_data['rt']} RW {form_data['rw']}"]
-    ]
-    
-    table = Table(data, colWidths=[40, 150, 300])
-    table.setStyle(TableStyle([
-        ('GRID', (0, 1), (-1, -1), 0.5, colors.black),
-        ('BOX', (0, 0), (-1, 0), 0.5, colors.black),
-        ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
-        ('ALIGN', (0, 0), (-1, 0), 'CENTER'),
-        ('ALIGN', (1, 1), (1, -1), 'LEFT'),
-        ('ALIGN', (0, 1), (0, -1), 'CENTER'),
-        ('ALIGN', (2, 1), (2, -1), 'CENTER'),
-        ('SPAN', (0, 0), (2, 0)),
-        ('BACKGROUND', (0, 0), (-1, 0), colors.lightgrey),
-        ('FONTNAME', (0, 0), (-1, -1), 'Times-Roman'),
-        ('FONTNAME', (0, 0), (-1, 0), 'Times-Bold'),
-        ('PADDING', (0, 0), (-1, -1), 6),
-    ]))
-    
-    # Periksa apakah BLOK I muat di halaman ini
-    if y_position - block_heights["blok_i"] < page_margin:
-        c.showPage()
-        create_header(c, 2)
-        y_position = height - header_height
-    
-    table.wrapOn(c, width, height)
-    table.drawOn(c, page_margin, y_position - block_heights["blok_i"])
-    y_position -= (block_heights["blok_i"] + block_spacing)
-
-    # BLOK II
-    data = [
-        ["BLOK II. KETERANGAN PENDATAAN", "", "", "", ""],
-        ["", "Uraian", "Nama", "Tanggal", "Tanda Tangan"],
-        ["2.1", "Pendata", form_data["nama_pendata"], form_data["tanggal"], ""],
-        ["2.2", "Pemeriksa", form_data["nama_pemeriksa"], form_data["tanggal"], ""]
-    ]
-    
-    table = Table(data, colWidths=[40, 100, 150, 100, 100])
-    table.setStyle(TableStyle([
-        ('GRID', (0, 1), (-1, -1), 0.5, colors.black),
-        ('BOX', (0, 0), (-1, 0), 0.5, colors.black),
-        ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
-        ('ALIGN', (0, 0), (-1, 1), 'CENTER'),
-        ('ALIGN', (0, 2), (0, -1), 'CENTER'),
-        ('SPAN', (0, 0), (4, 0)),
-        ('BACKGROUND', (0, 0), (-1, 0), colors.lightgrey),
-        ('BACKGROUND', (0, 1), (-1, 1), colors.lightgrey),
-        ('FONTNAME', (0, 0), (-1, -1), 'Times-Roman'),
-        ('FONTNAME', (0, 0), (-1, 0), 'Times-Bold'),
-        ('PADDING', (0, 0), (-1, -1), 6),
-    ]))
-    
-    # Periksa apakah BLOK II muat di halaman ini
-    if y_position - block_heights["blok_ii"] < page_margin:
-        c.showPage()
-        create_header(c, 2)
-        y_position = height - header_height
-    
-    table.wrapOn(c, width, height)
-    table.drawOn(c, page_margin, y_position - block_heights["blok_ii"])
-    y_position -= (block_heights["blok_ii"] + block_spacing)
-
-    # BLOK III
-    data = [
-        ["BLOK III. REKAPITULASI", "", ""],
-        ["", "Industri Mikro Kecil dan Menengah", "Jumlah (diisi oleh Pemeriksa)"],
-        ["3.1", "Industri Makanan", form_data["jml_industri_makanan"]],
-        ["3.2", "Industri Alat Rumah Tangga", form_data["jml_industri_alat_rt"]],
-        ["3.3", "Industri Material Bahan Bangunan", form_data["jml_industri_material"]],
-        ["3.4", "Industri Alat Pertanian", form_data["jml_industri_alat_pertanian"]],
-        ["3.5", "Industri Kerajinan selain logam", form_data["jml_industri_kerajinan"]],
-        ["3.6", "Industri Logam", form_data["jml_industri_logam"]],
-        ["3.7", "Industri Lainnya", form_data["jml_industri_lainnya"]],
-    ]
-    
-    table = Table(data, colWidths=[40, 250, 200])
-    table.setStyle(TableStyle([
-        ('GRID', (0, 1), (-1, -1), 0.5, colors.black),
-        ('BOX', (0, 0), (-1, 0), 0.5, colors.black),
-        ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
-        ('ALIGN', (0, 0), (-1, 1), 'CENTER'),
-        ('ALIGN', (0, 2), (0, -1), 'CENTER'),
-        ('SPAN', (0, 0), (2, 0)),
-        ('BACKGROUND', (0, 0), (-1, 0), colors.lightgrey),
-        ('BACKGROUND', (0, 1), (-1, 1), colors.lightgrey),
-        ('FONTNAME', (0, 0), (-1, -1), 'Times-Roman'),
-        ('FONTNAME', (0, 0), (-1, 0), 'Times-Bold'),
-        ('PADDING', (0, 0), (-1, -1), 6),
-    ]))
-    
-    # Periksa apakah BLOK III muat di halaman ini
-    if y_position - block_heights["blok_iii"] < page_margin:
-        c.showPage()
-        create_header(c, 2)
-        y_position = height - header_height
-    
-    table.wrapOn(c, width, height)
-    table.drawOn(c, page_margin, y_position - block_heights["blok_iii"])
+# Fungsi untuk memuat draf ke session_state; mengembalikan False jika draf tidak ditemukan
+def restore_draft(draft_id):
+    state = get_draft_store().load(draft_id)
+    if state is None:
+        return False
+    for field in DRAFT_FIELDS:
+        st.session_state[field] = state[field]
+    restore_form_widgets(state["form_data"])
+    st.session_state.draft_id = draft_id
+    st.session_state.data_saved = False
+    st.session_state.save_ack = None
+    st.session_state.pdf_download = None
+    st.session_state.edit_mode = None
+    st.query_params[DRAFT_PARAM] = draft_id
+    return True
 
-    # Halaman Baru untuk BLOK IV
-    c.showPage()
-    page_number = 2
-    create_header(c, page_number)
+# Rekap dan pemeriksaan konsistensi dipakai bersama oleh semua sesi.
+# Setiap kali dashboard dibuka hanya baris baru di mirror lokal yang diolah (MirrorFeed).
+@st.cache_resource
+def get_rekap_caches():
+    rekap_cache = rekap.RekapCache()
+    consistency_index = consistency.ConsistencyIndex()
+    return rekap.MirrorFeed(get_sheet_mirror(), [rekap_cache, consistency_index]), rekap_cache, consistency_index
 
-    # Konstanta untuk tata letak BLOK IV
-    block_iv_header_height = 80  # Tinggi header BLOK IV
-    max_rows_per_page = (height - header_height - block_iv_header_height - page_margin) // row_height
-    
-    # Definisi lebar kolom
-    col_widths = [30, 100, 100, 30, 30, 30, 30, 30, 30, 30, 60]
-    
-    # Hitung total industri dan tenaga kerja
-    total_industri = [0] * 7
-    total_tenaga_kerja = 0
-    for usaha in usaha_data:
-        for j in range(1, 8):
-            if f"3.{j}" in usaha["kode_industri"]:
-                total_industri[j-1] += 1
-        total_tenaga_kerja += int(usaha["jumlah_tenaga_kerja"])
-    
-    # Fungsi untuk membuat dan menggambar header tabel BLOK IV
-    def draw_block_iv_header(canvas, y_pos):
-        headers = [
-            ["BLOK IV. KETERANGAN USAHA", "", "", "", "", "", "", "", "", "", ""],
-            ["No", "Nama Usaha", "Nama Pemilik", "Kode Jenis Industri Mikro Kecil dan Menengah", "", "", "", "", "", "", "Jumlah\nTenaga Kerja"],
-            ["", "", "", "3.1", "3.2", "3.3", "3.4", "3.5", "3.6", "3.7", ""]
-        ]
-        header_table = Table(headers, colWidths=col_widths)
-        header_table.setStyle(TableStyle([
-            ('GRID', (0, 1), (-1, -1), 0.5, colors.black),
-            ('GRID', (0, 1), (-1, 2), 0.5, colors.black),
-            ('BOX', (0, 0), (-1, 0), 0.5, colors.black),
-            ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
-            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-            ('SPAN', (0, 0), (10, 0)),
-            ('SPAN', (0, 1), (0, 2)),
-            ('SPAN', (1, 1), (1, 2)),
-            ('SPAN', (2, 1), (2, 2)),
-            ('SPAN', (3, 1), (9, 1)),
-            ('SPAN', (10, 1), (10, 2)),
-            ('BACKGROUND', (0, 0), (-1, 0), colors.lightgrey),
-            ('BACKGROUND', (0, 1), (-1, 2), colors.lightgrey),
-            ('FONTNAME', (0, 0), (-1, -1), 'Times-Roman'),
-            ('FONTNAME', (0, 0), (-1, 0), 'Times-Bold'),
-            ('PADDING', (0, 0), (-1, -1), 3),  # Kurangi padding agar tidak terlihat berspasi
-        ]))
-        header_table.wrapOn(canvas, width, height)
-        header_table.drawOn(canvas, page_margin, y_pos - block_iv_header_height)
-        return y_pos - block_iv_header_height
-
-    # Fungsi untuk menghitung tinggi baris yang diperlukan untuk teks yang di-wrap
-    def calculate_row_height(name_usaha, name_pemilik, max_width_usaha, max_width_pemilik, font_name, font_size):
-        lines_usaha = len(get_wrapped_text(name_usaha, max_width_usaha, font_name, font_size))
-        lines_pemilik = len(get_wrapped_text(name_pemilik, max_width_pemilik, font_name, font_size))
-        max_lines = max(lines_usaha, lines_pemilik, 1)  # Minimal 1 baris
-        return max_lines * (row_height - 6)  # Tinggi baris dasar dikurangi sedikit untuk padding
-
-    # Fungsi untuk menggambar baris data dengan handling wrapping teks
-    def draw_usaha_rows(canvas, start_index, end_index, y_pos):
-        # Siapkan data untuk tabel dengan paragraf untuk teks panjang
-        rows_data = []
-        row_heights = []
-        
-        # Persiapkan style paragraf untuk text wrapping
-        style = ParagraphStyle(
-            name='Normal',
-            fontName='Times-Roman',
-            fontSize=10,
-            leading=12,  # Jarak antar baris dalam paragraf
-            alignment=0  # 0=kiri, 1=tengah, 2=kanan
-        )
-        
-        for i in range(start_index, min(end_index, len(usaha_data))):
-            usaha = usaha_data[i]
-            
-            # Gunakan Paragraph untuk teks yang panjang
-            nama_usaha_para = Paragraph(usaha["nama_usaha"], style)
-            nama_pemilik_para = Paragraph(usaha["nama_pemilik"], style)
-            
-            row = [str(i+1), nama_usaha_para, nama_pemilik_para]
-            for j in range(1, 8):
-                kode = f"3.{j}"
-                row.append("✓" if kode in usaha["kode_industri"] else "")
-            row.append(str(usaha["jumlah_tenaga_kerja"]))
-            rows_data.append(row)
-            
-            # Minimal tinggi baris adalah 30 poin (bisa disesuaikan)
-            # Kita tidak perlu menghitung tinggi secara manual lagi,
-            # karena ReportLab akan menghitungnya berdasarkan Paragraph
-            row_heights.append(30)
-        
-        if rows_data:
-            # Buat tabel dengan baris data yang sudah berisi Paragraph
-            data_table = Table(rows_data, colWidths=col_widths)
-            
-            data_table.setStyle(TableStyle([
-                ('GRID', (0, 0), (-1, -1), 0.5, colors.black),
-                ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
-                ('ALIGN', (0, 0), (0, -1), 'CENTER'),  # Kolom No (0) tengah
-                ('ALIGN', (3, 0), (9, -1), 'CENTER'),  # Kode industri tengah
-                ('ALIGN', (10, 0), (10, -1), 'CENTER'), # Jumlah tenaga kerja tengah
-                ('FONTNAME', (0, 0), (0, -1), 'Times-Roman'),
-                ('FONTNAME', (3, 0), (-1, -1), 'Times-Roman'),
-                ('PADDING', (0, 0), (-1, -1), 2),      # Kurangi padding lebih lagi
-            ]))
-            
-            # Biarkan ReportLab menentukan tinggi yang tepat
-            w, h = data_table.wrapOn(canvas, width - 2*page_margin, height)
-            data_table.drawOn(canvas, page_margin, y_pos - h)
-            return y_pos - h
-        
-        return y_pos
-
-    # Fungsi untuk menggambar baris jumlah
-    def draw_total_row(canvas, y_pos):
-        jumlah_row = [["Jumlah", "", ""] + [str(j) for j in total_industri] + [str(total_tenaga_kerja)]]
-        total_table = Table(jumlah_row, colWidths=col_widths)
-        total_table.setStyle(TableStyle([
-            ('GRID', (0, 0), (-1, -1), 0.5, colors.black),
-            ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
-            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-            ('SPAN', (0, 0), (2, 0)), # Gabungkan 3 kolom pertama untuk "Jumlah"
-            ('BACKGROUND', (0, 0), (-1, 0), colors.lightgrey),
-            ('FONTNAME', (0, 0), (-1, -1), 'Times-Bold'),
-            ('PADDING', (0, 0), (-1, -1), 2),  # Kurangi padding agar tidak terlihat berspasi
-        ]))
-        w, h = total_table.wrapOn(canvas, width - 2*page_margin, height)
-        total_table.drawOn(canvas, page_margin, y_pos - h)
-        return y_pos - h
-
-    # Proses menghitung tinggi baris yang diperlukan untuk setiap data usaha
-    row_heights = []
-    for usaha in usaha_data:
-        height_needed = calculate_row_height(
-            usaha["nama_usaha"], 
-            usaha["nama_pemilik"],
-            col_widths[1] - 12,
-            col_widths[2] - 12,
-            "Times-Roman", 
-            10
-        )
-        row_heights.append(height_needed)
+# Hasil validasi file impor di-cache per isi file, jadi rerun tidak membaca ulang file
+@st.cache_data(max_entries=20, show_spinner="Memeriksa file impor...")
+def load_usaha_import(data, filename):
+    return import_usaha(data, filename)
 
-    # Mulai menggambar BLOK IV
-    y_position = height - header_height  # Posisi awal setelah header halaman
-    
-    # Gambar header BLOK IV
-    y_position = draw_block_iv_header(c, y_position)
-    
-    # Inisialisasi style paragraph untuk digunakan nanti
-    styles = getSampleStyleSheet()
-    normal_style = styles['Normal']
-    normal_style.fontSize = 10
-    normal_style.fontName = 'Times-Roman'
-    normal_style.leading = 12  # Jarak antar baris
-    
-    # Proses data usaha per halaman
-    current_row = 0
-    
-    while current_row < len(usaha_data):
-        # Tentukan perkiraan berapa baris yang bisa ditampilkan
-        rows_left = len(usaha_data) - current_row
-        estimated_rows = min(max_rows_per_page, rows_left)
-        
-        # Gambar baris-baris data
-        new_y_position = draw_usaha_rows(c, current_row, current_row + estimated_rows, y_position)
-        rows_drawn = min(estimated_rows, rows_left)
-        current_row += rows_drawn
-        y_position = new_y_position
-        
-        # Cek apakah ini adalah baris terakhir
-        if current_row >= len(usaha_data):
-            # Jika sudah mencapai baris terakhir, tambahkan baris total
-            if (y_position - 30) >= page_margin:  # Perkiraan tinggi baris total
-                draw_total_row(c, y_position)
-            else:
-                # Tidak cukup ruang, buat halaman baru untuk total
-                c.showPage()
-                page_number += 1
-                create_header(c, page_number)
-                y_position = height - header_height
-                y_position = draw_block_iv_header(c, y_position)
-                draw_total_row(c, y_position)
-        elif (y_position - 30) < page_margin:
-            # Tidak cukup ruang untuk baris berikutnya, buat halaman baru
-            c.showPage()
-            page_number += 1
-            create_header(c, page_number)
-            y_position = height - header_height
-            y_position = draw_block_iv_header(c, y_position)
-    
-    # Selesai membuat PDF
-    c.save()
-    buffer.seek(0)
-    return buffer
+# Dashboard rekap (berisi nama pendata dan pemilik usaha) hanya untuk pemeriksa, lewat secrets:
+#   [rekap]
+#   admin_key = "..."
+# Tanpa kunci ini dashboard tidak ditampilkan sama sekali.
+def get_rekap_admin_key():
+    try:
+        if "rekap" in st.secrets:
+            return str(st.secrets["rekap"].get("admin_key") or "") or None
+    except Exception:
+        pass  # Tidak ada secrets.toml: dashboard nonaktif
+    return None
+
+# Fungsi untuk memeriksa apakah sesi ini sudah memasukkan kunci admin rekap yang benar
+def has_rekap_access():
+    admin_key = get_rekap_admin_key()
+    entered = st.session_state.get('rekap_admin_key', "")
+    return admin_key is not None and hmac.compare_digest(entered.encode(), admin_key.encode())
+
+# Salin isian kunci ke state biasa: state widget hilang setelah kolom kunci tidak dirender
+def remember_rekap_key():
+    st.session_state.rekap_admin_key = st.session_state.rekap_key_input
+
+# Fungsi untuk menampilkan dashboard rekap pemeriksa
+def show_rekap_dashboard():
+    st.header("Dashboard Rekap Pemeriksa")
+    if not has_rekap_access():
+        st.error("Dashboard rekap hanya untuk pemeriksa. Masukkan kunci admin di sidebar.")
+        return
+    feed, rekap_cache, consistency_index = get_rekap_caches()
+    with spans.span("rekap.refresh"):
+        feed.refresh()
+    total = rekap_cache.totals()
+    if not total["usaha"]:
+        st.info("Belum ada data di salinan lokal. Data muncul setelah ada yang tersimpan atau setelah sinkronisasi dengan Google Sheets.")
+        return
+
+    col1, col2, col3 = st.columns(3)
+    col1.metric("Kuesioner", f"{total['kuesioner']:,}")
+    col2.metric("Usaha", f"{total['usaha']:,}")
+    col3.metric("Tenaga Kerja", f"{total['tenaga_kerja']:,}")
+
+    level = st.radio("Rekap per", list(rekap.LEVELS), index=1, horizontal=True)
+    st.dataframe(rekap_cache.recap(level), hide_index=True, width="stretch")
+    st.caption("Data dari salinan lokal Google Sheets: baris yang baru tersimpan langsung ikut, "
+               "perubahan dari Google Sheets ditarik berkala di latar belakang.")
+
+    # Pemeriksaan konsistensi BLOK III vs BLOK IV dan usaha kembar di seluruh data
+    st.subheader("Pemeriksaan Konsistensi")
+    show_consistency_report("kuesioner_tidak_konsisten", "Kuesioner dengan jumlah BLOK III berbeda dari flag BLOK IV",
+                            consistency_index.count_mismatches())
+    # Daftar usaha kembar memuat nama pemilik: tabel dan CSV-nya hanya disusun setelah kunci admin diperiksa
+    if has_rekap_access():
+        show_consistency_report("usaha_kembar", "Usaha yang tercatat lebih dari sekali dalam satu desa",
+                                consistency_index.duplicate_businesses())
+
+# Fungsi untuk menampilkan satu laporan konsistensi beserta tombol unduh CSV
+def show_consistency_report(name, title, report):
+    with st.expander(f"{title}: {len(report):,}", expanded=False):
+        if report.empty:
+            st.success("Tidak ada temuan.")
+            return
+        st.dataframe(report, hide_index=True, width="stretch")
+        st.download_button(
+            "Unduh CSV",
+            data=report.to_csv(index=False).encode("utf-8"),
+            file_name=f"{name}.csv",
+            mime="text/csv",
+            key=f"unduh_{name}",
+            on_click="ignore",
+        )
 
 # Fungsi untuk menyimpan data ke Google Sheets
-def save_to_gsheet(worksheet, form_data, usaha_data):
-    if worksheet is None:
-        st.error("Tidak dapat menyimpan data: koneksi worksheet tidak tersedia")
+# submission_id dibuat sekali per kuesioner, jadi klik ulang/retry tidak menambah baris ganda
+def save_to_gsheet(writer, form_data, usaha_data, submission_id=None):
+    if writer is None:
+        st.error("Tidak dapat menyimpan data: antrean penyimpanan tidak tersedia")
         return False
 
     try:
@@ -512,84 +302,21 @@ def save_to_gsheet(worksheet, form_data, usaha_data):
         timestamp = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
         
         # Untuk efisiensi, siapkan semua baris sekaligus untuk append_rows
-        all_rows = []
-        
-        for usaha in usaha_data:
-            # Siapkan kolom industri sebagai biner (1 atau 0)
-            industri_flags = {
-                "3.1": 0,
-                "3.2": 0,
-                "3.3": 0,
-                "3.4": 0,
-                "3.5": 0,
-                "3.6": 0,
-                "3.7": 0
-            }
-            for kode in usaha["kode_industri"]:
-                if kode in industri_flags:
-                    industri_flags[kode] = 1
-
-            # Susun baris data
-            row_data = [
-                form_data["provinsi"],
-                form_data["kabupaten"],
-                form_data["kecamatan"],
-                form_data["desa"],
-                f"RT {form_data['rt']} RW {form_data['rw']}",
-                form_data["nama_pendata"],
-                form_data["nama_pemeriksa"],
-                form_data["tanggal"],
-                timestamp,  # Tambahkan timestamp
-                form_data["jml_industri_makanan"],
-                form_data["jml_industri_alat_rt"],
-                form_data["jml_industri_material"],
-                form_data["jml_industri_alat_pertanian"],
-                form_data["jml_industri_kerajinan"],
-                form_data["jml_industri_logam"],
-                form_data["jml_industri_lainnya"],
-                usaha["nama_usaha"],
-                usaha["nama_pemilik"],
-                usaha["jumlah_tenaga_kerja"],
-                industri_flags["3.1"],
-                industri_flags["3.2"],
-                industri_flags["3.3"],
-                industri_flags["3.4"],
-                industri_flags["3.5"],
-                industri_flags["3.6"],
-                industri_flags["3.7"]
-            ]
-            
-            # Tambahkan ke daftar baris
-            all_rows.append(row_data)
+        with spans.span("build_rows", usaha=len(usaha_data)):
+            all_rows = build_rows(form_data, usaha_data, timestamp, submission_id or "")
 
         # Jika ada data untuk disimpan
         if all_rows:
-            # Cek ruang yang tersedia
-            try:
-                cell_values = worksheet.get_all_values()
-                current_rows = len(cell_values)
-                if current_rows + len(all_rows) > 1000:
-                    st.warning(f"Perhatian: Setelah menambahkan data ini, sheet akan berisi {current_rows + len(all_rows)} baris dari 1000 baris maksimum.")
-            except:
-                pass  # Jika gagal memeriksa, lanjutkan saja
-            
-            # Simpan semua baris sekaligus untuk efisiensi
-            try:
-                # Gunakan batch append untuk efisiensi
-                if len(all_rows) > 1:
-                    worksheet.append_rows(all_rows)
-                    st.success(f"Berhasil menyimpan {len(all_rows)} data usaha ke Google Sheets!")
-                else:
-                    worksheet.append_row(all_rows[0])
-                    st.success("Berhasil menyimpan data usaha ke Google Sheets!")
-                
-                return True
-            except gspread.exceptions.APIError as e:
-                if "quota" in str(e).lower():
-                    st.error("Kuota Google Sheets API terlampaui. Coba lagi nanti atau simpan data secara lokal terlebih dahulu.")
-                else:
-                    st.error(f"Error API Google Sheets: {e}")
-                return False
+            # Tulis ke jurnal lokal; pengiriman ke Google Sheets (shard aktif) dilakukan di latar belakang
+            with spans.span("submit", rows=len(all_rows)):
+                st.session_state.save_ack = writer.submit(all_rows, submission_id)
+            # Kuesioner sudah aman di jurnal pengiriman; draf tidak diperlukan lagi
+            if st.session_state.get('draft_id'):
+                get_draft_store().delete(st.session_state.draft_id)
+            st.success(f"Berhasil menyimpan {len(all_rows)} data usaha. Data dikirim ke Google Sheets di latar belakang.")
+            if writer.last_error:
+                st.info(f"Pengiriman sebelumnya tertunda ({writer.last_error}). Data aman di antrean lokal dan akan dicoba lagi otomatis.")
+            return True
         else:
             st.warning("Tidak ada data usaha untuk disimpan.")
             return False
@@ -613,10 +340,22 @@ if 'jumlah_usaha' not in st.session_state:
     st.session_state.jumlah_usaha = 0
 if 'data_saved' not in st.session_state:
     st.session_state.data_saved = False    
+if 'save_ack' not in st.session_state:
+    st.session_state.save_ack = None
+if 'pdf_download' not in st.session_state:
+    st.session_state.pdf_download = None
+if 'submission_id' not in st.session_state:
+    st.session_state.submission_id = None
+if 'run_timings' not in st.session_state:
+    st.session_state.run_timings = RunTimings()
+if 'draft_id' not in st.session_state:
+    st.session_state.draft_id = None
+    # Sesi baru dengan ?draf=<id> di URL (reload atau sambung ulang setelah koneksi putus): lanjutkan draf
+    draft_param = st.query_params.get(DRAFT_PARAM)
+    if draft_param:
+        st.session_state.draft_restored = restore_draft(draft_param)
 if 'edit_mode' not in st.session_state:
     st.session_state.edit_mode = None
-if 'edit_form_data' not in st.session_state:
-    st.session_state.edit_form_data = {}
 if 'edit_usaha_index' not in st.session_state:
     st.session_state.edit_usaha_index = 0
 
@@ -624,10 +363,27 @@ if 'edit_usaha_index' not in st.session_state:
 def set_page(page):
     st.session_state.page = page
 
+# Navigasi ke dashboard rekap (hanya setelah kunci admin benar); halaman form yang sedang diisi diingat untuk kembali
+if st.session_state.page != 'rekap':
+    if has_rekap_access():
+        if st.sidebar.button("Dashboard Rekap Pemeriksa"):
+            st.session_state.page_before_rekap = st.session_state.page
+            set_page('rekap')
+            st.rerun()
+    elif get_rekap_admin_key() is not None:
+        with st.sidebar.expander("Dashboard Rekap Pemeriksa"):
+            st.text_input("Kunci admin", type="password", key="rekap_key_input", on_change=remember_rekap_key)
+            if st.session_state.get('rekap_admin_key'):
+                st.error("Kunci admin salah")
+elif st.sidebar.button("Kembali ke Form"):
+    set_page(st.session_state.get('page_before_rekap', 'form'))
+    st.rerun()
+
 # Fungsi untuk menyimpan data form
 def save_form_data():
     # Validasi form terlebih dahulu
-    is_valid, error_messages = validate_form_data()
+    with spans.span("validate"):
+        is_valid, error_messages = validate_form_data()
     
     if not is_valid:
         # Tampilkan pesan error
@@ -637,15 +393,7 @@ def save_form_data():
         return False  # Tidak lanjut ke halaman berikutnya
     
     # Jika validasi berhasil, lanjutkan seperti biasa
-    total_usaha = (
-        int(st.session_state.jml_industri_makanan) +
-        int(st.session_state.jml_industri_alat_rt) +
-        int(st.session_state.jml_industri_material) +
-        int(st.session_state.jml_industri_alat_pertanian) +
-        int(st.session_state.jml_industri_kerajinan) +
-        int(st.session_state.jml_industri_logam) +
-        int(st.session_state.jml_industri_lainnya)
-    )
+    total_usaha = count_usaha(st.session_state)
     
     form_data = {
         "provinsi": st.session_state.provinsi.strip(),
@@ -669,35 +417,17 @@ def save_form_data():
     st.session_state.form_data = form_data
     st.session_state.jumlah_usaha = total_usaha
     set_page('usaha')
+    persist_draft()
     return True
 
-# Fungsi untuk menyimpan data usaha
-def save_usaha_data():
-    # Kumpulkan kode industri dari checkbox
-    kode_industri = []
-    if st.session_state.industri_makanan:
-        kode_industri.append("3.1")
-    if st.session_state.industri_alat_rt:
-        kode_industri.append("3.2")
-    if st.session_state.industri_material:
-        kode_industri.append("3.3")
-    if st.session_state.industri_alat_pertanian:
-        kode_industri.append("3.4")
-    if st.session_state.industri_kerajinan:
-        kode_industri.append("3.5")
-    if st.session_state.industri_logam:
-        kode_industri.append("3.6")
-    if st.session_state.industri_lainnya:
-        kode_industri.append("3.7")
-
-    # Data usaha yang akan disimpan
-    usaha_data = {
-        "nama_usaha": st.session_state.nama_usaha,
-        "nama_pemilik": st.session_state.nama_pemilik,
-        "kode_industri": kode_industri,
-        "jumlah_tenaga_kerja": st.session_state.jumlah_tenaga_kerja
-    }
+# Key checkbox kode industri 3.1-3.7 di form usaha (urutan sesuai KODE_INDUSTRI)
+INDUSTRI_KEYS = [
+    "industri_makanan", "industri_alat_rt", "industri_material", "industri_alat_pertanian",
+    "industri_kerajinan", "industri_logam", "industri_lainnya",
+]
 
+# Fungsi untuk menyimpan data usaha
+def save_usaha_data(usaha_data):
     # Simpan ke session_state.usaha_data
     if st.session_state.current_usaha < len(st.session_state.usaha_data):
         st.session_state.usaha_data[st.session_state.current_usaha] = usaha_data
@@ -710,18 +440,57 @@ def save_usaha_data():
     # Jika sudah selesai semua, lanjut ke halaman preview
     if st.session_state.current_usaha >= st.session_state.jumlah_usaha:
         set_page('preview')
+        persist_draft()
+        st.rerun()
     else:
+        persist_draft()
+
         # Hapus key input agar tidak error saat render ulang
-        for key in [
-            "nama_usaha", "nama_pemilik", "industri_makanan", "industri_alat_rt",
-            "industri_material", "industri_alat_pertanian", "industri_kerajinan",
-            "industri_logam", "industri_lainnya", "jumlah_tenaga_kerja"
-        ]:
+        for key in ["nama_usaha", "nama_pemilik", *INDUSTRI_KEYS, "jumlah_tenaga_kerja"]:
             if key in st.session_state:
                 del st.session_state[key]
 
         # Render ulang halaman agar field kosong kembali
+        rerun_page()
+
+# Fungsi untuk mengisi usaha yang tersisa dari file impor sekaligus (tanpa rerun per usaha)
+def apply_usaha_import(imported):
+    start = st.session_state.current_usaha
+    st.session_state.usaha_data = st.session_state.usaha_data[:start] + list(imported)
+    st.session_state.current_usaha = start + len(imported)
+    if st.session_state.current_usaha >= st.session_state.jumlah_usaha:
+        set_page('preview')
+    persist_draft()
+    if st.session_state.page == 'preview':
         st.rerun()
+    rerun_page()
+
+# Fungsi untuk menampilkan semua usaha dalam satu tabel edit di dalam form.
+# Sel bisa diubah tanpa rerun; saat disimpan, perubahan divalidasi dan diterapkan sekaligus.
+# Mengembalikan (usaha_data baru, indeks usaha yang berubah), atau None jika belum disimpan/tidak valid.
+def edit_usaha_grid(key, usaha_data, submit_label):
+    column_config = {
+        "Nama Usaha": st.column_config.TextColumn("Nama Usaha", required=True),
+        "Nama Pemilik": st.column_config.TextColumn("Nama Pemilik", required=True),
+        "Jumlah Tenaga Kerja": st.column_config.NumberColumn("Tenaga Kerja", min_value=1, step=1,
+                                                             help="Termasuk pemilik usaha"),
+    }
+    for kode, column in zip(KODE_INDUSTRI, FLAG_COLUMNS):
+        column_config[column] = st.column_config.CheckboxColumn(kode, help=column)
+
+    with st.form(key):
+        edited = st.data_editor(usaha_frame(usaha_data), key=f"{key}_editor", num_rows="fixed",
+                                column_config=column_config, width="stretch")
+        submitted = st.form_submit_button(submit_label)
+    if not submitted:
+        return None
+    with spans.span("validate.usaha", usaha=len(usaha_data)):
+        updated, changed, errors = apply_usaha_frame(usaha_data, edited)
+    if not errors.empty:
+        st.error(f"{errors['Baris'].nunique()} usaha belum valid; tidak ada perubahan yang disimpan:")
+        st.dataframe(errors.rename(columns={"Baris": "Usaha ke-"}), hide_index=True, width="stretch")
+        return None
+    return updated, changed
 
 # Fungsi untuk kembali ke halaman form dari halaman usaha
 def back_to_form():
@@ -729,6 +498,7 @@ def back_to_form():
     st.session_state.usaha_data = []
     st.session_state.current_usaha = 0
     set_page('form')
+    persist_draft()
 
 # Fungsi reset_form_state untuk mengatur ulang seluruh state aplikasi
 def reset_form_state():
@@ -745,10 +515,16 @@ def reset_form_state():
     
     # Reset status penyimpanan data
     st.session_state.data_saved = False
+    st.session_state.save_ack = None
+    st.session_state.pdf_download = None
+    st.session_state.submission_id = None
+
+    # Lepas draf dari sesi; draf yang belum dikirim tetap bisa dilanjutkan dengan kode draf atau tautan ?draf=
+    st.session_state.draft_id = None
+    st.query_params.pop(DRAFT_PARAM, None)
     
     # Reset state edit - BARU
     st.session_state.edit_mode = None
-    st.session_state.edit_form_data = {}
     st.session_state.edit_usaha_index = 0
     
     # Hapus key input lainnya jika ada
@@ -773,151 +549,14 @@ def reset_form_state():
             del st.session_state[key]
 
 
-# FUNGSI Untuk mengatur mode edit
-def set_edit_mode(mode):
-    st.session_state.edit_mode = mode
-    if mode == 'form':
-        st.session_state.edit_form_data = st.session_state.form_data.copy()
-    elif mode == 'usaha':
-        st.session_state.edit_usaha_index = 0
-
-# FUNGSI Untuk menyimpan hasil edit form
-def save_edited_form():
-    st.session_state.form_data = st.session_state.edit_form_data.copy()
-    # Hitung ulang jumlah usaha berdasarkan edit
-    total_usaha = (
-        int(st.session_state.edit_form_data['jml_industri_makanan']) +
-        int(st.session_state.edit_form_data['jml_industri_alat_rt']) +
-        int(st.session_state.edit_form_data['jml_industri_material']) +
-        int(st.session_state.edit_form_data['jml_industri_alat_pertanian']) +
-        int(st.session_state.edit_form_data['jml_industri_kerajinan']) +
-        int(st.session_state.edit_form_data['jml_industri_logam']) +
-        int(st.session_state.edit_form_data['jml_industri_lainnya'])
-    )
-    
-    # Jika jumlah usaha berubah, sesuaikan data usaha
-    current_usaha_count = len(st.session_state.usaha_data)
-    if total_usaha < current_usaha_count:
-        # Kurangi data usaha
-        st.session_state.usaha_data = st.session_state.usaha_data[:total_usaha]
-        st.warning(f"Data usaha dikurangi dari {current_usaha_count} menjadi {total_usaha}")
-    elif total_usaha > current_usaha_count:
-        # Tambah slot usaha kosong
-        for i in range(total_usaha - current_usaha_count):
-            st.session_state.usaha_data.append({
-                "nama_usaha": "",
-                "nama_pemilik": "",
-                "kode_industri": [],
-                "jumlah_tenaga_kerja": 0
-            })
-        st.warning(f"Slot usaha ditambah dari {current_usaha_count} menjadi {total_usaha}. Silakan isi data usaha yang kosong.")
-    
-    st.session_state.jumlah_usaha = total_usaha
-    st.session_state.edit_mode = None
-    st.success("Data form berhasil diperbarui!")
-
-# FUNGSI Untuk menyimpan hasil edit usaha
-def save_edited_usaha():
-    index = st.session_state.edit_usaha_index
-    
-    # Kumpulkan kode industri dari checkbox
-    kode_industri = []
-    if st.session_state.get('edit_industri_makanan', False):
-        kode_industri.append("3.1")
-    if st.session_state.get('edit_industri_alat_rt', False):
-        kode_industri.append("3.2")
-    if st.session_state.get('edit_industri_material', False):
-        kode_industri.append("3.3")
-    if st.session_state.get('edit_industri_alat_pertanian', False):
-        kode_industri.append("3.4")
-    if st.session_state.get('edit_industri_kerajinan', False):
-        kode_industri.append("3.5")
-    if st.session_state.get('edit_industri_logam', False):
-        kode_industri.append("3.6")
-    if st.session_state.get('edit_industri_lainnya', False):
-        kode_industri.append("3.7")
-
-    # Update data usaha
-    st.session_state.usaha_data[index] = {
-        "nama_usaha": st.session_state.edit_nama_usaha,
-        "nama_pemilik": st.session_state.edit_nama_pemilik,
-        "kode_industri": kode_industri,
-        "jumlah_tenaga_kerja": st.session_state.edit_jumlah_tenaga_kerja
-    }
-    
-    st.session_state.edit_mode = None
-    st.success(f"Data usaha {index + 1} berhasil diperbarui!")
-
 # Fungsi untuk validasi form sebelum lanjut ke halaman berikutnya
 def validate_form_data():
     """
     Validasi semua field yang wajib diisi di BLOK I, II, dan III
+    (aturan di validation.validate_form, sama dengan API submisi)
     Returns: (is_valid, error_messages)
     """
-    errors = []
-    
-    # Validasi BLOK I - Keterangan Tempat
-    if not st.session_state.get('provinsi', '').strip():
-        errors.append("BLOK I: Provinsi harus diisi")
-    if not st.session_state.get('kabupaten', '').strip():
-        errors.append("BLOK I: Kabupaten/Kota harus diisi")
-    if not st.session_state.get('kecamatan', '').strip():
-        errors.append("BLOK I: Kecamatan harus diisi")
-    if not st.session_state.get('desa', '').strip():
-        errors.append("BLOK I: Desa/Kelurahan harus diisi")
-    if not st.session_state.get('rt', '').strip():
-        errors.append("BLOK I: RT harus diisi")
-    if not st.session_state.get('rw', '').strip():
-        errors.append("BLOK I: RW harus diisi")
-    
-    # Validasi BLOK II - Keterangan Pendataan
-    if not st.session_state.get('nama_pendata', '').strip():
-        errors.append("BLOK II: Nama Pendata harus diisi")
-    if not st.session_state.get('nama_pemeriksa', '').strip():
-        errors.append("BLOK II: Nama Pemeriksa harus diisi")
-    if 'tanggal' not in st.session_state or st.session_state.tanggal is None:
-        errors.append("BLOK II: Tanggal harus diisi")
-    
-    # Validasi BLOK III - Rekapitulasi
-    blok_iii_fields = [
-        ('jml_industri_makanan', 'Jumlah Industri Makanan'),
-        ('jml_industri_alat_rt', 'Jumlah Industri Alat Rumah Tangga'),
-        ('jml_industri_material', 'Jumlah Industri Material Bahan Bangunan'),
-        ('jml_industri_alat_pertanian', 'Jumlah Industri Alat Pertanian'),
-        ('jml_industri_kerajinan', 'Jumlah Industri Kerajinan selain logam'),
-        ('jml_industri_logam', 'Jumlah Industri Logam'),
-        ('jml_industri_lainnya', 'Jumlah Industri Lainnya')
-    ]
-    
-    # Flag untuk mengecek apakah semua field BLOK III sudah diisi
-    blok_iii_complete = True
-    
-    # Cek setiap field BLOK III
-    for field_key, field_name in blok_iii_fields:
-        if field_key not in st.session_state or st.session_state[field_key] is None:
-            errors.append(f"BLOK III: {field_name} harus diisi (minimal 0)")
-            blok_iii_complete = False
-        elif int(st.session_state[field_key]) < 0:
-            errors.append(f"BLOK III: {field_name} tidak boleh bernilai negatif")
-            blok_iii_complete = False
-    
-    # Hanya validasi total usaha jika semua field BLOK III sudah diisi dengan benar
-    # DAN tidak ada error lain dari BLOK I dan II
-    if blok_iii_complete and len(errors) == 0:
-        total_usaha = (
-            int(st.session_state.get('jml_industri_makanan', 0)) +
-            int(st.session_state.get('jml_industri_alat_rt', 0)) +
-            int(st.session_state.get('jml_industri_material', 0)) +
-            int(st.session_state.get('jml_industri_alat_pertanian', 0)) +
-            int(st.session_state.get('jml_industri_kerajinan', 0)) +
-            int(st.session_state.get('jml_industri_logam', 0)) +
-            int(st.session_state.get('jml_industri_lainnya', 0))
-        )
-        
-        # Validasi total usaha tidak boleh 0
-        if total_usaha == 0:
-            errors.append("BLOK III: Total jumlah usaha tidak boleh 0. Minimal harus ada 1 usaha yang didata.")
-    
+    errors = validate_form({key: st.session_state.get(key) for key in FORM_KEYS})
     return len(errors) == 0, errors
 
 # Fungsi untuk menampilkan ringkasan data sebelum submit
@@ -926,42 +565,76 @@ def show_data_summary():
     Menampilkan ringkasan data yang akan diisi
     """
     if st.session_state.get('jml_industri_makanan') is not None:
-        total_usaha = (
-            int(st.session_state.get('jml_industri_makanan', 0)) +
-            int(st.session_state.get('jml_industri_alat_rt', 0)) +
-            int(st.session_state.get('jml_industri_material', 0)) +
-            int(st.session_state.get('jml_industri_alat_pertanian', 0)) +
-            int(st.session_state.get('jml_industri_kerajinan', 0)) +
-            int(st.session_state.get('jml_industri_logam', 0)) +
-            int(st.session_state.get('jml_industri_lainnya', 0))
-        )
+        total_usaha = count_usaha(st.session_state)
         
         if total_usaha > 0:
             st.info(f"📊 **Ringkasan:** Anda akan mengisi data untuk **{total_usaha} usaha** berdasarkan rekapitulasi di BLOK III")
         else:
             st.warning("⚠️ **Perhatian:** Total jumlah usaha adalah 0. Anda harus mengisi minimal 1 usaha di BLOK III")
 
-# Hubungkan ke Google Sheets
-worksheet = connect_to_gsheet()
-# Tambahkan setelah worksheet = connect_to_gsheet()
-if worksheet is not None:
-    st.success("Berhasil terhubung ke Google Sheets!")
-else:
-    st.error("Tidak dapat terhubung ke Google Sheets. Pastikan credentials sudah benar.")
+# Hubungkan ke Google Sheets di latar belakang (tidak menunggu)
+show_connection_status()
+
+# Jalankan antrean penyimpanan; submisi tertunda dari sebelumnya ikut dikirim ulang
+sheet_writer = get_sheet_writer()
+pending_rows = sheet_writer.journal.pending_rows()
+if pending_rows:
+    st.info(f"{pending_rows} baris data tersimpan lokal dan menunggu dikirim ke Google Sheets.")
+
+# Kode draf hanya ditunjukkan ke sesi pemiliknya, untuk melanjutkan dari perangkat lain
+if st.session_state.draft_id:
+    draft_code = get_draft_store().code(st.session_state.draft_id)
+    if draft_code:
+        st.sidebar.info(f"Kode draf: **{format_code(draft_code)}**. Catat kode ini untuk melanjutkan "
+                        "kuesioner dari perangkat lain.")
+
+# Hasil memuat draf dari URL di awal sesi (ditampilkan sekali)
+draft_restored = st.session_state.pop('draft_restored', None)
+if draft_restored:
+    st.success("Kuesioner yang belum selesai dipulihkan dari draf. Silakan lanjutkan pengisian.")
+elif draft_restored is False:
+    st.warning("Draf di tautan ini tidak ditemukan (sudah dikirim atau kedaluwarsa). Silakan mulai kuesioner baru.")
+    st.query_params.pop(DRAFT_PARAM, None)
+
+# Isian awal BLOK I pada halaman form
+FORM_DEFAULTS = {"provinsi": "JAWA TENGAH", "kabupaten": "KOTA TEGAL", "kecamatan": "TEGAL TIMUR", "desa": "KEJAMBON"}
 
 # Halaman Form
-if st.session_state.page == 'form':
+@page_fragment
+def show_form_page():
+    # Draf yang belum dikirim dilanjutkan dengan kode draf (mis. dari perangkat atau tab lain);
+    # kode hanya ditunjukkan ke sesi pemilik draf, jadi draf orang lain tidak bisa ditelusuri
+    with st.expander("📂 Lanjutkan kuesioner yang belum selesai"):
+        kode_cari = st.text_input("Kode Draf", key="cari_draf_kode", placeholder="ABCD-EFGH")
+        if kode_cari.strip():
+            draft = get_draft_store().find(kode_cari)
+            if draft is None:
+                st.caption("Tidak ada draf dengan kode ini.")
+            else:
+                col1, col2 = st.columns([3, 1])
+                disimpan = time.strftime("%d-%m-%Y %H:%M", time.localtime(draft["updated"]))
+                col1.write(f"**{draft['desa']}** RT {draft['rt']}/RW {draft['rw']}: "
+                           f"{draft['terisi']}/{draft['jumlah_usaha']} usaha, disimpan {disimpan}")
+                if col2.button("Lanjutkan", key=f"lanjut_draf_{draft['id']}"):
+                    restore_draft(draft["id"])
+                    st.rerun()
+
+    # Nilai awal lewat session_state (bukan value=), supaya draf yang dipulihkan bisa mengisi widget
+    for key, value in FORM_DEFAULTS.items():
+        st.session_state.setdefault(key, value)
+    st.session_state.setdefault("tanggal", date.today())
+
     with st.form("blok_1_2"):
         st.subheader("BLOK I. KETERANGAN TEMPAT")
         col1, col2 = st.columns(2)
         
         with col1:
-            provinsi = st.text_input("1.1 Provinsi", value="JAWA TENGAH", key="provinsi")
-            kabupaten = st.text_input("1.2 Kabupaten/Kota", value="KOTA TEGAL", key="kabupaten")
-            kecamatan = st.text_input("1.3 Kecamatan", value="TEGAL TIMUR", key="kecamatan")
+            provinsi = st.text_input("1.1 Provinsi", key="provinsi")
+            kabupaten = st.text_input("1.2 Kabupaten/Kota", key="kabupaten")
+            kecamatan = st.text_input("1.3 Kecamatan", key="kecamatan")
         
         with col2:
-            desa = st.text_input("1.4 Desa/Kelurahan", value="KEJAMBON", key="desa")
+            desa = st.text_input("1.4 Desa/Kelurahan", key="desa")
             rt_rw = st.columns(2)
             with rt_rw[0]:
                 rt = st.text_input("RT", key="rt", max_chars=2)
@@ -976,7 +649,7 @@ if st.session_state.page == 'form':
             nama_pemeriksa = st.text_input("2.2 Nama Pemeriksa", key="nama_pemeriksa")
         
         with col2:
-            tanggal = st.date_input("Tanggal", value=date.today(), key="tanggal")
+            tanggal = st.date_input("Tanggal", key="tanggal")
         
         st.subheader("BLOK III. REKAPITULASI")
         
@@ -998,15 +671,7 @@ if st.session_state.page == 'form':
         # Tampilkan ringkasan data
         show_data_summary()
 
-        total_usaha = (
-            int(st.session_state.jml_industri_makanan) +
-            int(st.session_state.jml_industri_alat_rt) +
-            int(st.session_state.jml_industri_material) +
-            int(st.session_state.jml_industri_alat_pertanian) +
-            int(st.session_state.jml_industri_kerajinan) +
-            int(st.session_state.jml_industri_logam) +
-            int(st.session_state.jml_industri_lainnya)
-        )
+        total_usaha = count_usaha(st.session_state)
         st.session_state.jml_usaha = total_usaha
         st.info(f"Jumlah Usaha yang akan didata: {total_usaha} (otomatis dihitung dari total BLOK III)")
 
@@ -1019,7 +684,8 @@ if st.session_state.page == 'form':
                 st.rerun()
 
 # Halaman Usaha
-elif st.session_state.page == 'usaha':
+@page_fragment
+def show_usaha_page():
     # Progress bar dan informasi yang lebih jelas
     progress = (st.session_state.current_usaha) / st.session_state.jumlah_usaha
     st.progress(progress)
@@ -1042,6 +708,7 @@ elif st.session_state.page == 'usaha':
     # Tombol kembali
     if st.button("Kembali ke Form"):
         back_to_form()
+        st.rerun()
 
     # Tampilkan rekapitulasi dari halaman pertama - LANGSUNG TERLIHAT
     st.markdown("---")
@@ -1058,15 +725,7 @@ elif st.session_state.page == 'usaha':
         st.write(f"• Industri Logam: **{st.session_state.form_data['jml_industri_logam']}**")
         st.write(f"• Industri Lainnya: **{st.session_state.form_data['jml_industri_lainnya']}**")
     
-    total = sum([
-        st.session_state.form_data['jml_industri_makanan'],
-        st.session_state.form_data['jml_industri_alat_rt'],
-        st.session_state.form_data['jml_industri_material'],
-        st.session_state.form_data['jml_industri_alat_pertanian'],
-        st.session_state.form_data['jml_industri_kerajinan'],
-        st.session_state.form_data['jml_industri_logam'],
-        st.session_state.form_data['jml_industri_lainnya']
-    ])
+    total = count_usaha(st.session_state.form_data)
     st.success(f"**Total Usaha yang harus didata: {total}**")
         
     # Tampilkan usaha yang sudah diisi (jika ada) - LANGSUNG TERLIHAT
@@ -1091,71 +750,118 @@ elif st.session_state.page == 'usaha':
         with col1:
             st.write(f"**{i+1}.**")
         with col2:
-            st.write(f"**{usaha['nama_usaha']}** ({usaha['nama_pemilik']})")
+            st.write(f"**{usaha.nama_usaha}** ({usaha.nama_pemilik})")
         with col3:
             # Buat list nama industri dari kode yang tersimpan
             nama_industri_list = []
-            for kode in usaha['kode_industri']:
+            for kode in usaha.kode_industri:
                 if kode in industri_mapping:
                     nama_industri_list.append(industri_mapping[kode])
             
             # Tampilkan nama industri dan jumlah pekerja
             industri_text = ", ".join(nama_industri_list) if nama_industri_list else "Tidak ada industri"
             st.write(f"🏭 {industri_text}")
-            st.write(f"👥 {usaha['jumlah_tenaga_kerja']} pekerja")
+            st.write(f"👥 {usaha.jumlah_tenaga_kerja} pekerja")
 
-    # Form input usaha
+    # Impor banyak usaha sekaligus dari file CSV/Excel
     st.markdown("---")
-    
-    with st.form(f"usaha_{st.session_state.current_usaha}"):
-        st.markdown(f"### 📋 Input Data Usaha ke-{st.session_state.current_usaha + 1}")
-        
-        col1, col2 = st.columns(2)
+    remaining = st.session_state.jumlah_usaha - st.session_state.current_usaha
+    with st.expander("📥 Impor banyak usaha sekaligus dari CSV/Excel"):
+        st.caption("Kolom: Nama Usaha, Nama Pemilik, Kode Industri (mis. \"3.1, 3.4\"), Jumlah Tenaga Kerja. "
+                   f"Usaha dari file mengisi {remaining} usaha yang belum diisi.")
+        st.download_button("Unduh contoh file CSV", template_csv(), file_name="contoh_impor_usaha.csv",
+                           mime="text/csv", on_click="ignore")
+        uploaded = st.file_uploader("File CSV/XLSX", type=["csv", "xlsx"], key="usaha_import_file")
+        if uploaded is not None:
+            try:
+                imported, errors = load_usaha_import(uploaded.getvalue(), uploaded.name)
+            except UsahaImportError as e:
+                st.error(str(e))
+            else:
+                if not errors.empty:
+                    st.error(f"{errors['Baris'].nunique()} baris tidak valid dan tidak akan diimpor:")
+                    st.dataframe(errors, hide_index=True, width="stretch")
+                if len(imported) > remaining:
+                    st.warning(f"File berisi {len(imported)} usaha valid, lebih banyak dari sisa {remaining} usaha "
+                               "menurut BLOK III. Perbaiki file atau jumlah di BLOK III.")
+                elif imported:
+                    st.success(f"{len(imported)} usaha valid siap diimpor.")
+                    if st.button(f"Impor {len(imported)} usaha"):
+                        apply_usaha_import(imported)
+
+    # Semua usaha yang tersisa bisa diisi di satu tabel (satu rerun saat disimpan)
+    st.markdown("---")
+    cara_isi = st.radio("Cara pengisian", ["Satu per satu", "Tabel (semua usaha sekaligus)"],
+                        horizontal=True, key="cara_isi_usaha")
+
+    if cara_isi == "Tabel (semua usaha sekaligus)":
+        filled = st.session_state.usaha_data[:st.session_state.current_usaha]
+        grid_data = filled + [Usaha() for _ in range(st.session_state.jumlah_usaha - len(filled))]
+        result = edit_usaha_grid("usaha_grid", grid_data, "✅ Simpan Semua Usaha & Lanjut ke Preview")
+        if result is not None:
+            st.session_state.usaha_data = result[0]
+            st.session_state.current_usaha = st.session_state.jumlah_usaha
+            set_page('preview')
+            persist_draft()
+            st.rerun()
+    else:
+        # Form input usaha
+        with st.form(f"usaha_{st.session_state.current_usaha}"):
+            st.markdown(f"### 📋 Input Data Usaha ke-{st.session_state.current_usaha + 1}")
         
-        with col1:
-            nama_usaha = st.text_input("Nama Usaha", key="nama_usaha", help="Masukkan nama usaha/toko/industri")
-            nama_pemilik = st.text_input("Nama Pemilik", key="nama_pemilik", help="Masukkan nama pemilik usaha")
+            col1, col2 = st.columns(2)
         
-        with col2:
-            jumlah_tenaga_kerja = st.number_input("Jumlah Tenaga Kerja", min_value=1, key="jumlah_tenaga_kerja", 
-                                                help="Termasuk pemilik usaha")
+            with col1:
+                nama_usaha = st.text_input("Nama Usaha", key="nama_usaha", help="Masukkan nama usaha/toko/industri")
+                nama_pemilik = st.text_input("Nama Pemilik", key="nama_pemilik", help="Masukkan nama pemilik usaha")
         
-        st.subheader("Kode Jenis Industri Mikro Kecil dan Menengah")
-        st.caption("Pilih semua jenis industri yang sesuai dengan usaha ini:")
+            with col2:
+                jumlah_tenaga_kerja = st.number_input("Jumlah Tenaga Kerja", min_value=1, key="jumlah_tenaga_kerja", 
+                                                    help="Termasuk pemilik usaha")
         
-        col1, col2 = st.columns(2)
+            st.subheader("Kode Jenis Industri Mikro Kecil dan Menengah")
+            st.caption("Pilih semua jenis industri yang sesuai dengan usaha ini:")
         
-        with col1:
-            industri_makanan = st.checkbox("3.1 Industri Makanan", key="industri_makanan")
-            industri_alat_rt = st.checkbox("3.2 Industri Alat Rumah Tangga", key="industri_alat_rt")
-            industri_material = st.checkbox("3.3 Industri Material Bahan Bangunan", key="industri_material")
-            industri_alat_pertanian = st.checkbox("3.4 Industri Alat Pertanian", key="industri_alat_pertanian")
+            col1, col2 = st.columns(2)
         
-        with col2:
-            industri_kerajinan = st.checkbox("3.5 Industri Kerajinan selain logam", key="industri_kerajinan")
-            industri_logam = st.checkbox("3.6 Industri Logam", key="industri_logam")
-            industri_lainnya = st.checkbox("3.7 Industri Lainnya", key="industri_lainnya")
+            with col1:
+                industri_makanan = st.checkbox("3.1 Industri Makanan", key="industri_makanan")
+                industri_alat_rt = st.checkbox("3.2 Industri Alat Rumah Tangga", key="industri_alat_rt")
+                industri_material = st.checkbox("3.3 Industri Material Bahan Bangunan", key="industri_material")
+                industri_alat_pertanian = st.checkbox("3.4 Industri Alat Pertanian", key="industri_alat_pertanian")
         
-        # Tombol submit dengan teks yang lebih deskriptif
-        if st.session_state.current_usaha < st.session_state.jumlah_usaha - 1:
-            submitted = st.form_submit_button(f"💾 Simpan & Lanjut ke Usaha ke-{st.session_state.current_usaha + 2}")
-        else:
-            submitted = st.form_submit_button("✅ Simpan Data Terakhir & Lanjut ke Preview")
+            with col2:
+                industri_kerajinan = st.checkbox("3.5 Industri Kerajinan selain logam", key="industri_kerajinan")
+                industri_logam = st.checkbox("3.6 Industri Logam", key="industri_logam")
+                industri_lainnya = st.checkbox("3.7 Industri Lainnya", key="industri_lainnya")
         
-        if submitted:
-            # Validasi input
-            if not nama_usaha.strip():
-                st.error("Nama Usaha harus diisi!")
-            elif not nama_pemilik.strip():
-                st.error("Nama Pemilik harus diisi!")
-            elif not (industri_makanan or industri_alat_rt or industri_material or 
-                     industri_alat_pertanian or industri_kerajinan or industri_logam or industri_lainnya):
-                st.error("Minimal pilih satu jenis industri!")
+            # Tombol submit dengan teks yang lebih deskriptif
+            if st.session_state.current_usaha < st.session_state.jumlah_usaha - 1:
+                submitted = st.form_submit_button(f"💾 Simpan & Lanjut ke Usaha ke-{st.session_state.current_usaha + 2}")
             else:
-                save_usaha_data()
+                submitted = st.form_submit_button("✅ Simpan Data Terakhir & Lanjut ke Preview")
+        
+            if submitted:
+                # Data usaha dari form; checkbox 3.1-3.7 menjadi mask kode industri
+                usaha = Usaha.from_flags(
+                    nama_usaha.strip(),
+                    nama_pemilik.strip(),
+                    [st.session_state[key] for key in INDUSTRI_KEYS],
+                    jumlah_tenaga_kerja,
+                )
+                # Validasi input (aturan di validation.validate_usaha, sama dengan impor dan API)
+                errors = validate_usaha(usaha)
+                for error in errors:
+                    st.error(f"{error}!")
+                if not errors:
+                    save_usaha_data(usaha)
 
 # Halaman Preview
-elif st.session_state.page == 'preview':    
+@page_fragment
+def show_preview_page():
+    # ID submisi dibuat saat pertama kali masuk preview dan dipakai sampai form di-reset
+    if st.session_state.submission_id is None:
+        st.session_state.submission_id = uuid.uuid4().hex
     st.subheader("Preview Data")
     
     # Mode Edit Usaha
@@ -1164,74 +870,59 @@ elif st.session_state.page == 'preview':
         usaha = st.session_state.usaha_data[index]
         
         st.subheader(f"Edit Data Usaha {index + 1}")
-        st.info(f"Mengedit: {usaha.get('nama_usaha', 'Nama usaha tidak tersedia')}")
+        st.info(f"Mengedit: {usaha.nama_usaha or 'Nama usaha tidak tersedia'}")
         
         with st.form(f"edit_usaha_{index}"):
-            nama_usaha = st.text_input("Nama Usaha", value=usaha.get('nama_usaha', ''), key=f"edit_nama_usaha_{index}")
-            nama_pemilik = st.text_input("Nama Pemilik", value=usaha.get('nama_pemilik', ''), key=f"edit_nama_pemilik_{index}")
+            nama_usaha = st.text_input("Nama Usaha", value=usaha.nama_usaha, key=f"edit_nama_usaha_{index}")
+            nama_pemilik = st.text_input("Nama Pemilik", value=usaha.nama_pemilik, key=f"edit_nama_pemilik_{index}")
             
             st.write("**Kode Jenis Industri:**")
             col1, col2 = st.columns(2)
             
             with col1:
                 industri_makanan = st.checkbox("3.1 Industri Makanan",
-                                              value="3.1" in usaha.get('kode_industri', []), key=f"edit_industri_makanan_{index}")
+                                              value=usaha.has("3.1"), key=f"edit_industri_makanan_{index}")
                 industri_alat_rt = st.checkbox("3.2 Industri Alat Rumah Tangga",
-                                              value="3.2" in usaha.get('kode_industri', []), key=f"edit_industri_alat_rt_{index}")
+                                              value=usaha.has("3.2"), key=f"edit_industri_alat_rt_{index}")
                 industri_material = st.checkbox("3.3 Industri Material Bahan Bangunan",
-                                               value="3.3" in usaha.get('kode_industri', []), key=f"edit_industri_material_{index}")
+                                               value=usaha.has("3.3"), key=f"edit_industri_material_{index}")
                 industri_alat_pertanian = st.checkbox("3.4 Industri Alat Pertanian",
-                                                     value="3.4" in usaha.get('kode_industri', []), key=f"edit_industri_alat_pertanian_{index}")
+                                                     value=usaha.has("3.4"), key=f"edit_industri_alat_pertanian_{index}")
             
             with col2:
                 industri_kerajinan = st.checkbox("3.5 Industri Kerajinan selain logam",
-                                                value="3.5" in usaha.get('kode_industri', []), key=f"edit_industri_kerajinan_{index}")
+                                                value=usaha.has("3.5"), key=f"edit_industri_kerajinan_{index}")
                 industri_logam = st.checkbox("3.6 Industri Logam",
-                                            value="3.6" in usaha.get('kode_industri', []), key=f"edit_industri_logam_{index}")
+                                            value=usaha.has("3.6"), key=f"edit_industri_logam_{index}")
                 industri_lainnya = st.checkbox("3.7 Industri Lainnya",
-                                              value="3.7" in usaha.get('kode_industri', []), key=f"edit_industri_lainnya_{index}")
+                                              value=usaha.has("3.7"), key=f"edit_industri_lainnya_{index}")
             
             jumlah_tenaga_kerja = st.number_input("Jumlah Tenaga Kerja",
-                                                 min_value=0, value=int(usaha.get('jumlah_tenaga_kerja', 0)), key=f"edit_jumlah_tenaga_kerja_{index}")
+                                                 min_value=0, value=int(usaha.jumlah_tenaga_kerja), key=f"edit_jumlah_tenaga_kerja_{index}")
             
             col1, col2 = st.columns(2)
             with col1:
                 if st.form_submit_button("Simpan Perubahan"):
-                    # Update data usaha dengan nilai baru
-                    kode_industri = []
-                    if industri_makanan:
-                        kode_industri.append("3.1")
-                    if industri_alat_rt:
-                        kode_industri.append("3.2")
-                    if industri_material:
-                        kode_industri.append("3.3")
-                    if industri_alat_pertanian:
-                        kode_industri.append("3.4")
-                    if industri_kerajinan:
-                        kode_industri.append("3.5")
-                    if industri_logam:
-                        kode_industri.append("3.6")
-                    if industri_lainnya:
-                        kode_industri.append("3.7")
-                    
-                    # Update data pada indeks yang benar
-                    st.session_state.usaha_data[index].update({
-                        'nama_usaha': nama_usaha,
-                        'nama_pemilik': nama_pemilik,
-                        'jumlah_tenaga_kerja': jumlah_tenaga_kerja,
-                        'kode_industri': kode_industri
-                    })
+                    # Update data pada indeks yang benar dengan nilai baru
+                    st.session_state.usaha_data[index] = Usaha.from_flags(
+                        nama_usaha,
+                        nama_pemilik,
+                        [industri_makanan, industri_alat_rt, industri_material, industri_alat_pertanian,
+                         industri_kerajinan, industri_logam, industri_lainnya],
+                        jumlah_tenaga_kerja,
+                    )
                     
                     st.session_state.edit_mode = None
                     st.session_state.edit_usaha_index = None
+                    persist_draft()
                     st.success(f"Data Usaha {index + 1} berhasil diupdate!")
-                    st.rerun()
+                    rerun_page()
             
             with col2:
                 if st.form_submit_button("Batal"):
                     st.session_state.edit_mode = None
                     st.session_state.edit_usaha_index = None
-                    st.rerun()
+                    rerun_page()
     
     # Mode Preview Normal
     else:
@@ -1273,6 +964,14 @@ elif st.session_state.page == 'preview':
             st.write(f"**3.7 Jumlah Industri Lainnya:** {st.session_state.form_data['jml_industri_lainnya']}")
         
         st.write("### BLOK IV. KETERANGAN USAHA")
+
+        # Edit banyak usaha sekaligus; hanya usaha yang berubah yang diganti
+        with st.expander("✏️ Edit semua usaha dalam tabel"):
+            result = edit_usaha_grid("preview_grid", st.session_state.usaha_data, "Simpan Perubahan Tabel")
+            if result is not None:
+                st.session_state.usaha_data = result[0]
+                persist_draft()
+                st.success(f"{len(result[1])} usaha diperbarui.")
         
         for i, usaha in enumerate(st.session_state.usaha_data):
             # Container untuk setiap usaha
@@ -1286,12 +985,12 @@ elif st.session_state.page == 'preview':
                     detail_col1, detail_col2 = st.columns(2)
                     
                     with detail_col1:
-                        st.write(f"**Nama Usaha:** {usaha['nama_usaha']}")
-                        st.write(f"**Nama Pemilik:** {usaha['nama_pemilik']}")
+                        st.write(f"**Nama Usaha:** {usaha.nama_usaha}")
+                        st.write(f"**Nama Pemilik:** {usaha.nama_pemilik}")
                     
                     with detail_col2:
-                        st.write(f"**Jumlah Tenaga Kerja:** {usaha['jumlah_tenaga_kerja']}")
-                        st.write(f"**Kode Jenis Industri:** {', '.join(usaha['kode_industri'])}")
+                        st.write(f"**Jumlah Tenaga Kerja:** {usaha.jumlah_tenaga_kerja}")
+                        st.write(f"**Kode Jenis Industri:** {', '.join(usaha.kode_industri)}")
                 
                 with col2:
                     # Tombol edit di samping kanan
@@ -1299,7 +998,7 @@ elif st.session_state.page == 'preview':
                     if st.button("✏️ Edit", key=f"edit_usaha_{i}"):
                         st.session_state.edit_usaha_index = i
                         st.session_state.edit_mode = 'usaha'
-                        st.rerun()
+                        rerun_page()
                 
                 # Divider antar usaha
                 if i < len(st.session_state.usaha_data) - 1:
@@ -1310,34 +1009,112 @@ elif st.session_state.page == 'preview':
         
         with col1:
             if st.button("Simpan & Unduh PDF"):
-                # Buat PDF
-                pdf_buffer = create_pdf(st.session_state.form_data, st.session_state.usaha_data)
-                
                 # Simpan ke Google Sheets jika belum disimpan
                 if not st.session_state.data_saved:
-                    success = save_to_gsheet(worksheet, st.session_state.form_data, st.session_state.usaha_data)
-                
-                if success:
-                    st.success("Data berhasil disimpan ke Google Sheets!")
-                    st.session_state.data_saved = True
+                    if save_to_gsheet(sheet_writer, st.session_state.form_data, st.session_state.usaha_data,
+                                      st.session_state.submission_id):
+                        st.session_state.data_saved = True
                 else:
                     st.info("Data sudah disimpan sebelumnya.")
                 
-                # Unduh PDF
-                pdf_bytes = pdf_buffer.getvalue()
-                b64 = base64.b64encode(pdf_bytes).decode()
-                
+                # Ambil PDF dari cache konten (render hanya jika isi kuesioner berubah)
+                with spans.span("pdf", usaha=len(st.session_state.usaha_data)):
+                    pdf_key, pdf_bytes = pdf_cache.get_or_create(st.session_state.form_data, st.session_state.usaha_data)
                 tanggal_str = st.session_state.form_data["tanggal"].replace("-", "")
-                filename = f"Pendataan_Industri_{st.session_state.form_data['desa']}_{tanggal_str}.pdf"
-                
-                href = f'<a href="data:application/pdf;base64,{b64}" download="{filename}">Klik di sini untuk mengunduh PDF</a>'
-                st.markdown(href, unsafe_allow_html=True)
+                st.session_state.pdf_download = {
+                    "data": pdf_bytes,
+                    "file_name": f"Pendataan_Industri_{st.session_state.form_data['desa']}_{tanggal_str}.pdf",
+                    "key": pdf_key,
+                }
+            
+            # Unduh PDF lewat endpoint media Streamlit (byte mentah, tanpa data URI base64).
+            # Tombol disembunyikan jika data sudah diedit setelah PDF dibuat (hash isi berbeda).
+            pdf_download = st.session_state.pdf_download
+            if pdf_download and pdf_download["key"] == pdf_content_key(st.session_state.form_data, st.session_state.usaha_data):
+                st.download_button(
+                    "Unduh PDF",
+                    data=pdf_download["data"],
+                    file_name=pdf_download["file_name"],
+                    mime="application/pdf",
+                    on_click="ignore",
+                )
         
         with col2:
             if st.button("Isi Form Baru"):
                 reset_form_state()
                 st.rerun()
 
+        # Status pengiriman ke Google Sheets dari antrean latar belakang
+        save_ack = st.session_state.get('save_ack')
+        if save_ack is not None:
+            if save_ack.done():
+                ack = save_ack.result()
+                if ack.get("duplicate"):
+                    st.info("Kuesioner ini sudah pernah tersimpan; data tidak ditulis ulang.")
+                st.success(f"Data sudah tertulis di Google Sheets (sheet {ack['sheet']}, baris {ack['first_row']}-{ack['last_row']}).")
+            else:
+                st.info("Data tersimpan lokal dan sedang menunggu giliran dikirim ke Google Sheets.")
+
+# Tampilkan halaman aktif; durasi eksekusi penuh dicatat sebagai "app"
+with measure("app", get_run_timings(), st.session_state.run_timings,
+             wall_start=_run_started, cpu_start=_cpu_started):
+    if st.session_state.page == 'form':
+        show_form_page()
+    elif st.session_state.page == 'usaha':
+        show_usaha_page()
+    elif st.session_state.page == 'preview':
+        show_preview_page()
+    elif st.session_state.page == 'rekap':
+        show_rekap_dashboard()
+
+# Statistik limiter API untuk menakar kebutuhan kuota Google Sheets
+with st.sidebar.expander("Statistik Kuota Google Sheets"):
+    limiter_stats = sheets_limiter.stats()
+    if limiter_stats:
+        st.dataframe(pd.DataFrame.from_dict(limiter_stats, orient="index").rename(columns={
+            "calls": "Panggilan", "retries": "Retry", "errors": "Gagal",
+            "wait_total": "Total Tunggu (s)", "wait_max": "Tunggu Maks (s)"
+        }))
+    else:
+        st.caption("Belum ada panggilan API.")
+
+# Durasi eksekusi app.py penuh vs rerun fragment halaman, untuk menakar CPU server per pendata
+with st.sidebar.expander("Statistik Eksekusi Script"):
+    for label, run_timings in [("Sesi ini", st.session_state.run_timings), ("Semua sesi", get_run_timings())]:
+        timing_stats = run_timings.stats()
+        if timing_stats:
+            st.caption(label)
+            st.dataframe(pd.DataFrame.from_dict(timing_stats, orient="index").round(1).rename(columns={
+                "runs": "Eksekusi", "wall_avg_ms": "Rata-rata (ms)", "wall_max_ms": "Maks (ms)",
+                "cpu_avg_ms": "CPU rata-rata (ms)", "cpu_total_ms": "CPU total (ms)"
+            }))
+
+# Panel admin: persentil durasi per tahap pipeline dari semua sesi (hanya jika tracing aktif)
+if tracing_config["admin"]:
+    with st.sidebar.expander("Durasi Tahap Pipeline (p50/p95/p99)"):
+        stage_stats = spans.percentiles()
+        if stage_stats:
+            st.dataframe(pd.DataFrame.from_dict(stage_stats, orient="index").round(1).rename(columns={
+                "count": "Jumlah", "p50_ms": "p50 (ms)", "p95_ms": "p95 (ms)", "p99_ms": "p99 (ms)",
+                "max_ms": "Maks (ms)", "total_ms": "Total (ms)"
+            }))
+            st.download_button(
+                "Unduh metrics (Prometheus)",
+                data=spans.prometheus_text(),
+                file_name="metrics.prom",
+                mime="text/plain",
+                on_click="ignore",
+            )
+        else:
+            st.caption("Belum ada span tercatat.")
+        if spans.path:
+            st.caption(f"Span lengkap ditulis ke {spans.path} (JSONL).")
+
+# Catat waktu render pertama per sesi (time-to-first-render)
+if 'first_render_ms' not in st.session_state:
+    st.session_state.first_render_ms = (time.perf_counter() - _run_started) * 1000
+    logger.info("time-to-first-render: %.1f ms", st.session_state.first_render_ms)
+
 # Tampilkan petunjuk penggunaan
 with st.expander("Petunjuk Penggunaan"):
     st.markdown("""
@@ -0,0 +1,84 @@
+"""
+Throughput API submisi (api.py) ke worksheet lokal.
+
+Server HTTP dijalankan di proses ini dengan SheetWriter ke worksheet
+lokal; beberapa klien keep-alive mengirim kuesioner satu per request dan
+per batch. Yang diukur: kuesioner per detik sampai masuk jurnal (respons
+202), lalu dicek bahwa semua baris tertulis tepat sekali di sheet.
+Jalankan dari root repo: python -m benchmarks.bench_api
+"""
+import http.client
+import json
+import os
+import tempfile
+import threading
+import time
+from dataclasses import asdict
+
+from benchmarks.fake_worksheet import make_worksheet
+from benchmarks.sample_data import make_form, make_usaha
+from api import make_server
+from gsheet import RowCountIndex
+from writer import SheetWriter, SubmissionIndex, SubmissionJournal
+
+CLIENTS = 4
+KUESIONER = 2000
+N_USAHA = 3
+
+
+def make_payload(i):
+    form_data, usaha_data = make_form(i, N_USAHA), make_usaha(N_USAHA, seed=i)
+    usaha_json = [dict(asdict(usaha), kode_industri=list(usaha.kode_industri)) for usaha in usaha_data]
+    return {"form_data": form_data, "usaha_data": usaha_json, "submission_id": f"bench-{i}"}
+
+
+def run(batch_size):
+    tmp = tempfile.mkdtemp()
+    worksheet = make_worksheet()
+    writer = SheetWriter(SubmissionJournal(os.path.join(tmp, "journal.jsonl")), lambda n_rows: (worksheet, None),
+                         RowCountIndex(), max_wait=0.05, index=SubmissionIndex(os.path.join(tmp, "index.sqlite3"))).start()
+    server = make_server(writer, "127.0.0.1", 0)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    payloads = [make_payload(i) for i in range(KUESIONER)]
+    bodies = [
+        json.dumps({"kuesioner": payloads[i:i + batch_size]}).encode("utf-8")
+        for i in range(0, KUESIONER, batch_size)
+    ]
+    statuses = []
+
+    def client(c):
+        conn = http.client.HTTPConnection("127.0.0.1", server.server_port)
+        for body in bodies[c::CLIENTS]:
+            conn.request("POST", "/submisi", body, {"Content-Type": "application/json"})
+            response = conn.getresponse()
+            statuses.append((response.status, json.loads(response.read())["diterima"]))
+        conn.close()
+
+    threads = [threading.Thread(target=client, args=(c,)) for c in range(CLIENTS)]
+    start = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - start
+
+    # Tunggu antrean terkirim ke worksheet lokal
+    deadline = time.time() + 30
+    while writer.journal.pending_rows() and time.time() < deadline:
+        time.sleep(0.05)
+    server.shutdown()
+    writer.stop()
+    assert all(status == 202 for status, _ in statuses), set(statuses)
+    assert sum(accepted for _, accepted in statuses) == KUESIONER
+    ids = [row[-1] for row in worksheet.values]
+    assert len(ids) == KUESIONER * N_USAHA and len(set(ids)) == KUESIONER
+    return elapsed, len(bodies)
+
+
+if __name__ == "__main__":
+    print(f"{KUESIONER} kuesioner ({N_USAHA} usaha) dari {CLIENTS} klien keep-alive:")
+    for batch_size in [1, 10, 100]:
+        elapsed, requests = run(batch_size)
+        print(f"  {batch_size:3d} kuesioner/request: {requests:5d} request, {elapsed:5.2f} s, "
+              f"{KUESIONER / elapsed:7.0f} kuesioner/s")
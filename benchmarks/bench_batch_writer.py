@@ -0,0 +1,100 @@
+"""
+Uji beban 50 pendata yang menyimpan bersamaan ke worksheet lokal.
+
+Membandingkan append_rows per sesi (cara lama) dengan SheetWriter yang
+menggabungkan baris lintas sesi. Yang dihitung: jumlah panggilan API dan
+latensi sampai data tertulis (acknowledgement).
+Jalankan dari root repo: python -m benchmarks.bench_batch_writer
+"""
+import os
+import random
+import statistics
+import tempfile
+import threading
+import time
+
+from benchmarks.fake_worksheet import make_worksheet
+from benchmarks.sample_data import make_form, make_usaha
+from gsheet import RowCountIndex, build_rows
+from ratelimit import sheets_limiter
+from writer import SheetWriter, SubmissionIndex, SubmissionJournal
+
+PENDATA = 50
+FORM_PER_PENDATA = 4
+API_LATENCY = 0.25  # detik per panggilan API simulasi
+
+
+def submissions(pendata):
+    rng = random.Random(pendata)
+    for i in range(FORM_PER_PENDATA):
+        time.sleep(rng.uniform(0, 0.5))  # jeda antar submit
+        rows = build_rows(make_form(pendata), make_usaha(rng.randint(1, 5), seed=i), "2025-06-01 08:00:00")
+        yield rows
+
+
+def run_concurrently(target):
+    threads = [threading.Thread(target=target, args=(p,)) for p in range(PENDATA)]
+    start = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return time.perf_counter() - start
+
+
+def report(label, worksheet, latencies, elapsed):
+    latencies = sorted(latencies)
+    p95 = latencies[int(0.95 * (len(latencies) - 1))]
+    print(f"\n{label}")
+    print(f"  submisi: {len(latencies)}, baris di sheet: {len(worksheet.values)}, durasi: {elapsed:.2f} s")
+    print(f"  panggilan append_rows: {worksheet.spreadsheet.calls.get('append_rows', 0)}")
+    print(f"  latensi sampai tertulis p50={1000 * statistics.median(latencies):.0f} ms p95={1000 * p95:.0f} ms")
+
+
+def per_session():
+    worksheet = make_worksheet(latency=API_LATENCY)
+    latencies, lock = [], threading.Lock()
+
+    def pendata(p):
+        for rows in submissions(p):
+            start = time.perf_counter()
+            worksheet.append_rows(rows)
+            with lock:
+                latencies.append(time.perf_counter() - start)
+
+    report("append_rows per sesi", worksheet, latencies, run_concurrently(pendata))
+
+
+def batched(max_batch_rows, max_wait):
+    worksheet = make_worksheet(latency=API_LATENCY)
+    tmp = tempfile.mkdtemp()
+    journal = SubmissionJournal(os.path.join(tmp, "journal.jsonl"))
+    writer = SheetWriter(journal, lambda n_rows: (worksheet, None), RowCountIndex(),
+                         max_batch_rows=max_batch_rows, max_wait=max_wait,
+                         index=SubmissionIndex(os.path.join(tmp, "index.sqlite3"))).start()
+    latencies, submit_times, lock = [], [], threading.Lock()
+
+    def pendata(p):
+        acks = []
+        for rows in submissions(p):
+            start = time.perf_counter()
+            future = writer.submit(rows)
+            with lock:
+                submit_times.append(time.perf_counter() - start)
+            acks.append((start, future))
+        for start, future in acks:
+            future.result(timeout=60)
+            with lock:
+                latencies.append(time.perf_counter() - start)
+
+    elapsed = run_concurrently(pendata)
+    writer.stop(timeout=5)
+    report(f"SheetWriter (max_batch_rows={max_batch_rows}, max_wait={max_wait}s)", worksheet, latencies, elapsed)
+    print(f"  waktu submit() p50={1000 * statistics.median(submit_times):.2f} ms")
+
+
+if __name__ == "__main__":
+    sheets_limiter.configure(rate_per_minute=None)  # kuota tidak ikut diukur di sini
+    per_session()
+    batched(max_batch_rows=500, max_wait=1.0)
+    batched(max_batch_rows=100, max_wait=0.5)
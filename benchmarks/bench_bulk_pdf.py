@@ -0,0 +1,58 @@
+"""
+Throughput pembuatan PDF massal (PDF/detik) dari snapshot CSV sheet lokal.
+
+Snapshot berisi kuesioner dari beberapa desa dengan 1-8 usaha per kuesioner.
+Dibandingkan render berurutan (1 proses) dengan process pool.
+Jalankan dari root repo: python -m benchmarks.bench_bulk_pdf
+"""
+import os
+import random
+import tempfile
+import time
+
+from benchmarks.sample_data import make_form, make_usaha
+from bulk_pdf import filter_submissions, read_csv_rows, write_csv_rows, write_pdf_zip
+from gsheet import build_rows, group_submissions
+from pdf_form import pdf_cache
+
+N_FORMS = 300
+DESA = ["KEJAMBON", "SLEROK", "MINTARAGEN"]
+
+
+def make_snapshot(path):
+    rng = random.Random(0)
+    rows = []
+    for i in range(N_FORMS):
+        form_data = dict(make_form(i), desa=DESA[i % len(DESA)])
+        usaha_data = make_usaha(rng.randint(1, 8), seed=i)
+        rows.extend(build_rows(form_data, usaha_data, f"2025-06-01 08:{i // 60:02d}:{i % 60:02d}"))
+    write_csv_rows(path, rows)
+    return len(rows)
+
+
+def run(submissions, workers, output):
+    # Setiap run mulai dari cache kosong agar tidak ada PDF hasil run sebelumnya yang terhitung
+    pdf_cache.clear()
+    start = time.perf_counter()
+    count = write_pdf_zip(submissions, output, workers=workers)
+    elapsed = time.perf_counter() - start
+    print(f"  workers={workers:<3} {count} PDF dalam {elapsed:5.2f} s = {count / elapsed:6.1f} PDF/detik, "
+          f"ZIP {os.path.getsize(output) / 1e6:.1f} MB")
+
+
+if __name__ == "__main__":
+    tmp = tempfile.mkdtemp()
+    csv_path = os.path.join(tmp, "snapshot.csv")
+    n_rows = make_snapshot(csv_path)
+
+    start = time.perf_counter()
+    submissions = group_submissions(read_csv_rows(csv_path))
+    print(f"Snapshot {n_rows} baris -> {len(submissions)} kuesioner, dibaca dan dikelompokkan dalam "
+          f"{1000 * (time.perf_counter() - start):.0f} ms (CPU: {os.cpu_count()})")
+
+    print("Semua desa:")
+    run(submissions, 1, os.path.join(tmp, "semua_1.zip"))
+    if os.cpu_count() > 1:
+        run(submissions, os.cpu_count(), os.path.join(tmp, "semua_pool.zip"))
+    print("Satu desa (KEJAMBON):")
+    run(filter_submissions(submissions, desa="kejambon"), os.cpu_count(), os.path.join(tmp, "kejambon.zip"))
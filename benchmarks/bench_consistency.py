@@ -0,0 +1,48 @@
+"""
+Pemeriksaan konsistensi pada 100 ribu dan 300 ribu baris.
+
+Data contoh konsisten, lalu disisipi kuesioner yang flag BLOK IV-nya
+diubah dan usaha yang disalin ke RT/RW lain.
+Jalankan dari root repo: python -m benchmarks.bench_consistency
+"""
+import random
+import tempfile
+import time
+
+from benchmarks.sample_data import make_sheet_rows
+from consistency import check_all, write_reports
+from gsheet import HEADERS
+from rekap import build_frame
+
+SIZES = [100_000, 300_000]
+INJECTED = 50  # jumlah ketidakkonsistenan dan usaha kembar yang disisipkan
+
+
+def inject(rows, seed=0):
+    rng = random.Random(seed)
+    flag = HEADERS.index("Ind.Makanan(3.1)")
+    rt_rw = HEADERS.index("RT/RW")
+    for i in rng.sample(range(len(rows) - 100), INJECTED):
+        rows[i] = list(rows[i])
+        rows[i][flag] = 1 - int(rows[i][flag])
+    for i in rng.sample(range(len(rows)), INJECTED):
+        copy = list(rows[i])
+        copy[rt_rw] = "RT 99 RW 99"
+        rows.append(copy)
+
+
+if __name__ == "__main__":
+    for n in SIZES:
+        rows = make_sheet_rows(n)
+        inject(rows)
+        start = time.perf_counter()
+        df = build_frame(rows)
+        t_frame = time.perf_counter() - start
+        reports = check_all(df)
+        t_check = time.perf_counter() - start - t_frame
+        write_reports(reports, tempfile.mkdtemp())
+        t_total = time.perf_counter() - start
+        print(f"{len(rows)} baris: DataFrame {t_frame:.2f} s + pemeriksaan {t_check:.2f} s, "
+              f"total termasuk tulis CSV {t_total:.2f} s")
+        for name, report in reports.items():
+            print(f"  {name}: {len(report)} baris")
@@ -0,0 +1,96 @@
+"""
+Uji submisi ganda: klik dobel, retry setelah timeout, dan replay jurnal.
+
+Setiap kuesioner dikirim beberapa kali dengan ID submisi yang sama, termasuk
+setelah SheetWriter dibuat ulang dari jurnal yang sama (seperti restart
+aplikasi) dan setelah crash di antara append_rows dan ack jurnal. Yang
+dihitung: panggilan append_rows dan jumlah baris di sheet dibanding baris unik.
+Jalankan dari root repo: python -m benchmarks.bench_dedupe
+"""
+import os
+import tempfile
+import threading
+import time
+import uuid
+
+from benchmarks.fake_worksheet import make_worksheet
+from benchmarks.sample_data import make_form, make_usaha
+from gsheet import RowCountIndex, build_rows
+from writer import SheetWriter, SubmissionIndex, SubmissionJournal
+
+KUESIONER = 200
+KLIK_PER_KUESIONER = 3
+
+
+def make_submissions():
+    submissions = []
+    for i in range(KUESIONER):
+        submission_id = uuid.uuid4().hex
+        rows = build_rows(make_form(i % 50), make_usaha(1 + i % 5, seed=i), "2025-06-01 08:00:00", submission_id)
+        submissions.append((submission_id, rows))
+    return submissions
+
+
+def make_writer(tmp, worksheet):
+    journal = SubmissionJournal(os.path.join(tmp, "journal.jsonl"))
+    index = SubmissionIndex(os.path.join(tmp, "index.sqlite3"))
+    return SheetWriter(journal, lambda n_rows: (worksheet, None), RowCountIndex(), max_wait=0.05, index=index)
+
+
+def report(label, worksheet, unique_rows, elapsed, writer):
+    print(f"\n{label}")
+    print(f"  baris di sheet: {len(worksheet.values)} (unik: {unique_rows}), "
+          f"panggilan append_rows: {worksheet.spreadsheet.calls.get('append_rows', 0)}, durasi: {elapsed:.2f} s")
+    print(f"  submisi dikirim: {writer.stats['submissions']}, duplikat ditolak: {writer.stats['duplicates']}")
+
+
+# Klik dobel bersamaan + retry setelah data tertulis, dalam satu proses
+def double_click(submissions, unique_rows):
+    worksheet = make_worksheet()
+    writer = make_writer(tempfile.mkdtemp(), worksheet).start()
+    start = time.perf_counter()
+
+    def klik(submission_id, rows):
+        writer.submit(rows, submission_id).result()
+
+    threads = [threading.Thread(target=klik, args=submission)
+               for submission in submissions for _ in range(KLIK_PER_KUESIONER)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    for submission_id, rows in submissions:
+        writer.submit(rows, submission_id).result()  # retry setelah tertulis
+    report(f"{KLIK_PER_KUESIONER} klik bersamaan + 1 retry per kuesioner", worksheet, unique_rows,
+           time.perf_counter() - start, writer)
+    writer.stop()
+
+
+# Crash setelah append_rows tetapi sebelum ack jurnal, lalu restart dan submit ulang
+def crash_replay(submissions, unique_rows):
+    worksheet = make_worksheet()
+    tmp = tempfile.mkdtemp()
+    writer = make_writer(tmp, worksheet)
+    for submission_id, rows in submissions:
+        writer.submit(rows, submission_id)
+    writer.journal.ack = lambda ids: None  # simulasi crash: ack tidak pernah tercatat
+    writer.max_batch_rows = unique_rows
+    writer.flush()
+    writer.journal._file.close()
+    writer.index.close()
+
+    start = time.perf_counter()
+    restarted = make_writer(tmp, worksheet).start()
+    futures = [restarted.submit(rows, submission_id) for submission_id, rows in submissions]
+    for future in futures:
+        future.result()
+    report("crash sebelum ack + restart + submit ulang", worksheet, unique_rows,
+           time.perf_counter() - start, restarted)
+    restarted.stop()
+
+
+if __name__ == "__main__":
+    submissions = make_submissions()
+    unique_rows = sum(len(rows) for _, rows in submissions)
+    double_click(submissions, unique_rows)
+    crash_replay(submissions, unique_rows)
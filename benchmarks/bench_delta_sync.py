@@ -0,0 +1,118 @@
+"""
+Sinkron delta dengan high-water mark + checksum blok vs membaca ulang seluruh sheet.
+
+Sheet berisi 100 ribu baris; API simulasi 300 ms per panggilan dan
+bandwidth 2 MB/detik. Setiap siklus ada 20 kuesioner baru (60 baris).
+Cara lama: get_all_values() lalu DataFrame, rekap 3 tingkat, total dan
+pemeriksaan konsistensi dihitung ulang dari seluruh data. Cara baru:
+SheetMirror.sync() membaca baris di bawah indeks sinkron plus VERIFY_BLOCKS
+blok lama, lalu MirrorFeed meneruskan baris baru saja ke RekapCache dan
+ConsistencyIndex. Hasil keduanya dibandingkan setelah setiap langkah.
+Jalankan dari root repo: python -m benchmarks.bench_delta_sync
+"""
+import os
+import random
+import tempfile
+import time
+
+import pandas as pd
+
+from benchmarks.fake_worksheet import make_worksheet
+from benchmarks.sample_data import make_form, make_sheet_rows, make_usaha
+from consistency import ConsistencyIndex, check_all
+from gsheet import HEADERS, build_rows
+from mirror import BLOCK_ROWS, VERIFY_BLOCKS, SheetMirror
+from ratelimit import sheets_limiter
+from rekap import LEVELS, MirrorFeed, RekapCache, build_frame, recap, totals
+
+N_ROWS = 100_000
+CYCLES = 5
+NEW_SUBMISSIONS = 20
+
+
+def timed(fn, *args):
+    start = time.perf_counter()
+    result = fn(*args)
+    return result, 1000 * (time.perf_counter() - start)
+
+
+# Cara lama: seluruh sheet dibaca dan semua hasil dihitung ulang
+def full_refresh(worksheet):
+    df = build_frame(worksheet.get_all_values()[1:])
+    return totals(df), {level: recap(df, level) for level in LEVELS}, check_all(df)
+
+
+# Pastikan cache inkremental sama dengan perhitungan ulang dari seluruh isi mirror
+def assert_same(mirror, rekap_cache, consistency_index):
+    df = build_frame(mirror.rows())
+    assert rekap_cache.totals() == totals(df)
+    for level in LEVELS:
+        pd.testing.assert_frame_equal(rekap_cache.recap(level).astype(str), recap(df, level).astype(str))
+    full, incremental = check_all(df), consistency_index.check_all()
+    for name in full:
+        pd.testing.assert_frame_equal(incremental[name].astype(str), full[name].astype(str))
+
+
+def api_usage(spreadsheet, before):
+    calls = spreadsheet.total_calls() - before[0]
+    kb = (sum(spreadsheet.payload_bytes.values()) - before[1]) / 1000
+    return calls, kb
+
+
+if __name__ == "__main__":
+    sheets_limiter.configure(rate_per_minute=None)
+    worksheet = make_worksheet(latency=0.3, bandwidth=2_000_000)
+    spreadsheet = worksheet.spreadsheet
+    worksheet.values.append(HEADERS)
+    worksheet.values.extend(make_sheet_rows(N_ROWS))
+
+    mirror = SheetMirror(os.path.join(tempfile.mkdtemp(), "mirror.sqlite3"))
+    rekap_cache, consistency_index = RekapCache(), ConsistencyIndex()
+    feed = MirrorFeed(mirror, [rekap_cache, consistency_index])
+    _, t_sync = timed(mirror.sync, [worksheet])
+    _, t_feed = timed(feed.refresh)
+    assert_same(mirror, rekap_cache, consistency_index)
+    print(f"Sinkron awal {N_ROWS} baris: {t_sync:.0f} ms + cache turunan {t_feed:.0f} ms (sekali saja)")
+    print(f"Setiap siklus: {NEW_SUBMISSIONS} kuesioner baru + {VERIFY_BLOCKS} blok lama x {BLOCK_ROWS} baris diperiksa\n")
+
+    full_ms, delta_ms, feed_ms = [], [], []
+    for cycle in range(CYCLES):
+        for i in range(NEW_SUBMISSIONS):
+            n = N_ROWS + cycle * NEW_SUBMISSIONS + i
+            worksheet.values.extend(build_rows(make_form(n), make_usaha(3, seed=n), f"2025-07-{1 + cycle:02d} 10:00:{i:02d}"))
+
+        before = (spreadsheet.total_calls(), sum(spreadsheet.payload_bytes.values()))
+        _, elapsed = timed(full_refresh, worksheet)
+        full_ms.append(elapsed)
+        full_usage = api_usage(spreadsheet, before)
+
+        before = (spreadsheet.total_calls(), sum(spreadsheet.payload_bytes.values()))
+        (pulled, repaired), elapsed = timed(mirror.sync, [worksheet])
+        delta_ms.append(elapsed)
+        delta_usage = api_usage(spreadsheet, before)
+        _, elapsed = timed(feed.refresh)
+        feed_ms.append(elapsed)
+        assert pulled == 3 * NEW_SUBMISSIONS and repaired == 0
+    assert_same(mirror, rekap_cache, consistency_index)
+
+    print(f"  baca ulang semua + hitung ulang   {sum(full_ms) / CYCLES:8.0f} ms/siklus "
+          f"({full_usage[0]} panggilan API, {full_usage[1]:,.0f} kB)")
+    print(f"  sync delta + cek blok             {sum(delta_ms) / CYCLES:8.0f} ms/siklus "
+          f"({delta_usage[0]} panggilan API, {delta_usage[1]:,.0f} kB)")
+    print(f"  cache turunan (baris baru saja)   {sum(feed_ms) / CYCLES:8.1f} ms/siklus")
+
+    # Edit langsung di Google Sheets pada baris lama: terdeteksi saat bloknya mendapat giliran diperiksa
+    spreadsheet.latency, spreadsheet.bandwidth = 0.0, None
+    row = random.Random(0).randrange(2, N_ROWS)
+    worksheet.values[row - 1][HEADERS.index("Nama Usaha")] = "Usaha Diedit Manual"
+    cycles = 0
+    while True:
+        cycles += 1
+        _, repaired = mirror.sync([worksheet])
+        if repaired:
+            break
+    _, t_feed = timed(feed.refresh)
+    assert_same(mirror, rekap_cache, consistency_index)
+    n_blocks = -(-len(worksheet.values) // BLOCK_ROWS)
+    print(f"\nEdit baris {row}: terdeteksi di siklus ke-{cycles} (paling lama {-(-n_blocks // VERIFY_BLOCKS)} siklus), "
+          f"cache turunan disusun ulang dalam {t_feed:.0f} ms")
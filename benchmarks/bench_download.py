@@ -0,0 +1,64 @@
+"""
+Ukuran dan latensi pengiriman PDF 2000 usaha ke browser.
+
+Cara lama: PDF di-base64 dan disisipkan sebagai data URI di elemen Markdown
+(ikut terkirim lewat websocket). Cara baru: st.download_button mendaftarkan
+byte PDF ke media file storage Streamlit; websocket hanya membawa URL dan
+browser mengambil byte mentah lewat HTTP.
+Jalankan dari root repo: python -m benchmarks.bench_download
+"""
+import base64
+import time
+import tracemalloc
+
+from streamlit.proto.DownloadButton_pb2 import DownloadButton
+from streamlit.proto.Markdown_pb2 import Markdown
+from streamlit.runtime.media_file_storage import MediaFileKind
+from streamlit.runtime.memory_media_file_storage import MemoryMediaFileStorage
+
+from benchmarks.sample_data import make_form, make_usaha
+from pdf_form import create_pdf
+
+N_USAHA = 2000
+FILENAME = "Pendataan_Industri_KEJAMBON_20250601.pdf"
+
+
+def old_data_uri(pdf_buffer):
+    pdf_bytes = pdf_buffer.getvalue()
+    b64 = base64.b64encode(pdf_bytes).decode()
+    href = f'<a href="data:application/pdf;base64,{b64}" download="{FILENAME}">Klik di sini untuk mengunduh PDF</a>'
+    return Markdown(body=href, allow_html=True).SerializeToString(), len(pdf_bytes)
+
+
+def new_download_button(pdf_bytes, storage):
+    file_id = storage.load_and_get_id(pdf_bytes, "application/pdf", MediaFileKind.DOWNLOADABLE, FILENAME)
+    proto = DownloadButton(id="unduh_pdf", label="Unduh PDF", url=storage.get_url(file_id))
+    return proto.SerializeToString(), len(storage.get_file(file_id).content)
+
+
+def timed(fn, *args):
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = fn(*args)
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, elapsed, peak
+
+
+if __name__ == "__main__":
+    start = time.perf_counter()
+    pdf_buffer = create_pdf(make_form(0, N_USAHA), make_usaha(N_USAHA))
+    print(f"create_pdf {N_USAHA} usaha: {time.perf_counter() - start:.2f} s, PDF {len(pdf_buffer.getvalue()) / 1024:.0f} KB\n")
+
+    (ws_old, http_old), t_old, mem_old = timed(old_data_uri, pdf_buffer)
+    storage = MemoryMediaFileStorage("/media")
+    new_download_button(b"%PDF-", storage)  # pemanasan: import mimetypes dll. tidak ikut diukur
+    (ws_new, http_new), t_new, mem_new = timed(new_download_button, pdf_buffer.getvalue(), storage)
+    # Rerun berikutnya: byte yang sama dari session state, file_id stabil sehingga tidak disimpan ulang
+    _, t_rerun, _ = timed(new_download_button, pdf_buffer.getvalue(), storage)
+
+    print(f"{'':<22} {'websocket (KB)':>15} {'HTTP (KB)':>10} {'waktu (ms)':>11} {'memori tambahan (KB)':>21}")
+    print(f"{'data URI base64':<22} {len(ws_old) / 1024:>15.0f} {0:>10} {1000 * t_old:>11.1f} {mem_old / 1024:>21.0f}")
+    print(f"{'st.download_button':<22} {len(ws_new) / 1024:>15.1f} {http_new / 1024:>10.0f} {1000 * t_new:>11.1f} {mem_new / 1024:>21.0f}")
+    print(f"{'  rerun (byte sama)':<22} {'':>15} {'':>10} {1000 * t_rerun:>11.1f}")
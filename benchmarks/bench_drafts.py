@@ -0,0 +1,61 @@
+"""
+Biaya draf lokal per langkah pengisian: simpan setelah setiap usaha dan pulihkan.
+
+Satu kuesioner desa besar diisi satu usaha per langkah; setiap langkah
+menulis ulang draf seperti persist_draft() di app.py. Dibandingkan dengan
+durasi satu rerun halaman usaha (bench_fragments) untuk melihat apakah
+penulisan draf terasa bagi pendata.
+Jalankan dari root repo: python -m benchmarks.bench_drafts
+"""
+import os
+import statistics
+import tempfile
+import time
+
+from benchmarks.sample_data import make_form, make_usaha
+from drafts import DraftStore
+
+N_USAHA = 200
+N_PENDATA = 50
+
+
+if __name__ == "__main__":
+    store = DraftStore(os.path.join(tempfile.mkdtemp(), "draf.sqlite3"))
+    form_data, usaha_data = make_form(0, N_USAHA), make_usaha(N_USAHA)
+
+    # Draf pendata lain, supaya pencarian berdasarkan kode tidak berjalan di tabel kosong
+    for i in range(N_PENDATA):
+        other = dict(make_form(i + 1, 5), nama_pendata=f"Pendata Lain {i}")
+        store.save(f"lain-{i}", {"page": "usaha", "form_data": other, "usaha_data": make_usaha(5, seed=i),
+                                 "current_usaha": 5, "jumlah_usaha": 5, "submission_id": None})
+
+    state = {"page": "usaha", "form_data": form_data, "usaha_data": [], "current_usaha": 0,
+             "jumlah_usaha": N_USAHA, "submission_id": None}
+    step_ms = []
+    for usaha in usaha_data:
+        state["usaha_data"] = state["usaha_data"] + [usaha]
+        state["current_usaha"] += 1
+        start = time.perf_counter()
+        store.save("draf", state)
+        step_ms.append(1000 * (time.perf_counter() - start))
+
+    start = time.perf_counter()
+    unchanged = store.save("draf", state)
+    t_unchanged = 1000 * (time.perf_counter() - start)
+
+    start = time.perf_counter()
+    restored = store.load("draf")
+    t_load = 1000 * (time.perf_counter() - start)
+    assert restored["usaha_data"] == usaha_data
+
+    start = time.perf_counter()
+    found = store.find(store.code("draf"))
+    t_list = 1000 * (time.perf_counter() - start)
+    assert found["id"] == "draf"
+
+    print(f"Draf kuesioner {N_USAHA} usaha, disimpan setelah setiap usaha ({N_PENDATA} draf pendata lain):")
+    print(f"  simpan per langkah  p50 {statistics.median(step_ms):6.2f} ms  "
+          f"maks {max(step_ms):6.2f} ms  (usaha ke-{N_USAHA}: {step_ms[-1]:.2f} ms)")
+    print(f"  simpan tanpa ubah   {t_unchanged:6.2f} ms (ditulis: {unchanged})")
+    print(f"  pulihkan draf       {t_load:6.2f} ms")
+    print(f"  cari draf dari kode {t_list:6.2f} ms")
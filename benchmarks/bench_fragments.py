@@ -0,0 +1,79 @@
+"""
+CPU server per pendata: rerun seluruh app.py vs rerun fragment halaman.
+
+Skenario satu kuesioner: isi N usaha satu per satu lalu perbaiki 3 usaha
+lewat tombol Edit di preview. Mode "seluruh app" mengirim setiap interaksi
+sebagai rerun penuh (perilaku sebelum halaman dijadikan fragment); mode
+"fragment" mengirim interaksi di halaman sebagai rerun fragment halaman itu,
+seperti yang dilakukan browser. Waktu diambil dari RunTimings sesi
+(st.session_state.run_timings), CPU diukur per thread script.
+Jalankan dari root repo: python -m benchmarks.bench_fragments
+"""
+import os
+
+import streamlit.testing.v1.local_script_runner as local_script_runner
+from streamlit.testing.v1 import AppTest
+
+from benchmarks.sample_data import make_form, make_usaha
+
+N_USAHA = 10
+EDITED = [1, 4, 7]
+# Key checkbox kode industri 3.1-3.7 di halaman usaha (sama dengan INDUSTRI_KEYS di app.py)
+INDUSTRI_KEYS = [
+    "industri_makanan", "industri_alat_rt", "industri_material", "industri_alat_pertanian",
+    "industri_kerajinan", "industri_logam", "industri_lainnya",
+]
+APP_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "app.py")
+
+# AppTest selalu menjalankan seluruh script; RerunData diganti agar interaksi
+# berikutnya dikirim sebagai rerun fragment yang sedang tampil (seperti browser)
+_RerunData = local_script_runner.RerunData
+_fragment_ids = []
+local_script_runner.RerunData = lambda **kwargs: _RerunData(fragment_id_queue=list(_fragment_ids), **kwargs)
+
+
+def interact(app, use_fragments):
+    _fragment_ids[:] = list(app._fragment_storage._fragments) if use_fragments else []
+    app.run()
+    _fragment_ids.clear()
+
+
+def scenario(use_fragments):
+    app = AppTest.from_file(APP_PATH, default_timeout=60)
+    app.run()
+    app.session_state.page = "usaha"
+    app.session_state.form_data = make_form(0, N_USAHA)
+    app.session_state.jumlah_usaha = N_USAHA
+    app.run()
+    app.session_state.run_timings.__init__()  # mulai hitung dari halaman usaha
+
+    for usaha in make_usaha(N_USAHA):
+        app.text_input(key="nama_usaha").input(usaha.nama_usaha)
+        app.text_input(key="nama_pemilik").input(usaha.nama_pemilik)
+        for key, flag in zip(INDUSTRI_KEYS, usaha.flags):
+            if flag:
+                app.checkbox(key=key).check()
+        app.number_input(key="jumlah_tenaga_kerja").set_value(usaha.jumlah_tenaga_kerja)
+        next(b for b in app.button if "Simpan" in b.label).click()
+        interact(app, use_fragments)
+    assert app.session_state.page == "preview", app.session_state.page
+
+    for i in EDITED:
+        app.button(key=f"edit_usaha_{i}").click()
+        interact(app, use_fragments)
+        app.text_input(key=f"edit_nama_usaha_{i}").input(f"Usaha Diperbaiki {i}")
+        next(b for b in app.button if b.label == "Simpan Perubahan").click()
+        interact(app, use_fragments)
+    assert all(app.session_state.usaha_data[i].nama_usaha == f"Usaha Diperbaiki {i}" for i in EDITED)
+    return app.session_state.run_timings.stats()
+
+
+if __name__ == "__main__":
+    print(f"{N_USAHA} usaha diisi satu per satu, {len(EDITED)} usaha diedit di preview")
+    for label, use_fragments in [("seluruh app", False), ("fragment", True)]:
+        stats = scenario(use_fragments)
+        runs = sum(s["runs"] for s in stats.values())
+        cpu = sum(s["cpu_total_ms"] for s in stats.values())
+        print(f"\n{label}: {runs} eksekusi, CPU total {cpu:.0f} ms")
+        for kind, s in sorted(stats.items()):
+            print(f"  {kind:<28} {s['runs']:3d} x  rata-rata {s['wall_avg_ms']:6.1f} ms  CPU {s['cpu_avg_ms']:6.1f} ms")
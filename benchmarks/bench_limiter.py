@@ -0,0 +1,66 @@
+"""
+Simulasi kuota: pembacaan latar belakang yang padat bersamaan dengan penulisan pendata.
+
+API palsu membalas 429 secara acak. Hasilnya menunjukkan waktu tunggu dan
+jumlah retry per jenis panggilan dari QuotaLimiter.
+Jalankan dari root repo: python -m benchmarks.bench_limiter
+"""
+import json
+import random
+import threading
+import time
+
+import gspread
+import requests
+
+from ratelimit import PRIORITY_READ, PRIORITY_WRITE, QuotaLimiter
+
+RATE_PER_MINUTE = 600  # dipercepat 10x agar simulasi selesai dalam hitungan detik
+BURST = 5
+ERROR_RATE = 0.1
+
+
+def quota_error():
+    response = requests.Response()
+    response.status_code = 429
+    response._content = json.dumps({"error": {"code": 429, "message": "Quota exceeded", "status": "RESOURCE_EXHAUSTED"}}).encode()
+    return gspread.exceptions.APIError(response)
+
+
+def fake_api(rng, lock):
+    with lock:
+        fail = rng.random() < ERROR_RATE
+    if fail:
+        raise quota_error()
+    time.sleep(0.01)
+
+
+def main():
+    limiter = QuotaLimiter(RATE_PER_MINUTE, BURST, base_delay=0.05, max_delay=1.0)
+    rng, lock = random.Random(1), threading.Lock()
+
+    def reader():
+        for _ in range(20):
+            limiter.call(fake_api, rng, lock, priority=PRIORITY_READ, label="col_values")
+
+    def writer():
+        for _ in range(5):
+            time.sleep(0.3)
+            limiter.call(fake_api, rng, lock, priority=PRIORITY_WRITE, label="append_rows")
+
+    threads = [threading.Thread(target=reader) for _ in range(4)] + [threading.Thread(target=writer) for _ in range(2)]
+    start = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    print(f"Kuota simulasi {RATE_PER_MINUTE}/menit, burst {BURST}, 429 acak {ERROR_RATE:.0%}; durasi {time.perf_counter() - start:.1f} s")
+    print(f"{'panggilan':<12} {'jumlah':>7} {'retry':>6} {'rata2 tunggu (ms)':>18} {'tunggu maks (ms)':>17}")
+    for label, stats in limiter.stats().items():
+        print(f"{label:<12} {stats['calls']:>7} {stats['retries']:>6} "
+              f"{1000 * stats['wait_total'] / stats['calls']:>18.0f} {1000 * stats['wait_max']:>17.0f}")
+
+
+if __name__ == "__main__":
+    main()
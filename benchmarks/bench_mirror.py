@@ -0,0 +1,70 @@
+"""
+Query laporan di mirror SQLite dibanding menarik seluruh sheet lewat get_all_values().
+
+Sheet lokal berisi 100 ribu baris; API simulasi 300 ms per panggilan dan
+bandwidth 2 MB/detik. Setelah sinkron awal, penarikan delta hanya membaca
+baris di bawah indeks sinkron terakhir.
+Jalankan dari root repo: python -m benchmarks.bench_mirror
+"""
+import os
+import tempfile
+import time
+
+from benchmarks.fake_worksheet import make_worksheet
+from benchmarks.sample_data import make_form, make_sheet_rows, make_usaha
+from gsheet import HEADERS, build_rows
+from mirror import TABLE, SheetMirror, quote
+from ratelimit import sheets_limiter
+
+N_ROWS = 100_000
+
+
+def timed(fn, *args):
+    start = time.perf_counter()
+    result = fn(*args)
+    return result, 1000 * (time.perf_counter() - start)
+
+
+QUERIES = {
+    "jumlah usaha per desa": (
+        f"SELECT {quote('Desa/Kelurahan')}, COUNT(*) FROM {TABLE} GROUP BY 1", ()),
+    "baris satu pendata": (
+        f"SELECT * FROM {TABLE} WHERE {quote('Nama Pendata')} = ?", ("Pendata 7",)),
+    "satu RT/RW di satu desa": (
+        f"SELECT COUNT(*) FROM {TABLE} WHERE {quote('Desa/Kelurahan')} = ? AND {quote('RT/RW')} = ?", ("KEJAMBON", "RT 01 RW 01")),
+    "submisi pada satu timestamp": (
+        f"SELECT * FROM {TABLE} WHERE {quote('Timestamp')} = ?", ("2025-06-05 08:00:04",)),
+}
+
+
+if __name__ == "__main__":
+    sheets_limiter.configure(rate_per_minute=None)
+    worksheet = make_worksheet(latency=0.3, bandwidth=2_000_000)
+    worksheet.values.append(HEADERS)
+    worksheet.values.extend(make_sheet_rows(N_ROWS))
+
+    values, t_full = timed(worksheet.get_all_values)
+    desa_col = HEADERS.index("Desa/Kelurahan")
+    _, t_scan = timed(lambda: sum(1 for row in values[1:] if row[desa_col] == "KEJAMBON"))
+    print(f"get_all_values {N_ROWS} baris: {t_full:.0f} ms (+ {t_scan:.0f} ms scan Python) untuk SETIAP laporan")
+
+    mirror = SheetMirror(os.path.join(tempfile.mkdtemp(), "mirror.sqlite3"))
+    pulled, t_initial = timed(mirror.pull_delta, [worksheet])
+    print(f"sinkron awal: {pulled} baris dalam {t_initial:.0f} ms (sekali saja)\n")
+
+    print("Query di mirror (ber-indeks):")
+    for label, (sql, params) in QUERIES.items():
+        rows, elapsed = timed(mirror.query, sql, params)
+        print(f"  {label:<28} {elapsed:7.2f} ms ({len(rows)} baris hasil)")
+
+    # Baris baru: sebagian dari SheetWriter instance ini, sebagian dari instance lain
+    new_rows = build_rows(make_form(1), make_usaha(40, seed=1), "2025-06-30 09:00:00")
+    first = len(worksheet.values) + 1
+    worksheet.values.extend(new_rows)
+    mirror.record_rows(worksheet.title, first, new_rows[:20])
+    calls_before = worksheet.spreadsheet.calls.get("get", 0)
+    pulled, t_delta = timed(mirror.pull_delta, [worksheet])
+    print(f"\ndelta: 20 baris dari writer + 20 baris instance lain -> pull_delta membaca {pulled} baris "
+          f"dalam {t_delta:.0f} ms ({worksheet.spreadsheet.calls['get'] - calls_before} panggilan API)")
+    _, t_idle = timed(mirror.pull_delta, [worksheet])
+    print(f"delta tanpa baris baru: {t_idle:.0f} ms; total di mirror {mirror.count()} baris")
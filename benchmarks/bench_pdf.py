@@ -0,0 +1,50 @@
+"""
+Benchmark create_pdf untuk 1, 100 dan 5000 usaha: waktu, memori puncak, jumlah halaman.
+
+Bagian kedua meniru pemeriksa yang membuat ulang PDF satu desa: banyak PDF
+kecil berturut-turut dalam satu proses.
+
+Jalankan dari root repo: python -m benchmarks.bench_pdf
+"""
+import re
+import time
+import tracemalloc
+
+from benchmarks.sample_data import make_form, make_usaha
+from pdf_form import create_pdf
+
+SIZES = [1, 100, 5000]
+DESA_FORMS = 200  # jumlah formulir satu desa
+DESA_USAHA = 5  # usaha per formulir
+
+
+def measure(n, long_names=False):
+    form_data, usaha_data = make_form(0, n), make_usaha(n, long_names=long_names)
+    start = time.perf_counter()
+    pdf_bytes = create_pdf(form_data, usaha_data).getvalue()
+    elapsed = time.perf_counter() - start
+    # Memori diukur pada jalan kedua karena tracemalloc memperlambat waktu beberapa kali lipat
+    tracemalloc.start()
+    create_pdf(form_data, usaha_data)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    pages = len(re.findall(rb"/Type /Page\b", pdf_bytes))
+    return elapsed, peak, pages, len(pdf_bytes)
+
+
+def measure_desa():
+    forms = [(make_form(i, DESA_USAHA), make_usaha(DESA_USAHA, seed=i)) for i in range(DESA_FORMS)]
+    create_pdf(*forms[0])  # pemanasan: cache per proses terisi di sini
+    start = time.perf_counter()
+    for form_data, usaha_data in forms:
+        create_pdf(form_data, usaha_data)
+    return time.perf_counter() - start
+
+
+if __name__ == "__main__":
+    print(f"{'usaha':>6} {'waktu (ms)':>11} {'memori puncak (MB)':>19} {'halaman':>8} {'ukuran (KB)':>12}")
+    for n in SIZES:
+        elapsed, peak, pages, size = measure(n)
+        print(f"{n:>6} {1000 * elapsed:>11.0f} {peak / 1e6:>19.1f} {pages:>8} {size / 1024:>12.0f}")
+    elapsed = measure_desa()
+    print(f"\n{DESA_FORMS} PDF x {DESA_USAHA} usaha: {elapsed:.2f} s, {1000 * elapsed / DESA_FORMS:.1f} ms per PDF")
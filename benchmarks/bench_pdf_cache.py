@@ -0,0 +1,51 @@
+"""
+Efek pdf_cache: unduhan ulang kuesioner yang sama di aplikasi.
+
+Ekspor massal (bulk_pdf.py) sengaja tidak memakai cache, lihat bench_bulk_pdf.
+
+Jalankan dari root repo: python -m benchmarks.bench_pdf_cache
+"""
+import os
+import tempfile
+import time
+
+from benchmarks.bench_bulk_pdf import make_snapshot
+from benchmarks.sample_data import make_form, make_usaha
+from bulk_pdf import read_csv_rows
+from gsheet import group_submissions
+from pdf_form import PdfCache, pdf_cache, pdf_content_key
+
+N_USAHA = 2000
+
+
+def timed(fn, *args, **kwargs):
+    start = time.perf_counter()
+    result = fn(*args, **kwargs)
+    return result, 1000 * (time.perf_counter() - start)
+
+
+if __name__ == "__main__":
+    form_data, usaha_data = make_form(0, N_USAHA), make_usaha(N_USAHA)
+    cache = PdfCache()
+    _, t_key = timed(pdf_content_key, form_data, usaha_data)
+    _, t_miss = timed(cache.get_or_create, form_data, usaha_data)
+    _, t_hit = timed(cache.get_or_create, form_data, usaha_data)
+    usaha_data[0].jumlah_tenaga_kerja += 1  # edit satu usaha -> kunci baru
+    _, t_edit = timed(cache.get_or_create, form_data, usaha_data)
+    print(f"Satu kuesioner {N_USAHA} usaha:")
+    print(f"  hash isi      {t_key:8.1f} ms")
+    print(f"  render (miss) {t_miss:8.1f} ms")
+    print(f"  cache hit     {t_hit:8.1f} ms")
+    print(f"  setelah edit  {t_edit:8.1f} ms (render ulang)")
+    print(f"  {cache.stats()}")
+
+    tmp = tempfile.mkdtemp()
+    csv_path = os.path.join(tmp, "snapshot.csv")
+    make_snapshot(csv_path)
+    submissions = group_submissions(read_csv_rows(csv_path))
+    print(f"\nUnduhan {len(submissions)} kuesioner lewat pdf_cache (seperti tombol unduh di aplikasi):")
+    pdf_cache.clear()
+    for label in ["pertama", "kedua"]:
+        _, elapsed = timed(lambda: [pdf_cache.get_or_create(*submission) for submission in submissions])
+        print(f"  unduhan {label:<8} {elapsed:8.0f} ms = {1000 * len(submissions) / elapsed:7.0f} PDF/detik")
+    print(f"  {pdf_cache.stats()}")
@@ -0,0 +1,59 @@
+"""
+Dashboard rekap pada 100 ribu baris: muat DataFrame, group-by per wilayah, memori.
+
+Pembanding: loop Python per baris seperti perhitungan total_industri di
+create_pdf, dan DataFrame tanpa dtype category.
+Jalankan dari root repo: python -m benchmarks.bench_rekap
+"""
+import os
+import tempfile
+import time
+
+import pandas as pd
+
+from benchmarks.sample_data import make_sheet_rows
+from gsheet import HEADERS
+from mirror import SheetMirror
+from rekap import FLAG_COLUMNS, LEVELS, build_frame, recap, totals
+
+N_ROWS = 100_000
+
+
+def timed(fn, *args):
+    start = time.perf_counter()
+    result = fn(*args)
+    return result, 1000 * (time.perf_counter() - start)
+
+
+# Cara lama: akumulasi per baris di Python
+def loop_recap(rows):
+    col = {name: i for i, name in enumerate(HEADERS)}
+    flags = [col[name] for name in FLAG_COLUMNS]
+    result = {}
+    for row in rows:
+        key = (row[col["Kecamatan"]], row[col["Desa/Kelurahan"]], row[col["RT/RW"]])
+        acc = result.setdefault(key, [0] * 9)
+        acc[0] += 1
+        for j, c in enumerate(flags):
+            acc[1 + j] += int(row[c])
+        acc[8] += int(row[col["Jumlah Tenaga Kerja"]])
+    return result
+
+
+if __name__ == "__main__":
+    mirror = SheetMirror(os.path.join(tempfile.mkdtemp(), "mirror.sqlite3"))
+    mirror.record_rows("Data Industri", 2, make_sheet_rows(N_ROWS))
+    rows, t_read = timed(mirror.rows)
+    df, t_build = timed(build_frame, rows)
+    plain = pd.DataFrame.from_records(rows, columns=HEADERS)
+    print(f"{N_ROWS} baris: baca mirror {t_read:.0f} ms + DataFrame {t_build:.0f} ms (sekali per TTL)")
+    print(f"  memori dengan category: {df.memory_usage(deep=True).sum() / 1e6:.1f} MB, "
+          f"tanpa category: {plain.memory_usage(deep=True).sum() / 1e6:.1f} MB\n")
+
+    for level in LEVELS:
+        result, elapsed = timed(recap, df, level)
+        print(f"  rekap per {level:<15} {elapsed:7.1f} ms ({len(result)} baris)")
+    _, t_totals = timed(totals, df)
+    print(f"  total keseluruhan          {t_totals:7.1f} ms")
+    _, t_loop = timed(loop_recap, rows)
+    print(f"  loop Python per baris (RT/RW) {t_loop:4.0f} ms")
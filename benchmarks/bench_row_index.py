@@ -0,0 +1,51 @@
+"""
+Benchmark simpan 500 formulir ke worksheet lokal.
+
+Membandingkan cara lama (get_all_values setiap simpan) dengan RowCountIndex.
+Jalankan dari root repo: python -m benchmarks.bench_row_index
+"""
+import time
+
+from benchmarks.fake_worksheet import make_worksheet
+from benchmarks.sample_data import make_form, make_usaha
+from gsheet import HEADERS, RowCountIndex, append_to_sheet, build_rows
+from ratelimit import sheets_limiter
+
+JUMLAH_FORM = 500
+BANDWIDTH = 50 * 1024 * 1024  # 50 MB/detik untuk payload simulasi
+
+
+def save_legacy(worksheet, rows):
+    current_rows = len(worksheet.get_all_values())
+    worksheet.append_rows(rows)
+    return current_rows + len(rows)
+
+
+def save_indexed(worksheet, rows, row_index):
+    row_index.get(worksheet)
+    return append_to_sheet(worksheet, rows, row_index)
+
+
+def run(label, save):
+    worksheet = make_worksheet(bandwidth=BANDWIDTH)
+    worksheet.append_row(HEADERS)
+    durations = []
+    for i in range(JUMLAH_FORM):
+        rows = build_rows(make_form(i), make_usaha(3, seed=i), "2025-06-01 08:00:00")
+        start = time.perf_counter()
+        save(worksheet, rows)
+        durations.append(time.perf_counter() - start)
+
+    print(f"\n{label}")
+    print(f"{'form':>10} {'baris sheet':>12} {'rata2 simpan (ms)':>18}")
+    for bucket in range(0, JUMLAH_FORM, 100):
+        chunk = durations[bucket:bucket + 100]
+        print(f"{bucket + 1:>4}-{bucket + 100:<5} {1 + (bucket + 100) * 3:>12} {1000 * sum(chunk) / len(chunk):>18.3f}")
+    print(f"total {sum(durations):.3f} s, panggilan API: {worksheet.spreadsheet.calls}")
+
+
+if __name__ == "__main__":
+    sheets_limiter.configure(rate_per_minute=None)  # kuota tidak ikut diukur di sini
+    run("get_all_values() setiap simpan", save_legacy)
+    row_index = RowCountIndex()
+    run("RowCountIndex", lambda ws, rows: save_indexed(ws, rows, row_index))
@@ -0,0 +1,52 @@
+"""
+Biaya instrumentasi span: span kosong (nonaktif vs aktif) dan create_pdf.
+
+Jalankan dari root repo: python -m benchmarks.bench_spans
+"""
+import os
+import tempfile
+import time
+
+from benchmarks.sample_data import make_form, make_usaha
+from pdf_form import create_pdf
+from spans import spans
+
+N_SPANS = 100_000
+N_PDF = 20
+N_USAHA = 50
+
+
+def span_cost():
+    start = time.perf_counter()
+    for _ in range(N_SPANS):
+        with spans.span("bench"):
+            pass
+    return 1e6 * (time.perf_counter() - start) / N_SPANS
+
+
+def pdf_cost(form_data, usaha_data):
+    start = time.perf_counter()
+    for _ in range(N_PDF):
+        create_pdf(form_data, usaha_data)
+    return 1000 * (time.perf_counter() - start) / N_PDF
+
+
+if __name__ == "__main__":
+    form_data, usaha_data = make_form(0, N_USAHA), make_usaha(N_USAHA)
+    path = os.path.join(tempfile.mkdtemp(), "spans.jsonl")
+    modes = [("nonaktif", False, None), ("aktif, memori", True, None), ("aktif, JSONL", True, path)]
+
+    print(f"{N_SPANS:,} span kosong, create_pdf {N_USAHA} usaha x {N_PDF}:")
+    for label, enabled, target in modes:
+        spans.configure(enabled, target)
+        spans.reset()
+        per_span = span_cost()
+        per_pdf = pdf_cost(form_data, usaha_data)
+        print(f"  {label:<14} {per_span:6.2f} us/span   create_pdf {per_pdf:6.1f} ms")
+    spans.flush()
+    print()
+    for stage, stats in spans.percentiles().items():
+        if stage.startswith("pdf"):
+            print(f"  {stage:<11} p50 {stats['p50_ms']:6.1f} ms  p95 {stats['p95_ms']:6.1f} ms  p99 {stats['p99_ms']:6.1f} ms")
+    with open(path, encoding="utf-8") as f:
+        print(f"  {sum(1 for _ in f):,} baris JSONL ({os.path.getsize(path) / 1024:.0f} KiB)")
@@ -0,0 +1,52 @@
+"""
+Benchmark time-to-first-render app.py dengan koneksi Google Sheets yang lambat.
+
+Koneksi disimulasikan (auth + open_by_key + worksheet + scan) dengan jeda tetap.
+Mode "eager" meniru perilaku lama: koneksi ditunggu sebelum form dirender.
+Jalankan dari root repo: python -m benchmarks.bench_startup
+"""
+import os
+import time
+
+import streamlit as st
+from streamlit.testing.v1 import AppTest
+
+import gsheet
+from benchmarks.fake_worksheet import make_worksheet
+
+CONNECT_SECONDS = 3.0
+APP_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "app.py")
+
+
+def slow_open_worksheet(credentials_info=None):
+    time.sleep(CONNECT_SECONDS)
+    return make_worksheet(), "Kredensial simulasi"
+
+
+def first_render(eager):
+    st.cache_resource.clear()
+    original_start = gsheet.SheetConnection.start
+
+    def eager_start(self):
+        # Perilaku lama: koneksi selesai dulu, baru form dirender
+        self._thread = True
+        self._run()
+        return self
+
+    if eager:
+        gsheet.SheetConnection.start = eager_start
+    try:
+        app = AppTest.from_file(APP_PATH, default_timeout=CONNECT_SECONDS * 5)
+        app.run()
+        rendered = app.session_state["first_render_ms"]
+        assert app.text_input(key="provinsi") is not None
+    finally:
+        gsheet.SheetConnection.start = original_start
+    return rendered
+
+
+if __name__ == "__main__":
+    gsheet.open_worksheet = slow_open_worksheet
+    print(f"Simulasi koneksi: {CONNECT_SECONDS:.1f} s")
+    for label, eager in [("eager (sebelum)", True), ("latar belakang (sesudah)", False)]:
+        print(f"{label:<26} time-to-first-render: {first_render(eager):8.1f} ms")
@@ -0,0 +1,70 @@
+"""
+Memori dan waktu akses data usaha: dict + list kode (cara lama) vs Usaha (mask 7 bit).
+
+Mengukur ukuran usaha_data satu sesi untuk desa besar dan waktu yang
+dipakai konsumen kode industri (kolom flag sheet, centang + total PDF,
+dan daftar kode di preview).
+Jalankan dari root repo: python -m benchmarks.bench_usaha
+"""
+import time
+import tracemalloc
+
+from benchmarks.sample_data import make_usaha
+from usaha import KODE_INDUSTRI
+
+N_USAHA = 500
+REPEAT = 200
+
+
+def as_dicts(usaha_data):
+    return [{
+        "nama_usaha": usaha.nama_usaha,
+        "nama_pemilik": usaha.nama_pemilik,
+        "kode_industri": list(usaha.kode_industri),
+        "jumlah_tenaga_kerja": usaha.jumlah_tenaga_kerja,
+    } for usaha in usaha_data]
+
+
+# Konsumen lama: setiap tempat memindai list kode dengan `in`
+def consume_dicts(usaha_data):
+    for usaha in usaha_data:
+        [1 if kode in usaha["kode_industri"] else 0 for kode in KODE_INDUSTRI]  # save_to_gsheet
+        ["✓" if f"3.{j}" in usaha["kode_industri"] else "" for j in range(1, 8)]  # create_pdf, baris
+        [f"3.{j}" in usaha["kode_industri"] for j in range(1, 8)]  # create_pdf, total
+        ", ".join(usaha["kode_industri"])  # preview
+
+
+def consume_records(usaha_data):
+    for usaha in usaha_data:
+        usaha.flags
+        usaha.marks
+        usaha.flags
+        ", ".join(usaha.kode_industri)
+
+
+def measure_memory(build):
+    tracemalloc.start()
+    data = build()
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return data, size
+
+
+def timed(fn, data):
+    start = time.perf_counter()
+    for _ in range(REPEAT):
+        fn(data)
+    return (time.perf_counter() - start) / REPEAT
+
+
+if __name__ == "__main__":
+    template = make_usaha(N_USAHA)
+    # String nama dipakai bersama oleh kedua model, jadi yang terukur hanya wadah per usaha
+    records, records_size = measure_memory(lambda: [
+        type(u)(u.nama_usaha, u.nama_pemilik, u.industri, u.jumlah_tenaga_kerja) for u in template
+    ])
+    dicts, dicts_size = measure_memory(lambda: as_dicts(template))
+    print(f"{N_USAHA} usaha per sesi")
+    print(f"  memori usaha_data   dict {dicts_size / 1024:7.1f} KiB   Usaha {records_size / 1024:7.1f} KiB")
+    print(f"  akses kode industri dict {1000 * timed(consume_dicts, dicts):7.2f} ms    "
+          f"Usaha {1000 * timed(consume_records, records):7.2f} ms")
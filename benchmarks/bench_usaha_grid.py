@@ -0,0 +1,100 @@
+"""
+Jumlah eksekusi script app.py per kuesioner: form per usaha vs tabel edit BLOK IV.
+
+Skenario: isi N usaha di halaman usaha lalu perbaiki 3 usaha di preview.
+Cara lama memakai form per usaha dan tombol Edit per usaha (masing-masing
+dengan st.rerun); cara baru memakai satu tabel edit di halaman usaha dan
+satu tabel edit di preview. Eksekusi dihitung dari script pembungkus yang
+menaikkan penghitung setiap kali app.py dijalankan (termasuk st.rerun).
+Jalankan dari root repo: python -m benchmarks.bench_usaha_grid
+"""
+import importlib
+import os
+import tempfile
+import time
+
+from streamlit.testing.v1 import AppTest
+
+from benchmarks.sample_data import make_form, make_usaha
+from gsheet import FLAG_COLUMNS
+
+N_USAHA = 10
+EDITED = [1, 4, 7]
+APP_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "app.py")
+
+EXECUTIONS = 0
+
+WRAPPER = f"""
+import importlib
+counter = importlib.import_module("benchmarks.bench_usaha_grid")
+counter.EXECUTIONS += 1
+exec(compile(open({APP_PATH!r}, encoding="utf-8").read(), {APP_PATH!r}, "exec"))
+"""
+
+
+def counter():
+    return importlib.import_module("benchmarks.bench_usaha_grid")
+
+
+def start_app():
+    path = os.path.join(tempfile.mkdtemp(), "app_counted.py")
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(WRAPPER)
+    app = AppTest.from_file(path, default_timeout=60)
+    app.run()
+    app.session_state.page = "usaha"
+    app.session_state.form_data = make_form(0, N_USAHA)
+    app.session_state.jumlah_usaha = N_USAHA
+    app.run()
+    counter().EXECUTIONS = 0
+    return app
+
+
+def button(app, label):
+    return next(b for b in app.button if b.label == label or b.label.startswith(label))
+
+
+def per_business(usaha_data):
+    app = start_app()
+    for usaha in usaha_data:
+        app.text_input(key="nama_usaha").input(usaha.nama_usaha)
+        app.text_input(key="nama_pemilik").input(usaha.nama_pemilik)
+        for key, flag in zip(["industri_makanan", "industri_alat_rt", "industri_material", "industri_alat_pertanian",
+                              "industri_kerajinan", "industri_logam", "industri_lainnya"], usaha.flags):
+            app.checkbox(key=key).set_value(bool(flag))
+        app.number_input(key="jumlah_tenaga_kerja").set_value(usaha.jumlah_tenaga_kerja)
+        button(app, "💾 Simpan" if app.session_state.current_usaha < N_USAHA - 1 else "✅ Simpan").click()
+        app.run()
+    for i in EDITED:
+        app.button(key=f"edit_usaha_{i}").click().run()
+        app.text_input(key=f"edit_nama_usaha_{i}").input(f"Usaha Diperbaiki {i}")
+        button(app, "Simpan Perubahan").click().run()
+    return app
+
+
+def grid(usaha_data):
+    app = start_app()
+    app.radio(key="cara_isi_usaha").set_value("Tabel (semua usaha sekaligus)").run()
+    rows = {str(i): {"Nama Usaha": u.nama_usaha, "Nama Pemilik": u.nama_pemilik,
+                     "Jumlah Tenaga Kerja": u.jumlah_tenaga_kerja,
+                     **{column: bool(flag) for column, flag in zip(FLAG_COLUMNS, u.flags)}}
+            for i, u in enumerate(usaha_data)}
+    app.session_state["usaha_grid_editor"] = {"edited_rows": rows, "added_rows": [], "deleted_rows": []}
+    button(app, "✅ Simpan Semua Usaha").click().run()
+    edits = {str(i): {"Nama Usaha": f"Usaha Diperbaiki {i}"} for i in EDITED}
+    app.session_state["preview_grid_editor"] = {"edited_rows": edits, "added_rows": [], "deleted_rows": []}
+    button(app, "Simpan Perubahan Tabel").click().run()
+    return app
+
+
+if __name__ == "__main__":
+    usaha_data = make_usaha(N_USAHA)
+    print(f"{N_USAHA} usaha diisi, {len(EDITED)} usaha diperbaiki di preview")
+    for label, scenario in [("form per usaha", per_business), ("tabel edit", grid)]:
+        start = time.perf_counter()
+        app = scenario(usaha_data)
+        elapsed = time.perf_counter() - start
+        names = [app.session_state.usaha_data[i].nama_usaha for i in EDITED]
+        assert app.session_state.page == "preview" and all(n.startswith("Usaha Diperbaiki") for n in names), names
+        assert len(app.session_state.usaha_data) == N_USAHA
+        print(f"  {label:<15} eksekusi script: {counter().EXECUTIONS:3d}, waktu render total: {elapsed:5.2f} s")
@@ -0,0 +1,59 @@
+"""
+Impor usaha BLOK IV dari CSV vs pengisian satu per satu di halaman usaha.
+
+Pengisian manual diukur dengan AppTest (satu submit form = satu rerun
+app.py), lalu dibandingkan dengan validasi file CSV sekaligus untuk RT
+dengan banyak industri rumahan.
+Jalankan dari root repo: python -m benchmarks.bench_usaha_import
+"""
+import os
+import time
+
+import pandas as pd
+from streamlit.testing.v1 import AppTest
+
+from benchmarks.sample_data import make_form, make_usaha
+from usaha_import import TEMPLATE_COLUMNS, import_usaha
+
+MANUAL_USAHA = 10
+SIZES = [150, 1000, 10000]
+APP_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "app.py")
+
+
+def make_csv(n, error_every=0):
+    rows = [[u.nama_usaha, u.nama_pemilik, ", ".join(u.kode_industri), u.jumlah_tenaga_kerja] for u in make_usaha(n)]
+    if error_every:
+        for i in range(0, n, error_every):
+            rows[i][3] = "dua"  # Jumlah Tenaga Kerja bukan angka
+    return pd.DataFrame(rows, columns=TEMPLATE_COLUMNS).to_csv(index=False).encode("utf-8")
+
+
+# Rata-rata waktu satu submit form usaha (satu rerun app.py)
+def manual_entry_seconds():
+    app = AppTest.from_file(APP_PATH, default_timeout=60)
+    app.run()
+    app.session_state.page = "usaha"
+    app.session_state.form_data = make_form(0, MANUAL_USAHA)
+    app.session_state.jumlah_usaha = MANUAL_USAHA
+    app.run()
+    start = time.perf_counter()
+    for usaha in make_usaha(MANUAL_USAHA - 1):
+        app.text_input(key="nama_usaha").input(usaha.nama_usaha)
+        app.text_input(key="nama_pemilik").input(usaha.nama_pemilik)
+        app.checkbox(key="industri_makanan").check()
+        app.number_input(key="jumlah_tenaga_kerja").set_value(usaha.jumlah_tenaga_kerja)
+        next(b for b in app.button if "Simpan" in b.label).click()
+        app.run()
+    return (time.perf_counter() - start) / (MANUAL_USAHA - 1)
+
+
+if __name__ == "__main__":
+    per_submit = manual_entry_seconds()
+    print(f"Isi manual: {1000 * per_submit:.0f} ms per usaha (satu rerun, tanpa waktu mengetik)")
+    for n in SIZES:
+        data = make_csv(n, error_every=50)
+        start = time.perf_counter()
+        usaha_data, errors = import_usaha(data, "usaha.csv")
+        elapsed = time.perf_counter() - start
+        print(f"  {n:>6} baris CSV: impor {1000 * elapsed:7.1f} ms ({len(usaha_data)} valid, {len(errors)} kesalahan) "
+              f"vs manual ~{n * per_submit:6.1f} s")
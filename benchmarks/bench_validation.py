@@ -0,0 +1,97 @@
+"""
+Validasi 100.000 kuesioner (BLOK I-III) dan 100.000 usaha (BLOK IV): per record vs vektor.
+
+Data berisi campuran kuesioner valid dan salah (field kosong, tanggal salah
+format, jumlah negatif, total 0, usaha tanpa nama/industri). Skenario
+"bertipe" menjaga tipe kolom (teks tetap teks, jumlah tetap int) seperti
+form_data dari form/API; skenario "campuran" juga memasukkan None, pecahan
+dan teks ke kolom jumlah sehingga pandas harus memakai kolom object.
+Loop form_error_codes/usaha_error_codes dibandingkan dengan
+validate_form_frame/validate_usaha_frame + error_codes; kode kesalahan per
+baris harus sama persis.
+Jalankan dari root repo: python -m benchmarks.bench_validation
+"""
+import random
+import time
+
+import pandas as pd
+
+from benchmarks.sample_data import make_form, make_usaha
+from validation import (FORM_KEYS, JML_KEYS, USAHA_FIELDS, error_codes, form_error_codes, usaha_error_codes,
+                        validate_form_frame, validate_usaha_frame)
+
+N = 100_000
+# Nilai salah yang tidak mengubah tipe kolom, dan tambahan untuk skenario campuran
+BAD_TEXT = ["", "  "]
+BAD_TANGGAL = ["", "2025/06/01", "01-06-2025"]
+BAD_JML = [-1, -3]
+BAD_MIXED = [None, "", 2.5, "tiga", " 4 "]
+
+
+# Kuesioner contoh (total usaha 0-8); sekitar 30% berisi satu atau dua kesalahan
+def make_records(n, mixed=False, seed=0):
+    rng = random.Random(seed)
+    records = []
+    for i in range(n):
+        record = make_form(i, rng.randint(0, 8))
+        if rng.random() < 0.3:
+            for key in rng.sample(FORM_KEYS, rng.randint(1, 2)):
+                if key == "tanggal":
+                    record[key] = rng.choice(BAD_TANGGAL)
+                elif key in JML_KEYS:
+                    record[key] = rng.choice(BAD_JML + (BAD_MIXED if mixed else []))
+                else:
+                    record[key] = rng.choice(BAD_TEXT + ([None] if mixed else []))
+        records.append(record)
+    return records
+
+
+# Usaha contoh; sekitar 20% berisi kesalahan
+def make_usaha_rows(n, seed=0):
+    rng = random.Random(seed)
+    usaha_data = make_usaha(n, seed=seed)
+    for usaha in usaha_data:
+        if rng.random() < 0.2:
+            field = rng.choice(USAHA_FIELDS)
+            setattr(usaha, field, {"industri": 0, "jumlah_tenaga_kerja": rng.choice([0, -2])}.get(field, " "))
+    return usaha_data
+
+
+def timed(func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    return result, 1000 * (time.perf_counter() - start)
+
+
+# Validasi kuesioner per record dan vektor; mengembalikan (kode per record, ms per record, ms DataFrame, ms vektor)
+def run_form(records):
+    scalar, t_scalar = timed(lambda: [form_error_codes(record) for record in records])
+    frame, t_frame = timed(lambda: pd.DataFrame.from_records(records, columns=FORM_KEYS))
+    vector, t_vector = timed(lambda: error_codes(validate_form_frame(frame)))
+    assert vector.tolist() == scalar
+    return scalar, t_scalar, t_frame, t_vector
+
+
+if __name__ == "__main__":
+    usaha_data = make_usaha_rows(N)
+
+    scalar_usaha, t_scalar_usaha = timed(lambda: [usaha_error_codes(usaha) for usaha in usaha_data])
+    usaha_frame, t_usaha_frame = timed(lambda: pd.DataFrame([
+        (usaha.nama_usaha, usaha.nama_pemilik, usaha.industri, usaha.jumlah_tenaga_kerja) for usaha in usaha_data
+    ], columns=USAHA_FIELDS))
+    vector_usaha, t_vector_usaha = timed(lambda: error_codes(validate_usaha_frame(usaha_frame)))
+    assert vector_usaha.tolist() == scalar_usaha
+
+    for label, mixed in [("bertipe", False), ("campuran", True)]:
+        scalar_form, t_scalar_form, t_frame, t_vector_form = run_form(make_records(N, mixed))
+        invalid_form = sum(bool(codes) for codes in scalar_form)
+        print(f"BLOK I-III {label}: {N} kuesioner ({invalid_form} tidak valid)")
+        print(f"  per record (form_error_codes)    {t_scalar_form:8.1f} ms")
+        print(f"  vektor (validate_form_frame)     {t_vector_form:8.1f} ms  "
+              f"(+ {t_frame:.1f} ms menyusun DataFrame)  {t_scalar_form / t_vector_form:5.1f}x")
+    invalid_usaha = sum(bool(codes) for codes in scalar_usaha)
+    print(f"BLOK IV: {N} usaha ({invalid_usaha} tidak valid)")
+    print(f"  per record (usaha_error_codes)   {t_scalar_usaha:8.1f} ms")
+    print(f"  vektor (validate_usaha_frame)    {t_vector_usaha:8.1f} ms  "
+          f"(+ {t_usaha_frame:.1f} ms menyusun DataFrame)  {t_scalar_usaha / t_vector_usaha:5.1f}x")
+    print("  kode kesalahan per baris identik")
@@ -0,0 +1,72 @@
+"""
+Micro-benchmark wrap nama usaha yang panjang di BLOK IV.
+
+Membandingkan pre-pass lama (stringWidth untuk setiap prefiks baris, dua kali
+per usaha), wrap Paragraph ReportLab, dan wrap_text dengan lebar kata di cache.
+Jalankan dari root repo: python -m benchmarks.bench_wrap
+"""
+import time
+
+from reportlab.lib.styles import ParagraphStyle
+from reportlab.pdfbase.pdfmetrics import stringWidth
+from reportlab.platypus import Paragraph
+
+from benchmarks.sample_data import make_usaha
+from pdf_form import CELL_FONT, CELL_FONT_SIZE, NAME_WIDTH, word_width, wrap_text
+
+N_USAHA = 2000
+
+
+# Salinan get_wrapped_text dari create_pdf lama sebagai pembanding
+def old_wrapped_text(text, max_width, font_name, font_size):
+    words = text.split()
+    lines, current_line = [], []
+    for word in words:
+        test_line = ' '.join(current_line + [word])
+        if stringWidth(test_line, font_name, font_size) <= max_width:
+            current_line.append(word)
+        else:
+            if current_line:
+                lines.append(' '.join(current_line))
+                current_line = [word]
+            else:
+                lines.append(word)
+                current_line = []
+    if current_line:
+        lines.append(' '.join(current_line))
+    return lines
+
+
+def old_prepass(usaha_data):
+    for usaha in usaha_data:
+        old_wrapped_text(usaha.nama_usaha, NAME_WIDTH, CELL_FONT, CELL_FONT_SIZE)
+        old_wrapped_text(usaha.nama_pemilik, NAME_WIDTH, CELL_FONT, CELL_FONT_SIZE)
+
+
+def paragraph_wrap(usaha_data):
+    style = ParagraphStyle(name='Normal', fontName=CELL_FONT, fontSize=CELL_FONT_SIZE, leading=12)
+    for usaha in usaha_data:
+        Paragraph(usaha.nama_usaha, style).wrap(NAME_WIDTH, 1e9)
+        Paragraph(usaha.nama_pemilik, style).wrap(NAME_WIDTH, 1e9)
+
+
+def cached_wrap(usaha_data):
+    for usaha in usaha_data:
+        wrap_text(usaha.nama_usaha)
+        wrap_text(usaha.nama_pemilik)
+
+
+def timed(fn, usaha_data):
+    start = time.perf_counter()
+    fn(usaha_data)
+    return time.perf_counter() - start
+
+
+if __name__ == "__main__":
+    usaha_data = make_usaha(N_USAHA, long_names=True)
+    words = len(usaha_data[0].nama_usaha.split())
+    print(f"{N_USAHA} usaha, {words} kata per nama usaha")
+    word_width.cache_clear()
+    for label, fn in [("pre-pass lama", old_prepass), ("Paragraph.wrap", paragraph_wrap), ("wrap_text (cache)", cached_wrap)]:
+        print(f"  {label:<18} {1000 * timed(fn, usaha_data):>8.1f} ms")
+    print(f"  cache lebar kata: {word_width.cache_info()}")
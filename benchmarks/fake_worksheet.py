@@ -0,0 +1,148 @@
+import json
+import threading
+import time
+
+
+class FakeSpreadsheet:
+    """Spreadsheet lokal pengganti gspread.Spreadsheet untuk benchmark."""
+
+    def __init__(self, latency=0.0, bandwidth=None):
+        self.id = f"fake-{id(self)}"
+        self.latency = latency
+        self.bandwidth = bandwidth  # byte per detik, None = tanpa batas
+        self.calls = {}
+        self.payload_bytes = {}
+        self._lock = threading.Lock()
+        self._sheets = {}
+        self._next_id = 0
+
+    # Simulasikan biaya satu panggilan API: latensi tetap + ukuran payload
+    def _api_call(self, name, payload=None):
+        with self._lock:
+            self.calls[name] = self.calls.get(name, 0) + 1
+        delay = self.latency
+        if payload is not None:
+            size = len(json.dumps(payload))
+            with self._lock:
+                self.payload_bytes[name] = self.payload_bytes.get(name, 0) + size
+            if self.bandwidth:
+                delay += size / self.bandwidth
+        if delay:
+            time.sleep(delay)
+
+    def add_worksheet(self, title, rows=1000, cols=26):
+        self._api_call("add_worksheet")
+        worksheet = FakeWorksheet(self, self._next_id, title, rows, cols)
+        self._sheets[title] = worksheet
+        self._next_id += 1
+        return worksheet
+
+    def worksheet(self, title):
+        import gspread
+        self._api_call("worksheet")
+        if title not in self._sheets:
+            raise gspread.exceptions.WorksheetNotFound(title)
+        return self._sheets[title]
+
+    def worksheets(self):
+        self._api_call("worksheets")
+        return list(self._sheets.values())
+
+    def fetch_sheet_metadata(self, params=None):
+        self._api_call("fetch_sheet_metadata")
+        return {
+            "sheets": [
+                {"properties": {
+                    "sheetId": ws.id,
+                    "title": ws.title,
+                    "gridProperties": {"rowCount": ws.row_count, "columnCount": ws.col_count},
+                }}
+                for ws in self._sheets.values()
+            ]
+        }
+
+    def total_calls(self):
+        return sum(self.calls.values())
+
+
+class FakeWorksheet:
+    """Worksheet lokal dengan respons append_rows yang meniru Sheets API."""
+
+    def __init__(self, spreadsheet, sheet_id, title, rows=1000, cols=26):
+        self.spreadsheet = spreadsheet
+        self.id = sheet_id
+        self.title = title
+        self.row_count = rows
+        self.col_count = cols
+        self.values = []
+        self._lock = threading.Lock()
+
+    def append_rows(self, rows, **kwargs):
+        self.spreadsheet._api_call("append_rows", rows)
+        with self._lock:
+            start = len(self.values) + 1
+            self.values.extend([list(row) for row in rows])
+            end = len(self.values)
+            self.row_count = max(self.row_count, end)
+        return {
+            "tableRange": f"'{self.title}'!A1:Z{start - 1}",
+            "updates": {
+                "updatedRange": f"'{self.title}'!A{start}:Z{end}",
+                "updatedRows": len(rows),
+            },
+        }
+
+    def append_row(self, row, **kwargs):
+        return self.append_rows([row])
+
+    def get_all_values(self):
+        with self._lock:
+            snapshot = [[str(v) for v in row] for row in self.values]
+        self.spreadsheet._api_call("get_all_values", snapshot)
+        return snapshot
+
+    # Hanya mendukung rentang "A<awal>:<kolom terakhir>[<akhir>]" seperti yang dipakai SheetMirror
+    def get(self, range_name):
+        first, last = range_name.split(":")
+        start = int(first[1:])
+        end = int(last.lstrip("ABCDEFGHIJKLMNOPQRSTUVWXYZ") or len(self.values))
+        with self._lock:
+            values = [[str(v) for v in row] for row in self.values[start - 1:end]]
+        # Seperti Sheets API: baris kosong di ujung rentang tidak dikirim
+        while values and not any(values[-1]):
+            values.pop()
+        self.spreadsheet._api_call("get", values)
+        return values
+
+    def row_values(self, row):
+        with self._lock:
+            values = [str(v) for v in self.values[row - 1]] if row <= len(self.values) else []
+        self.spreadsheet._api_call("row_values", values)
+        return values
+
+    # Hanya mendukung rentang satu baris, misal "AA1"
+    def update(self, values=None, range_name=None):
+        import gspread
+        self.spreadsheet._api_call("update", values)
+        row, col = gspread.utils.a1_to_rowcol(range_name)
+        with self._lock:
+            self.values.extend([] for _ in range(row - len(self.values)))
+            target = self.values[row - 1]
+            target.extend([""] * (col - 1 + len(values[0]) - len(target)))
+            target[col - 1:col - 1 + len(values[0])] = values[0]
+        return {"updatedRange": f"'{self.title}'!{range_name}"}
+
+    def add_cols(self, cols):
+        self.spreadsheet._api_call("add_cols")
+        self.col_count += cols
+
+    def col_values(self, col):
+        with self._lock:
+            column = [str(row[col - 1]) for row in self.values if len(row) >= col]
+        self.spreadsheet._api_call("col_values", column)
+        return column
+
+
+def make_worksheet(title="Data Industri", latency=0.0, bandwidth=None):
+    spreadsheet = FakeSpreadsheet(latency=latency, bandwidth=bandwidth)
+    return spreadsheet.add_worksheet(title)
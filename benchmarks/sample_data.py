@@ -0,0 +1,72 @@
+import random
+
+from usaha import KODE_INDUSTRI as KODE, Usaha
+
+
+# Data BLOK I-III contoh untuk benchmark
+def make_form(i=0, jumlah_usaha=3):
+    per_kode = [0] * 7
+    for j in range(jumlah_usaha):
+        per_kode[j % 7] += 1
+    return {
+        "provinsi": "JAWA TENGAH",
+        "kabupaten": "KOTA TEGAL",
+        "kecamatan": "TEGAL TIMUR",
+        "desa": "KEJAMBON",
+        "rt": f"{(i % 12) + 1:02d}",
+        "rw": f"{(i % 5) + 1:02d}",
+        "nama_pendata": f"Pendata {i % 20}",
+        "nama_pemeriksa": f"Pemeriksa {i % 4}",
+        "tanggal": "2025-06-01",
+        "jml_industri_makanan": per_kode[0],
+        "jml_industri_alat_rt": per_kode[1],
+        "jml_industri_material": per_kode[2],
+        "jml_industri_alat_pertanian": per_kode[3],
+        "jml_industri_kerajinan": per_kode[4],
+        "jml_industri_logam": per_kode[5],
+        "jml_industri_lainnya": per_kode[6],
+    }
+
+
+# Data BLOK IV contoh; long_names=True menghasilkan nama usaha yang panjang
+def make_usaha(n, long_names=False, seed=0):
+    rng = random.Random(seed)
+    usaha_data = []
+    for i in range(n):
+        nama = f"Usaha {i + 1}"
+        if long_names:
+            nama = " ".join(["Usaha", "Dagang", "Sumber", "Rejeki", "Makmur", "Jaya", "Abadi", "Sentosa"] * 3) + f" {i + 1}"
+        usaha_data.append(Usaha.from_kode(
+            nama,
+            f"Pemilik {i + 1}",
+            [KODE[i % 7]] + ([KODE[(i + 3) % 7]] if rng.random() < 0.2 else []),
+            rng.randint(1, 20),
+        ))
+    return usaha_data
+
+
+DESA = ["KEJAMBON", "SLEROK", "MINTARAGEN", "PANGGUNG", "MANGKUKUSUMAN"]
+KECAMATAN = ["TEGAL TIMUR", "TEGAL BARAT"]
+JML_KEYS = [
+    "jml_industri_makanan", "jml_industri_alat_rt", "jml_industri_material", "jml_industri_alat_pertanian",
+    "jml_industri_kerajinan", "jml_industri_logam", "jml_industri_lainnya",
+]
+
+
+# Baris sheet "Data Industri" contoh sebanyak n_rows (1-8 usaha per kuesioner, beberapa desa/kecamatan)
+def make_sheet_rows(n_rows, seed=0):
+    from gsheet import build_rows
+    rng = random.Random(seed)
+    rows, i = [], 0
+    while len(rows) < n_rows:
+        form_data = dict(make_form(i), desa=DESA[i % len(DESA)], kecamatan=KECAMATAN[i % len(DESA) % 2])
+        usaha_data = make_usaha(rng.randint(1, 8), seed=i)
+        for usaha in usaha_data:
+            usaha.nama_usaha += f" K{i}"  # nama usaha unik per kuesioner
+        # Jumlah BLOK III diisi sesuai flag BLOK IV (data konsisten)
+        for kode, key in zip(KODE, JML_KEYS):
+            form_data[key] = sum(usaha.has(kode) for usaha in usaha_data)
+        timestamp = f"2025-06-{1 + i % 28:02d} {8 + i // 3600 % 10:02d}:{i // 60 % 60:02d}:{i % 60:02d}"
+        rows.extend(build_rows(form_data, usaha_data, timestamp))
+        i += 1
+    return rows[:n_rows]
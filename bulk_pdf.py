@@ -0,0 +1,149 @@
+"""
+Pembuatan PDF massal untuk semua kuesioner di satu desa/kecamatan.
+
+Baris "Data Industri" (seluruh shard, mirror lokal yang disinkronkan dulu
+dengan delta, atau snapshot CSV) dikelompokkan kembali menjadi kuesioner, lalu setiap kuesioner dirender dengan create_pdf
+di process pool. Hasilnya ditulis satu per satu ke ZIP di disk, jadi memori
+tidak bertambah dengan jumlah PDF.
+
+Contoh:
+    python bulk_pdf.py --kecamatan "TEGAL TIMUR" --output pdf_tegal_timur.zip
+    python bulk_pdf.py --csv snapshot.csv --desa KEJAMBON --workers 4
+    python bulk_pdf.py --mirror --desa KEJAMBON
+"""
+import argparse
+import csv
+import os
+import re
+import time
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+
+from gsheet import HEADERS, RowCountIndex, ShardDirectory, group_submissions, open_worksheet, read_all_rows
+from mirror import MIRROR_PATH, SheetMirror
+from pdf_form import create_pdf
+
+
+# Fungsi untuk membaca snapshot CSV dari sheet (baris header dilewati oleh group_submissions)
+def read_csv_rows(path):
+    with open(path, newline="", encoding="utf-8") as f:
+        return list(csv.reader(f))
+
+
+# Fungsi untuk menulis snapshot CSV dengan header yang sama seperti sheet
+def write_csv_rows(path, rows):
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(HEADERS)
+        writer.writerows(rows)
+
+
+# Fungsi untuk membaca seluruh shard langsung dari Google Sheets
+def read_sheet_rows():
+    worksheet, _ = open_worksheet()
+    return read_all_rows(ShardDirectory(RowCountIndex()).shards(worksheet.spreadsheet))
+
+
+# Fungsi untuk membaca dari mirror lokal; hanya baris baru (dan blok lama yang diperiksa) dibaca dari Google Sheets
+def read_mirror_rows(path=MIRROR_PATH):
+    worksheet, _ = open_worksheet()
+    mirror = SheetMirror(path)
+    try:
+        pulled, repaired = mirror.sync(ShardDirectory(RowCountIndex()).shards(worksheet.spreadsheet))
+        print(f"Mirror {path}: {pulled} baris baru, {repaired} blok lama disalin ulang")
+        return mirror.rows()
+    finally:
+        mirror.close()
+
+
+# Fungsi untuk memilih kuesioner sesuai filter desa/kecamatan (tidak peka huruf besar/kecil)
+def filter_submissions(submissions, desa=None, kecamatan=None):
+    def match(value, wanted):
+        return wanted is None or str(value).strip().lower() == wanted.strip().lower()
+    return [(form_data, usaha_data) for form_data, usaha_data in submissions
+            if match(form_data["desa"], desa) and match(form_data["kecamatan"], kecamatan)]
+
+
+# Nama file PDF di dalam ZIP: <desa>/RT<rt>_RW<rw>/<pendata>_<timestamp>.pdf
+_UNSAFE = re.compile(r"[^\w.-]+")
+
+def pdf_name(form_data):
+    def clean(value):
+        return _UNSAFE.sub("_", str(value)).strip("_") or "-"
+    return "/".join([
+        clean(form_data["desa"]),
+        f"RT{clean(form_data['rt'])}_RW{clean(form_data['rw'])}",
+        f"{clean(form_data['nama_pendata'])}_{clean(form_data.get('timestamp', form_data['tanggal']))}.pdf",
+    ])
+
+
+# Dijalankan di proses pekerja; mengembalikan (nama file, isi PDF).
+# Tidak memakai pdf_cache: setiap kuesioner dirender sekali dan cache per proses
+# pekerja hanya menambah memori lalu dibuang saat pool ditutup.
+def render_submission(submission):
+    form_data, usaha_data = submission
+    return pdf_name(form_data), create_pdf(form_data, usaha_data).getvalue()
+
+
+# Fungsi untuk merender semua kuesioner ke file ZIP; mengembalikan jumlah PDF
+def write_pdf_zip(submissions, output_path, workers=None, chunksize=4):
+    workers = workers or os.cpu_count() or 1
+    count = 0
+    names = set()
+    with zipfile.ZipFile(output_path, "w", compression=zipfile.ZIP_STORED) as archive:
+        if workers == 1:
+            # Satu CPU: render langsung tanpa biaya kirim data ke proses lain
+            results = map(render_submission, submissions)
+            executor = None
+        else:
+            executor = ProcessPoolExecutor(max_workers=workers)
+            results = executor.map(render_submission, submissions, chunksize=chunksize)
+        try:
+            for name, pdf_bytes in results:
+                # Nama kembar (pendata dan timestamp sama) diberi akhiran agar tidak tertimpa
+                base, suffix = name, 1
+                while name in names:
+                    suffix += 1
+                    name = f"{base[:-4]}_{suffix}.pdf"
+                names.add(name)
+                # PDF sudah terkompresi, jadi disimpan apa adanya di ZIP
+                archive.writestr(name, pdf_bytes)
+                count += 1
+        finally:
+            if executor is not None:
+                executor.shutdown()
+    return count
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Buat PDF untuk semua kuesioner di satu desa/kecamatan.")
+    parser.add_argument("--csv", help="snapshot CSV sheet Data Industri; tanpa opsi ini data dibaca dari Google Sheets")
+    parser.add_argument("--mirror", nargs="?", const=MIRROR_PATH, metavar="PATH",
+                        help="baca dari mirror SQLite lokal setelah menarik delta dari Google Sheets")
+    parser.add_argument("--desa", help="hanya kuesioner dari desa/kelurahan ini")
+    parser.add_argument("--kecamatan", help="hanya kuesioner dari kecamatan ini")
+    parser.add_argument("--output", default="pdf_kuesioner.zip", help="file ZIP tujuan")
+    parser.add_argument("--workers", type=int, default=None, help="jumlah proses (default: jumlah CPU)")
+    args = parser.parse_args(argv)
+
+    if args.csv:
+        rows = read_csv_rows(args.csv)
+    elif args.mirror:
+        rows = read_mirror_rows(args.mirror)
+    else:
+        rows = read_sheet_rows()
+    submissions = filter_submissions(group_submissions(rows), desa=args.desa, kecamatan=args.kecamatan)
+    if not submissions:
+        print("Tidak ada kuesioner yang cocok dengan filter.")
+        return 1
+
+    start = time.perf_counter()
+    count = write_pdf_zip(submissions, args.output, workers=args.workers)
+    elapsed = time.perf_counter() - start
+    print(f"{count} PDF ditulis ke {args.output} dalam {elapsed:.1f} s ({count / elapsed:.1f} PDF/detik, "
+          f"{os.path.getsize(args.output) / 1e6:.1f} MB)")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,220 @@
+"""
+Pemeriksaan konsistensi seluruh data "Data Industri".
+
+- Jumlah industri 3.1-3.7 di BLOK III dibandingkan dengan jumlah usaha
+  yang diberi flag yang sama di BLOK IV, per kuesioner.
+- Usaha yang sama (nama usaha + nama pemilik, dalam satu desa) yang
+  tercatat lebih dari sekali, termasuk di RT/RW yang berbeda.
+
+Contoh:
+    python consistency.py --output laporan_konsistensi
+    python consistency.py --csv snapshot.csv --output laporan_konsistensi
+"""
+import argparse
+import os
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+from gsheet import KODE_INDUSTRI
+from rekap import DECLARED_COLUMNS, FLAG_COLUMNS, KUESIONER_COLUMNS, build_frame
+
+# Satu kuesioner = satu ID Submisi; baris lama tanpa ID = kombinasi wilayah, pendata dan timestamp
+SUBMISSION_KEYS = ["Kecamatan", "Desa/Kelurahan", "RT/RW"] + KUESIONER_COLUMNS
+
+# Kolom yang ditampilkan untuk setiap entri usaha kembar
+DUPLICATE_COLUMNS = ["Kecamatan", "Desa/Kelurahan", "RT/RW", "Nama Pendata", "Timestamp", "Nama Usaha", "Nama Pemilik"]
+
+
+# Fungsi untuk menormalkan nama (huruf kecil, spasi berlebih dibuang) sebelum dibandingkan
+def normalize_names(series):
+    return series.astype(str).str.casefold().str.replace(r"\s+", " ", regex=True).str.strip()
+
+
+# Fungsi untuk mencari kuesioner yang jumlah BLOK III-nya tidak sama dengan flag BLOK IV
+def count_mismatches(df):
+    grouped = df.groupby(SUBMISSION_KEYS, observed=True, sort=False)
+    flagged = grouped[FLAG_COLUMNS].sum()
+    declared = grouped[DECLARED_COLUMNS].first()
+    return mismatch_report(flagged.index, grouped.size().to_numpy(), declared.to_numpy(), flagged.to_numpy())
+
+
+# Fungsi untuk menyusun laporan kuesioner tidak konsisten dari jumlah per kuesioner
+# (index = kunci SUBMISSION_KEYS, declared/flagged = array jumlah BLOK III/BLOK IV per kode)
+def mismatch_report(index, sizes, declared, flagged):
+    mismatch = (flagged - declared) != 0
+    rows = mismatch.any(axis=1)
+
+    report = pd.DataFrame(index=index[rows])
+    report["Jumlah Usaha"] = sizes[rows]
+    for i, kode in enumerate(KODE_INDUSTRI):
+        report[f"{kode} BLOK III"] = declared[rows, i]
+        report[f"{kode} BLOK IV"] = flagged[rows, i]
+    # Daftar kode yang tidak cocok, mis. "3.1, 3.4"
+    labels = np.where(mismatch[rows], np.array(KODE_INDUSTRI), "")
+    report["Kode Tidak Cocok"] = [", ".join(kode for kode in row if kode) for row in labels]
+    return report.reset_index()
+
+
+# Fungsi untuk mencari usaha yang tercatat lebih dari sekali dalam satu desa
+def duplicate_businesses(df):
+    keyed = df[DUPLICATE_COLUMNS].assign(
+        _usaha=normalize_names(df["Nama Usaha"]),
+        _pemilik=normalize_names(df["Nama Pemilik"]),
+    )
+    keys = ["Desa/Kelurahan", "_usaha", "_pemilik"]
+    duplicates = keyed[keyed.duplicated(keys, keep=False)]
+    if duplicates.empty:
+        return empty_duplicate_report()
+
+    grouped = duplicates.groupby(keys, observed=True, sort=False)
+    report = duplicates[DUPLICATE_COLUMNS].assign(**{
+        "Grup": grouped.ngroup() + 1,
+        "Jumlah Entri": grouped["RT/RW"].transform("size"),
+        "Jumlah RT/RW": grouped["RT/RW"].transform("nunique"),
+    })
+    # Kembar lintas RT/RW ditaruh paling atas
+    return report.sort_values(["Jumlah RT/RW", "Grup"], ascending=[False, True]).reset_index(drop=True)
+
+
+def empty_duplicate_report():
+    return pd.DataFrame(columns=DUPLICATE_COLUMNS + ["Grup", "Jumlah Entri", "Jumlah RT/RW"])
+
+
+# Fungsi untuk menjalankan semua pemeriksaan; mengembalikan dict nama laporan -> DataFrame
+def check_all(df):
+    return {
+        "kuesioner_tidak_konsisten": count_mismatches(df),
+        "usaha_kembar": duplicate_businesses(df),
+    }
+
+
+class ConsistencyIndex:
+    """
+    Hasil check_all() yang diperbarui dari baris baru saja.
+
+    Menyimpan jumlah flag BLOK IV dan jumlah BLOK III per kuesioner serta
+    entri usaha per (desa, nama usaha, nama pemilik). update(df) hanya
+    menyentuh kuesioner dan kelompok usaha yang muncul di baris baru;
+    laporan disusun dari temuan yang tercatat dengan urutan kemunculan,
+    sama seperti check_all() atas seluruh data.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self._submissions = {}  # kunci kuesioner -> posisi
+            self._keys, self._sizes, self._declared, self._flagged = [], [], [], []
+            self._mismatched = set()  # posisi kuesioner yang tidak konsisten
+            self._businesses = {}  # (desa, usaha, pemilik) -> [urutan kemunculan, daftar entri]
+            self._duplicated = {}  # kunci kelompok usaha kembar -> urutan kemunculan
+
+    def update(self, df):
+        with self._lock:
+            grouped = df.groupby(SUBMISSION_KEYS, observed=True, sort=False)
+            flagged = grouped[FLAG_COLUMNS].sum()
+            keys, flagged = flagged.index.tolist(), flagged.to_numpy()
+            declared = grouped[DECLARED_COLUMNS].first().to_numpy()
+            sizes = grouped.size().to_numpy()
+            for i, key in enumerate(keys):
+                position = self._submissions.get(key)
+                if position is None:
+                    position = self._submissions[key] = len(self._keys)
+                    self._keys.append(key)
+                    self._sizes.append(0)
+                    self._declared.append(declared[i])
+                    self._flagged.append(np.zeros(len(FLAG_COLUMNS), dtype="int64"))
+                self._sizes[position] += sizes[i]
+                self._flagged[position] += flagged[i]
+                if (self._flagged[position] != self._declared[position]).any():
+                    self._mismatched.add(position)
+                else:
+                    self._mismatched.discard(position)
+
+            entries = zip(
+                df["Desa/Kelurahan"].tolist(), normalize_names(df["Nama Usaha"]).tolist(),
+                normalize_names(df["Nama Pemilik"]).tolist(), zip(*(df[column].tolist() for column in DUPLICATE_COLUMNS)),
+            )
+            for desa, usaha, pemilik, entry in entries:
+                key = (desa, usaha, pemilik)
+                group = self._businesses.get(key)
+                if group is None:
+                    self._businesses[key] = [len(self._businesses), [entry]]
+                    continue
+                group[1].append(entry)
+                self._duplicated[key] = group[0]
+
+    def count_mismatches(self):
+        with self._lock:
+            positions = sorted(self._mismatched)
+            if not positions:
+                return mismatch_report(pd.MultiIndex.from_tuples([], names=SUBMISSION_KEYS), np.zeros(0, dtype="int64"),
+                                       np.zeros((0, len(KODE_INDUSTRI))), np.zeros((0, len(KODE_INDUSTRI))))
+            index = pd.MultiIndex.from_tuples([self._keys[i] for i in positions], names=SUBMISSION_KEYS)
+            sizes = np.array([self._sizes[i] for i in positions])
+            declared = np.array([self._declared[i] for i in positions])
+            flagged = np.array([self._flagged[i] for i in positions])
+        return mismatch_report(index, sizes, declared, flagged)
+
+    def duplicate_businesses(self):
+        with self._lock:
+            groups = [self._businesses[key][1] for key in sorted(self._duplicated, key=self._duplicated.get)]
+            if not groups:
+                return empty_duplicate_report()
+            records = [
+                (*entry, number, len(entries), len({entry[2] for entry in entries}))
+                for number, entries in enumerate(groups, start=1)
+                for entry in entries
+            ]
+        report = pd.DataFrame(records, columns=DUPLICATE_COLUMNS + ["Grup", "Jumlah Entri", "Jumlah RT/RW"])
+        return report.sort_values(["Jumlah RT/RW", "Grup"], ascending=[False, True]).reset_index(drop=True)
+
+    def check_all(self):
+        return {
+            "kuesioner_tidak_konsisten": self.count_mismatches(),
+            "usaha_kembar": self.duplicate_businesses(),
+        }
+
+
+# Fungsi untuk menulis laporan sebagai CSV (satu file per jenis pemeriksaan)
+def write_reports(reports, output_dir):
+    os.makedirs(output_dir, exist_ok=True)
+    paths = []
+    for name, report in reports.items():
+        path = os.path.join(output_dir, f"{name}.csv")
+        report.to_csv(path, index=False)
+        paths.append(path)
+    return paths
+
+
+def main(argv=None):
+    from bulk_pdf import read_csv_rows
+    from mirror import SheetMirror
+
+    parser = argparse.ArgumentParser(description="Periksa konsistensi BLOK III vs BLOK IV dan usaha kembar.")
+    parser.add_argument("--csv", help="snapshot CSV sheet Data Industri; tanpa opsi ini data dibaca dari mirror lokal")
+    parser.add_argument("--output", default="laporan_konsistensi", help="folder tujuan file CSV laporan")
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    if args.csv:
+        rows = [row for row in read_csv_rows(args.csv)[1:] if row]
+    else:
+        mirror = SheetMirror()
+        rows = mirror.rows()
+        mirror.close()
+    reports = check_all(build_frame(rows))
+    paths = write_reports(reports, args.output)
+    print(f"{len(rows)} baris diperiksa dalam {time.perf_counter() - start:.1f} s")
+    for (name, report), path in zip(reports.items(), paths):
+        print(f"  {name}: {len(report)} baris -> {path}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
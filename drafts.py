@@ -0,0 +1,142 @@
+import json
+import os
+import re
+import secrets
+import sqlite3
+import threading
+import time
+from dataclasses import astuple
+
+from usaha import Usaha
+
+# Lokasi draf kuesioner yang belum dikirim dan lama draf disimpan (detik)
+DRAFT_PATH = os.path.join("data", "draf_kuesioner.sqlite3")
+DRAFT_MAX_AGE = 14 * 24 * 3600
+
+# Bagian session_state yang disimpan di draf
+DRAFT_FIELDS = ["page", "form_data", "usaha_data", "current_usaha", "jumlah_usaha", "submission_id"]
+
+# Kode draf: 8 karakter acak tanpa huruf/angka yang mirip (0/O, 1/I), ditampilkan sebagai "ABCD-EFGH"
+CODE_ALPHABET = "ABCDEFGHJKLMNPQRSTUVWXYZ23456789"
+CODE_LENGTH = 8
+
+
+# Fungsi untuk membuat kode draf baru
+def new_code():
+    return "".join(secrets.choice(CODE_ALPHABET) for _ in range(CODE_LENGTH))
+
+
+# Fungsi untuk menyeragamkan kode yang diketik pengguna ("abcd efgh" -> "ABCDEFGH")
+def normalize_code(code):
+    return re.sub(r"[^0-9A-Z]", "", str(code).upper())
+
+
+# Fungsi untuk menampilkan kode draf, misal "ABCDEFGH" -> "ABCD-EFGH"
+def format_code(code):
+    return f"{code[:4]}-{code[4:]}"
+
+
+class DraftStore:
+    """
+    Draf kuesioner per sesi pendata (SQLite) agar isian tidak hilang saat koneksi putus.
+
+    Draf ditulis ulang setelah setiap langkah (BLOK I-III, setiap usaha, edit)
+    dengan kunci ID draf sesi. Setiap draf mendapat kode acak yang hanya
+    ditunjukkan ke sesi pemiliknya, jadi draf bisa dilanjutkan lewat tautan
+    ?draf=<id> atau kode draf di perangkat lain, tetapi tidak bisa dicari dari
+    nama pendata. Draf dihapus setelah kuesioner masuk jurnal pengiriman; draf
+    yang tidak disentuh lebih dari max_age dibuang saat store dibuka.
+    """
+
+    def __init__(self, path=DRAFT_PATH, max_age=DRAFT_MAX_AGE):
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._saved = {}  # id -> isi terakhir yang ditulis, agar langkah tanpa perubahan tidak menulis ulang
+        with self._conn:
+            # Skema lama mencatat draf atas nama pendata: pindahkan isinya dan beri kode baru
+            columns = {row[1] for row in self._conn.execute("PRAGMA table_info(draf)")}
+            if "nama_pendata" in columns:
+                self._conn.execute("DROP INDEX IF EXISTS idx_draf_pendata")
+                self._conn.execute("ALTER TABLE draf RENAME TO draf_lama")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS draf (id TEXT PRIMARY KEY, kode TEXT NOT NULL UNIQUE, "
+                "ringkasan TEXT NOT NULL, isi TEXT NOT NULL, updated REAL NOT NULL)"
+            )
+            if "nama_pendata" in columns:
+                self._conn.executemany(
+                    "INSERT INTO draf (id, kode, ringkasan, isi, updated) VALUES (?, ?, ?, ?, ?)",
+                    [(draft_id, new_code(), ringkasan, isi, updated) for draft_id, ringkasan, isi, updated
+                     in self._conn.execute("SELECT id, ringkasan, isi, updated FROM draf_lama").fetchall()],
+                )
+                self._conn.execute("DROP TABLE draf_lama")
+            self._conn.execute("DELETE FROM draf WHERE updated < ?", (time.time() - max_age,))
+
+    # Simpan state kuesioner (dict dengan DRAFT_FIELDS); mengembalikan False jika isinya tidak berubah
+    def save(self, draft_id, state):
+        state = dict(state, usaha_data=[astuple(usaha) for usaha in state["usaha_data"]])
+        isi = json.dumps(state, ensure_ascii=False, default=str)
+        if self._saved.get(draft_id) == isi:
+            return False
+        form_data = state["form_data"]
+        ringkasan = json.dumps({
+            "desa": form_data.get("desa", ""),
+            "rt": form_data.get("rt", ""),
+            "rw": form_data.get("rw", ""),
+            "terisi": len(state["usaha_data"]),
+            "jumlah_usaha": state["jumlah_usaha"],
+        }, ensure_ascii=False)
+        with self._lock, self._conn:
+            # Kode hanya dipakai saat draf pertama kali ditulis; simpan berikutnya mempertahankan kode lama
+            self._conn.execute(
+                "INSERT INTO draf (id, kode, ringkasan, isi, updated) VALUES (?, ?, ?, ?, ?) "
+                "ON CONFLICT (id) DO UPDATE SET ringkasan = excluded.ringkasan, isi = excluded.isi, "
+                "updated = excluded.updated",
+                (draft_id, new_code(), ringkasan, isi, time.time()),
+            )
+            self._saved[draft_id] = isi
+        return True
+
+    # Kode draf (tanpa tanda hubung) untuk ditunjukkan ke pemilik draf, atau None jika belum tersimpan
+    def code(self, draft_id):
+        with self._lock:
+            row = self._conn.execute("SELECT kode FROM draf WHERE id = ?", (draft_id,)).fetchone()
+        return row[0] if row else None
+
+    # State kuesioner dari draf (usaha_data sebagai list Usaha), atau None jika tidak ada
+    def load(self, draft_id):
+        with self._lock:
+            row = self._conn.execute("SELECT isi FROM draf WHERE id = ?", (draft_id,)).fetchone()
+        if row is None:
+            return None
+        state = json.loads(row[0])
+        state["usaha_data"] = [Usaha(*fields) for fields in state["usaha_data"]]
+        return state
+
+    # Ringkasan draf untuk satu kode (huruf besar/kecil dan tanda hubung diabaikan), atau None
+    def find(self, code):
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT id, ringkasan, updated FROM draf WHERE kode = ?", (normalize_code(code),)
+            ).fetchone()
+        if row is None:
+            return None
+        draft_id, ringkasan, updated = row
+        return dict(json.loads(ringkasan), id=draft_id, updated=updated)
+
+    def delete(self, draft_id):
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM draf WHERE id = ?", (draft_id,))
+            self._saved.pop(draft_id, None)
+
+    def count(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM draf").fetchone()[0]
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
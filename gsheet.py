@@ -0,0 +1,439 @@
+import os
+import re
+import threading
+import time
+import traceback
+
+import gspread
+from google.oauth2.service_account import Credentials
+
+from ratelimit import PRIORITY_CONNECT, PRIORITY_READ, PRIORITY_WRITE, sheets_limiter
+from spans import spans
+from usaha import KODE_INDUSTRI, Usaha
+from validation import as_int
+
+# Spreadsheet tujuan dan lokasi file kredensial yang dicoba berurutan
+SPREADSHEET_ID = '1bb8_rTHLUKANZyi30FGRZO5vl44siHheV2AaFomH-D4'
+SCOPE = ["https://spreadsheets.google.com/feeds", "https://www.googleapis.com/auth/drive"]
+CREDENTIAL_PATHS = [
+    r"D:\Perkuliahan\PRIGEL\Form Pendataan Desa Cantik\brave-reason-460003-d0-af9a852a98c9.json",
+    "credentials.json",  # Untuk path relatif di direktori yang sama
+    os.path.join(os.path.expanduser("~"), "credentials.json")  # Di home directory
+]
+
+# Nama worksheet dan batas baris yang dipakai aplikasi
+SHEET_TITLE = "Data Industri"
+SHEET_MAX_ROWS = 1000
+
+# Header 27 kolom pada worksheet "Data Industri" (kolom terakhir: ID unik per submisi)
+HEADERS = [
+    "Provinsi", "Kabupaten/Kota", "Kecamatan", "Desa/Kelurahan", "RT/RW",
+    "Nama Pendata", "Nama Pemeriksa", "Tanggal", "Timestamp",
+    "Jumlah Industri Makanan", "Jumlah Industri Alat Rumah Tangga",
+    "Jumlah Industri Material Bahan Bangunan", "Jumlah Industri Alat Pertanian",
+    "Jumlah Industri Kerajinan selain logam", "Jumlah Industri Logam",
+    "Jumlah Industri Lainnya", "Nama Usaha", "Nama Pemilik", "Jumlah Tenaga Kerja",
+    "Ind.Makanan(3.1)", "Ind.Alat RT(3.2)", "Ind.Material(3.3)",
+    "Ind.Alat Pertanian(3.4)", "Ind.Kerajinan(3.5)", "Ind.Logam(3.6)",
+    "Ind.Lainnya(3.7)", "ID Submisi"
+]
+
+# Tujuh kolom flag Ind.* (3.1-3.7)
+FLAG_COLUMNS = HEADERS[HEADERS.index("Ind.Makanan(3.1)"):HEADERS.index("Ind.Lainnya(3.7)") + 1]
+
+
+# Fungsi untuk menyusun baris sheet dari satu kuesioner (satu baris per usaha)
+def build_rows(form_data, usaha_data, timestamp, submission_id=""):
+    all_rows = []
+    for usaha in usaha_data:
+        row_data = [
+            form_data["provinsi"],
+            form_data["kabupaten"],
+            form_data["kecamatan"],
+            form_data["desa"],
+            f"RT {form_data['rt']} RW {form_data['rw']}",
+            form_data["nama_pendata"],
+            form_data["nama_pemeriksa"],
+            form_data["tanggal"],
+            timestamp,
+            form_data["jml_industri_makanan"],
+            form_data["jml_industri_alat_rt"],
+            form_data["jml_industri_material"],
+            form_data["jml_industri_alat_pertanian"],
+            form_data["jml_industri_kerajinan"],
+            form_data["jml_industri_logam"],
+            form_data["jml_industri_lainnya"],
+            usaha.nama_usaha,
+            usaha.nama_pemilik,
+            usaha.jumlah_tenaga_kerja,
+            *usaha.flags,  # kolom industri sebagai biner (1 atau 0)
+            submission_id,
+        ]
+        all_rows.append(row_data)
+    return all_rows
+
+
+# Ambil nomor RT dan RW dari kolom "RT/RW", misal "RT 01 RW 02" -> ("01", "02")
+_RT_RW = re.compile(r"RT\s*(\S*)\s*RW\s*(\S*)")
+
+def parse_rt_rw(value):
+    match = _RT_RW.search(str(value))
+    return (match.group(1), match.group(2)) if match else ("", "")
+
+
+# Fungsi untuk menyusun kembali kuesioner dari baris sheet (kebalikan build_rows)
+# Baris dikelompokkan per ID Submisi, atau per Desa, RT/RW, Nama Pendata dan Timestamp
+# untuk baris lama tanpa ID; urutan kemunculan dipertahankan
+def group_submissions(rows):
+    col = {name: i for i, name in enumerate(HEADERS)}
+    groups = {}
+    for row in rows:
+        if not row or row[0] == HEADERS[0]:
+            continue  # baris kosong atau header shard
+        row = list(row) + [""] * (len(HEADERS) - len(row))
+        key = row[col["ID Submisi"]] or (row[col["Desa/Kelurahan"]], row[col["RT/RW"]], row[col["Nama Pendata"]], row[col["Timestamp"]])
+        if key not in groups:
+            rt, rw = parse_rt_rw(row[col["RT/RW"]])
+            groups[key] = ({
+                "provinsi": row[col["Provinsi"]],
+                "kabupaten": row[col["Kabupaten/Kota"]],
+                "kecamatan": row[col["Kecamatan"]],
+                "desa": row[col["Desa/Kelurahan"]],
+                "rt": rt,
+                "rw": rw,
+                "nama_pendata": row[col["Nama Pendata"]],
+                "nama_pemeriksa": row[col["Nama Pemeriksa"]],
+                "tanggal": row[col["Tanggal"]],
+                "timestamp": row[col["Timestamp"]],
+                "submission_id": row[col["ID Submisi"]],
+                "jml_industri_makanan": row[col["Jumlah Industri Makanan"]],
+                "jml_industri_alat_rt": row[col["Jumlah Industri Alat Rumah Tangga"]],
+                "jml_industri_material": row[col["Jumlah Industri Material Bahan Bangunan"]],
+                "jml_industri_alat_pertanian": row[col["Jumlah Industri Alat Pertanian"]],
+                "jml_industri_kerajinan": row[col["Jumlah Industri Kerajinan selain logam"]],
+                "jml_industri_logam": row[col["Jumlah Industri Logam"]],
+                "jml_industri_lainnya": row[col["Jumlah Industri Lainnya"]],
+            }, [])
+        groups[key][1].append(Usaha.from_flags(
+            row[col["Nama Usaha"]],
+            row[col["Nama Pemilik"]],
+            [row[col[name]] for name in FLAG_COLUMNS],
+            # Sel yang diedit manual ("2.0", "tiga") tidak boleh menggagalkan ekspor satu desa
+            as_int(row[col["Jumlah Tenaga Kerja"]]) or 0,
+        ))
+    return list(groups.values())
+
+
+# Fungsi untuk membaca semua baris data dari seluruh shard (tanpa baris header)
+def read_all_rows(worksheets):
+    rows = []
+    for worksheet in worksheets:
+        values = sheets_limiter.call(worksheet.get_all_values, priority=PRIORITY_READ)
+        rows.extend(values[1:])
+    return rows
+
+
+# Ambil nomor baris terakhir dari updatedRange, misal "'Data Industri'!A11:Z12" -> 12
+_RANGE_END = re.compile(r"[A-Z]+(\d+)$")
+
+def parse_last_row(updated_range):
+    if not updated_range:
+        return None
+    match = _RANGE_END.search(updated_range.split("!")[-1])
+    return int(match.group(1)) if match else None
+
+
+class RowCountIndex:
+    """
+    Indeks jumlah baris terisi per worksheet.
+
+    Diisi sekali (hanya kolom A), lalu diperbarui dari updatedRange hasil
+    append_rows. Revalidasi berkala memakai properti sheet (tanpa isi sel).
+    """
+
+    def __init__(self, revalidate_after=300):
+        self.revalidate_after = revalidate_after
+        self._lock = threading.Lock()
+        self._entries = {}  # sheet_id -> [jumlah_baris, grid_rows, waktu_cek]
+
+    # Hitung ulang dari kolom A; cukup dilakukan sekali per worksheet
+    def _seed(self, worksheet):
+        used_rows = len(sheets_limiter.call(worksheet.col_values, 1, priority=PRIORITY_READ))
+        self._entries[worksheet.id] = [used_rows, worksheet.row_count, time.monotonic()]
+        return used_rows
+
+    # Ambil gridProperties worksheet dari metadata spreadsheet
+    def _grid_rows(self, worksheet):
+        metadata = sheets_limiter.call(
+            worksheet.spreadsheet.fetch_sheet_metadata,
+            params={"fields": "sheets.properties(sheetId,gridProperties.rowCount)"},
+            priority=PRIORITY_READ,
+        )
+        for sheet in metadata.get("sheets", []):
+            properties = sheet.get("properties", {})
+            if properties.get("sheetId") == worksheet.id:
+                return properties.get("gridProperties", {}).get("rowCount")
+        return None
+
+    def get(self, worksheet):
+        with self._lock:
+            entry = self._entries.get(worksheet.id)
+            if entry is None:
+                return self._seed(worksheet)
+
+            if time.monotonic() - entry[2] >= self.revalidate_after:
+                grid_rows = self._grid_rows(worksheet)
+                # Grid menyusut berarti ada baris yang dihapus manual: isi ulang indeks
+                if grid_rows is None or grid_rows < entry[1]:
+                    return self._seed(worksheet)
+                entry[1] = grid_rows
+                entry[2] = time.monotonic()
+            return entry[0]
+
+    # Jumlah baris yang sudah diketahui, tanpa memanggil API
+    def peek(self, worksheet):
+        with self._lock:
+            entry = self._entries.get(worksheet.id)
+            return entry[0] if entry else None
+
+    # Perbarui indeks dari respons append_rows / append_row
+    def record_append(self, worksheet, response, appended):
+        updates = (response or {}).get("updates", {})
+        last_row = parse_last_row(updates.get("updatedRange"))
+        with self._lock:
+            entry = self._entries.get(worksheet.id)
+            if entry is None:
+                if last_row is not None:
+                    self._entries[worksheet.id] = [last_row, max(last_row, worksheet.row_count), time.monotonic()]
+                return last_row
+            if last_row is None:
+                # Respons tidak lengkap: perkirakan dari jumlah baris yang dikirim
+                last_row = entry[0] + appended
+            entry[0] = last_row
+            entry[1] = max(entry[1], last_row)
+            return last_row
+
+    def invalidate(self, worksheet=None):
+        with self._lock:
+            if worksheet is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(worksheet.id, None)
+
+
+# Fungsi untuk menulis baris ke worksheet sambil memperbarui indeks jumlah baris.
+# Append tidak idempoten: hanya 429 yang dicoba ulang di sini; error lain diteruskan ke pemanggil.
+def append_to_sheet(worksheet, rows, row_index):
+    if len(rows) > 1:
+        response = sheets_limiter.call(worksheet.append_rows, rows, priority=PRIORITY_WRITE, idempotent=False)
+    else:
+        response = sheets_limiter.call(worksheet.append_row, rows[0], priority=PRIORITY_WRITE, idempotent=False)
+    return row_index.record_append(worksheet, response, len(rows))
+
+
+# Fungsi untuk menulis header di baris 1. Memakai update A1 (bukan append) sehingga aman
+# dicoba ulang: header tidak pernah tertulis dua kali.
+def write_header(worksheet):
+    sheets_limiter.call(worksheet.update, values=[HEADERS], range_name="A1", priority=PRIORITY_CONNECT)
+
+
+# Fungsi untuk melengkapi header shard tanpa menyentuh data: header lama (26 kolom, sebelum
+# "ID Submisi") ditambah kolom baru, dan shard yang dibuat tanpa header (penulisan header gagal
+# setelah add_worksheet) diberi header lengkap agar baris data tidak jatuh di baris 1.
+# Header yang sudah diubah manual dibiarkan; mengembalikan True jika header ditulis.
+def migrate_header(worksheet):
+    header = sheets_limiter.call(worksheet.row_values, 1, priority=PRIORITY_CONNECT)
+    if not header:
+        write_header(worksheet)
+        return True
+    if len(header) >= len(HEADERS) or header != HEADERS[:len(header)]:
+        return False
+    if worksheet.col_count < len(HEADERS):
+        sheets_limiter.call(worksheet.add_cols, len(HEADERS) - worksheet.col_count, priority=PRIORITY_CONNECT)
+    first_cell = gspread.utils.rowcol_to_a1(1, len(header) + 1)
+    sheets_limiter.call(worksheet.update, values=[HEADERS[len(header):]], range_name=first_cell,
+                        priority=PRIORITY_CONNECT)
+    return True
+
+
+# Judul shard ke-n: "Data Industri", "Data Industri 2", "Data Industri 3", ...
+def shard_title(number):
+    return SHEET_TITLE if number == 1 else f"{SHEET_TITLE} {number}"
+
+def shard_number(title):
+    if title == SHEET_TITLE:
+        return 1
+    suffix = title[len(SHEET_TITLE) + 1:] if title.startswith(SHEET_TITLE + " ") else ""
+    return int(suffix) if suffix.isdigit() else None
+
+
+class ShardDirectory:
+    """
+    Direktori shard worksheet "Data Industri", "Data Industri 2", dst.
+
+    Daftar shard di-cache sehingga routing tidak perlu memanggil worksheets()
+    setiap simpan. Jika shard aktif sudah mencapai max_rows, shard baru dibuat
+    dengan header yang sama dan menjadi tujuan penulisan berikutnya. Header
+    shard lama tanpa kolom "ID Submisi" dan shard yang belum berheader
+    dilengkapi sekali saat dimuat.
+    """
+
+    def __init__(self, row_index, max_rows=SHEET_MAX_ROWS):
+        self.row_index = row_index
+        self.max_rows = max_rows
+        self._lock = threading.Lock()
+        self._shards = {}  # id spreadsheet -> daftar worksheet urut nomor shard
+        self._checked = set()  # id worksheet yang header-nya sudah diperiksa
+
+    def _load(self, spreadsheet):
+        worksheets = sheets_limiter.call(spreadsheet.worksheets, priority=PRIORITY_CONNECT)
+        numbered = [(shard_number(ws.title), ws) for ws in worksheets]
+        shards = [ws for number, ws in sorted((n, ws) for n, ws in numbered if n is not None)]
+        for worksheet in shards:
+            if worksheet.id not in self._checked:
+                if migrate_header(worksheet):
+                    self.row_index.invalidate(worksheet)
+                self._checked.add(worksheet.id)
+        self._shards[spreadsheet.id] = shards
+        return shards
+
+    def _create(self, spreadsheet, number):
+        try:
+            worksheet = sheets_limiter.call(spreadsheet.add_worksheet, title=shard_title(number),
+                                            rows=self.max_rows, cols=30, priority=PRIORITY_WRITE)
+        except gspread.exceptions.APIError as e:
+            # Shard sudah dibuat proses lain: muat ulang direktori
+            if "already exists" not in str(e):
+                raise
+            return self._load(spreadsheet)
+        # Jika gagal di sini, shard tanpa header dilengkapi oleh _load (lewat "already exists")
+        write_header(worksheet)
+        self.row_index.invalidate(worksheet)
+        self._checked.add(worksheet.id)
+        shards = self._shards.setdefault(spreadsheet.id, [])
+        shards.append(worksheet)
+        return shards
+
+    # Semua shard yang diketahui (untuk pembacaan ulang seluruh data)
+    def shards(self, spreadsheet):
+        with self._lock:
+            shards = self._shards.get(spreadsheet.id)
+            return list(shards if shards is not None else self._load(spreadsheet))
+
+    # Tentukan shard tujuan untuk n_rows baris; mengembalikan (worksheet, sisa kapasitas)
+    def route(self, spreadsheet, n_rows):
+        with self._lock:
+            shards = self._shards.get(spreadsheet.id)
+            if not shards:
+                shards = self._load(spreadsheet) or self._create(spreadsheet, 1)
+            active = shards[-1]
+            used = self.row_index.get(active)
+            # Shard kosong (hanya header) selalu menerima, walau data melebihi kapasitas
+            if used > 1 and used + n_rows > self.max_rows:
+                shards = self._create(spreadsheet, shard_number(active.title) + 1)
+                active = shards[-1]
+                used = self.row_index.get(active)
+            return active, self.max_rows - used
+
+
+class SheetConnectionError(Exception):
+    """Kesalahan koneksi dengan pesan yang siap ditampilkan ke pengguna."""
+
+
+# Fungsi untuk membuka worksheet "Data Industri" (tanpa memanggil st.* agar aman di thread)
+def open_worksheet(credentials_info=None):
+    if credentials_info is not None:
+        credentials = Credentials.from_service_account_info(credentials_info, scopes=SCOPE)
+        source = "Berhasil menggunakan kredensial dari secrets."
+    else:
+        for cred_path in CREDENTIAL_PATHS:
+            if os.path.exists(cred_path):
+                credentials = Credentials.from_service_account_file(cred_path, scopes=SCOPE)
+                source = f"Menggunakan kredensial dari file: {cred_path}"
+                break
+        else:
+            raise SheetConnectionError("Tidak dapat menemukan file kredensial Google Cloud. Pastikan Anda telah menempatkan file credentials.json di direktori yang benar.")
+
+    client = gspread.authorize(credentials)
+
+    try:
+        spreadsheet = sheets_limiter.call(client.open_by_key, SPREADSHEET_ID, priority=PRIORITY_CONNECT)
+    except gspread.exceptions.SpreadsheetNotFound:
+        raise SheetConnectionError(f"Spreadsheet dengan ID {SPREADSHEET_ID} tidak ditemukan. Periksa ID dan pastikan kredensial memiliki akses.")
+    except gspread.exceptions.APIError as e:
+        if e.code == 429 or "quota" in str(e).lower():
+            raise SheetConnectionError("Kuota Google Sheets API terlampaui. Coba lagi nanti.")
+        raise SheetConnectionError(f"Error API Google Sheets: {e}")
+
+    # Coba dapatkan worksheet, jika tidak ada, buat baru dengan header
+    try:
+        worksheet = sheets_limiter.call(spreadsheet.worksheet, SHEET_TITLE, priority=PRIORITY_CONNECT)
+        if migrate_header(worksheet):
+            source += f" Header '{SHEET_TITLE}' dilengkapi."
+    except gspread.exceptions.WorksheetNotFound:
+        worksheet = sheets_limiter.call(spreadsheet.add_worksheet, title=SHEET_TITLE, rows=SHEET_MAX_ROWS, cols=30, priority=PRIORITY_CONNECT)
+        write_header(worksheet)
+        source += f" Worksheet '{SHEET_TITLE}' berhasil dibuat!"
+
+    return worksheet, source
+
+
+class SheetConnection:
+    """
+    Koneksi Google Sheets yang dibangun di thread latar belakang.
+
+    Form bisa langsung dirender; handle worksheet baru ditunggu lewat get()
+    ketika data benar-benar akan disimpan.
+    """
+
+    def __init__(self, opener):
+        self._opener = opener
+        self._lock = threading.Lock()
+        self._done = threading.Event()
+        self._thread = None
+        self.worksheet = None
+        self.source = None
+        self.error = None
+        self.error_detail = None
+        self.elapsed = None
+
+    def start(self):
+        with self._lock:
+            if self._thread is None:
+                self._done.clear()
+                self._thread = threading.Thread(target=self._run, name="gsheet-connect", daemon=True)
+                self._thread.start()
+        return self
+
+    def _run(self):
+        started = time.perf_counter()
+        try:
+            self.worksheet, self.source = self._opener()
+        except SheetConnectionError as e:
+            self.error = str(e)
+        except Exception as e:
+            self.error = f"Terjadi kesalahan dalam koneksi ke Google Sheets: {str(e)}"
+            self.error_detail = traceback.format_exc()
+        finally:
+            self.elapsed = time.perf_counter() - started
+            spans.record("connect", self.elapsed, error=self.error is not None)
+            self._done.set()
+
+    def ready(self):
+        return self._done.is_set()
+
+    # Tunggu koneksi selesai; mengembalikan worksheet atau None jika gagal/timeout
+    def get(self, timeout=None):
+        self.start()
+        self._done.wait(timeout)
+        return self.worksheet
+
+    # Ulangi koneksi setelah gagal (misalnya kuota habis saat startup)
+    def retry(self):
+        with self._lock:
+            if not self._done.is_set() or self.worksheet is not None:
+                return self
+            self._thread = None
+            self.error = None
+            self.error_detail = None
+        return self.start()
@@ -0,0 +1,342 @@
+import hashlib
+import logging
+import os
+import sqlite3
+import threading
+import time
+
+from gspread.utils import rowcol_to_a1
+
+from gsheet import HEADERS
+from ratelimit import PRIORITY_READ, sheets_limiter
+
+logger = logging.getLogger(__name__)
+
+# Lokasi salinan lokal "Data Industri" dan jeda penarikan delta (detik)
+MIRROR_PATH = os.path.join("data", "mirror_data_industri.sqlite3")
+SYNC_INTERVAL = 300
+
+TABLE = "data_industri"
+
+# Baris data per blok checksum dan jumlah blok lama yang dibaca ulang per siklus sinkron
+BLOCK_ROWS = 250
+VERIFY_BLOCKS = 8
+
+# Kolom terakhir header (mis. "AA" untuk 27 kolom) sebagai batas kanan rentang baca
+LAST_COLUMN = rowcol_to_a1(1, len(HEADERS))[:-1]
+
+# Kolom teks; kolom lain (jumlah industri, tenaga kerja, flag 3.x) disimpan sebagai angka
+TEXT_COLUMNS = HEADERS[:9] + ["Nama Usaha", "Nama Pemilik", "ID Submisi"]
+
+# Kolom yang sering dipakai untuk filter dan pengecekan duplikat
+INDEXED_COLUMNS = ["Desa/Kelurahan", "RT/RW", "Nama Pendata", "Timestamp", "ID Submisi"]
+
+
+def quote(name):
+    return '"' + name.replace('"', '""') + '"'
+
+
+# Rentang baris sheet untuk satu blok; blok 0 dimulai di baris 2 (baris 1 adalah header)
+def block_range(block):
+    first = 2 + block * BLOCK_ROWS
+    return first, first + BLOCK_ROWS - 1
+
+
+# Bentuk baku satu baris untuk dibandingkan: semua nilai sebagai teks, sel kosong di ujung = ""
+def row_key(row):
+    values = ["" if value is None else str(value) for value in row[:len(HEADERS)]]
+    return "\x1f".join(values + [""] * (len(HEADERS) - len(values)))
+
+
+# Checksum isi satu blok (list baris dari atas blok); baris yang tidak ada dianggap kosong
+def block_checksum(rows):
+    digest = hashlib.blake2b(digest_size=16)
+    blank = row_key([])
+    for i in range(BLOCK_ROWS):
+        digest.update((row_key(rows[i]) if i < len(rows) else blank).encode("utf-8") + b"\x1e")
+    return digest.hexdigest()
+
+
+class SheetMirror:
+    """
+    Salinan SQLite dari semua shard "Data Industri".
+
+    Diisi dari dua arah: baris yang baru ditulis SheetWriter (record_rows)
+    dan penarikan delta berkala yang hanya membaca baris di bawah indeks
+    terakhir yang sudah tersinkron per shard (pull_delta). Indeks sinkron
+    hanya maju selama baris-barisnya bersambung, jadi baris yang ditulis
+    instance lain di sela-sela tetap ikut ditarik.
+
+    Baris lama yang diedit langsung di Google Sheets dideteksi per blok
+    BLOCK_ROWS baris: verify_blocks membaca ulang beberapa blok per siklus
+    (bergiliran) dan membandingkan checksum-nya dengan checksum tersimpan;
+    hanya blok yang berbeda yang ditulis ulang. Setiap baris membawa nomor
+    versi, jadi cache turunan cukup mengambil changes(versi terakhir).
+    """
+
+    def __init__(self, path=MIRROR_PATH):
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        self.last_sync = None
+        self.last_error = None
+        self._verify_cursor = 0
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._create_schema()
+        # Versi perubahan terakhir; baris lama yang diganti/dihapus menaikkan _reset_version
+        self._version = self._conn.execute(f"SELECT COALESCE(MAX(_version), 0) FROM {TABLE}").fetchone()[0]
+        self._reset_version = 0
+
+    def _create_schema(self):
+        def column_type(name):
+            return 'TEXT' if name in TEXT_COLUMNS else 'INTEGER'
+        columns = ", ".join(f"{quote(name)} {column_type(name)}" for name in HEADERS)
+        with self._lock, self._conn:
+            # _sheet/_row = lokasi baris di Google Sheets (nama shard, nomor baris)
+            self._conn.execute(
+                f"CREATE TABLE IF NOT EXISTS {TABLE} ("
+                f"_sheet TEXT NOT NULL, _row INTEGER NOT NULL, {columns}, PRIMARY KEY (_sheet, _row))"
+            )
+            # Mirror dari versi sebelumnya: tambahkan kolom header yang baru (mis. "ID Submisi") dan versi baris
+            existing = {row[1] for row in self._conn.execute(f"PRAGMA table_info({TABLE})")}
+            for name in HEADERS:
+                if name not in existing:
+                    self._conn.execute(f"ALTER TABLE {TABLE} ADD COLUMN {quote(name)} {column_type(name)}")
+            if "_version" not in existing:
+                self._conn.execute(f"ALTER TABLE {TABLE} ADD COLUMN _version INTEGER NOT NULL DEFAULT 0")
+            self._conn.execute(f"CREATE INDEX IF NOT EXISTS idx_version ON {TABLE} (_version, _sheet, _row)")
+            self._conn.execute("CREATE TABLE IF NOT EXISTS sync_state (sheet TEXT PRIMARY KEY, synced_row INTEGER NOT NULL)")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS block_checksum "
+                "(sheet TEXT NOT NULL, block INTEGER NOT NULL, checksum TEXT NOT NULL, PRIMARY KEY (sheet, block))"
+            )
+            for name in INDEXED_COLUMNS:
+                index = "idx_" + "".join(c if c.isalnum() else "_" for c in name.lower())
+                self._conn.execute(f"CREATE INDEX IF NOT EXISTS {index} ON {TABLE} ({quote(name)})")
+
+    def _synced_row(self, sheet):
+        row = self._conn.execute("SELECT synced_row FROM sync_state WHERE sheet = ?", (sheet,)).fetchone()
+        return row[0] if row else 1  # baris 1 adalah header
+
+    # Nomor baris terakhir yang sudah bersambung tersalin untuk satu shard
+    def synced_row(self, sheet):
+        with self._lock:
+            return self._synced_row(sheet)
+
+    # Simpan baris sheet mulai dari first_row (dipanggil SheetWriter setelah append berhasil).
+    # Baris yang sudah ada dengan isi sama dilewati, jadi tidak muncul lagi di changes().
+    def record_rows(self, sheet, first_row, rows):
+        if first_row is None or not rows:
+            return
+        with self._lock, self._conn:
+            stored = {
+                row[0]: row_key(row[1:])
+                for row in self._conn.execute(
+                    f"SELECT _row, {self._columns()} FROM {TABLE} WHERE _sheet = ? AND _row BETWEEN ? AND ?",
+                    (sheet, first_row, first_row + len(rows) - 1),
+                )
+            }
+            records, replaced = [], False
+            for offset, row in enumerate(rows):
+                if not any(str(value).strip() for value in row):
+                    continue  # baris kosong di tengah sheet
+                values = (list(row) + [None] * len(HEADERS))[:len(HEADERS)]
+                old = stored.get(first_row + offset)
+                if old is not None:
+                    if old == row_key(values):
+                        continue
+                    replaced = True
+                records.append([sheet, first_row + offset] + values)
+            if records:
+                self._insert(records, replaced)
+            self._advance(sheet)
+
+    def _columns(self):
+        return ", ".join(quote(name) for name in HEADERS)
+
+    # Tulis baris dengan versi baru; replaced=True jika ada baris lama yang isinya berubah
+    def _insert(self, records, replaced=False):
+        # Proses lain (mis. api.py) bisa menulis ke file mirror yang sama: ambil kunci tulis dulu,
+        # lalu lanjutkan dari versi tertinggi di database supaya changes() tidak melewatkan baris
+        if not self._conn.in_transaction:
+            self._conn.execute("BEGIN IMMEDIATE")
+        latest = self._conn.execute(f"SELECT COALESCE(MAX(_version), 0) FROM {TABLE}").fetchone()[0]
+        self._version = max(self._version, latest) + 1
+        if replaced:
+            self._reset_version = self._version
+        placeholders = ", ".join("?" * (len(HEADERS) + 3))
+        self._conn.executemany(
+            f"INSERT OR REPLACE INTO {TABLE} (_sheet, _row, {self._columns()}, _version) VALUES ({placeholders})",
+            [record + [self._version] for record in records],
+        )
+
+    # Majukan indeks sinkron selama nomor baris bersambung
+    def _advance(self, sheet):
+        synced = self._synced_row(sheet)
+        for (row,) in self._conn.execute(
+            f"SELECT _row FROM {TABLE} WHERE _sheet = ? AND _row > ? ORDER BY _row", (sheet, synced)
+        ):
+            if row != synced + 1:
+                break
+            synced = row
+        self._conn.execute(
+            "INSERT INTO sync_state (sheet, synced_row) VALUES (?, ?) "
+            "ON CONFLICT(sheet) DO UPDATE SET synced_row = excluded.synced_row",
+            (sheet, synced),
+        )
+
+    # Tarik hanya baris di bawah indeks sinkron dari setiap shard; mengembalikan jumlah baris baru
+    def pull_delta(self, worksheets):
+        total = 0
+        for worksheet in worksheets:
+            start = self.synced_row(worksheet.title) + 1
+            values = sheets_limiter.call(worksheet.get, f"A{start}:{LAST_COLUMN}", priority=PRIORITY_READ, label="get")
+            if values:
+                self.record_rows(worksheet.title, start, values)
+                # Baris kosong di tengah tetap dihitung agar indeks sinkron bisa melewatinya
+                with self._lock, self._conn:
+                    self._conn.execute(
+                        "UPDATE sync_state SET synced_row = MAX(synced_row, ?) WHERE sheet = ?",
+                        (start + len(values) - 1, worksheet.title),
+                    )
+                    # Blok yang terbaca utuh langsung punya checksum dari isi sheet
+                    self._store_checksums(worksheet.title, start, values)
+                total += len(values)
+        return total
+
+    def _store_checksums(self, sheet, start, values):
+        block = max(0, (start - 2 + BLOCK_ROWS - 1) // BLOCK_ROWS)
+        while True:
+            first, last = block_range(block)
+            if first < start or last > start + len(values) - 1:
+                break
+            self._save_checksum(sheet, block, block_checksum(values[first - start:last - start + 1]))
+            block += 1
+
+    def _save_checksum(self, sheet, block, checksum):
+        self._conn.execute(
+            "INSERT OR REPLACE INTO block_checksum (sheet, block, checksum) VALUES (?, ?, ?)", (sheet, block, checksum)
+        )
+
+    # Checksum blok yang tersimpan, atau dihitung dari baris di mirror jika belum ada
+    def _stored_checksum(self, sheet, block):
+        row = self._conn.execute(
+            "SELECT checksum FROM block_checksum WHERE sheet = ? AND block = ?", (sheet, block)
+        ).fetchone()
+        if row is not None:
+            return row[0]
+        first, last = block_range(block)
+        rows = [[] for _ in range(BLOCK_ROWS)]
+        for row in self._conn.execute(
+            f"SELECT _row, {self._columns()} FROM {TABLE} WHERE _sheet = ? AND _row BETWEEN ? AND ?",
+            (sheet, first, last),
+        ):
+            rows[row[0] - first] = row[1:]
+        return block_checksum(rows)
+
+    # Baca ulang paling banyak `budget` blok lama yang sudah tersinkron penuh, bergiliran antar siklus.
+    # Blok yang checksum-nya berbeda (ada baris yang diedit atau dihapus di sheet) ditulis ulang dari sheet.
+    # Mengembalikan jumlah blok yang ditulis ulang.
+    def verify_blocks(self, worksheets, budget=VERIFY_BLOCKS):
+        with self._lock:
+            blocks = [
+                (worksheet, block)
+                for worksheet in worksheets
+                for block in range((self._synced_row(worksheet.title) - 1) // BLOCK_ROWS)
+            ]
+        repaired = 0
+        for _ in range(min(budget, len(blocks))):
+            worksheet, block = blocks[self._verify_cursor % len(blocks)]
+            self._verify_cursor += 1
+            first, last = block_range(block)
+            values = sheets_limiter.call(worksheet.get, f"A{first}:{LAST_COLUMN}{last}",
+                                         priority=PRIORITY_READ, label="get")
+            checksum = block_checksum(values)
+            with self._lock, self._conn:
+                if checksum != self._stored_checksum(worksheet.title, block):
+                    self._conn.execute(f"DELETE FROM {TABLE} WHERE _sheet = ? AND _row BETWEEN ? AND ?",
+                                       (worksheet.title, first, last))
+                    records = [
+                        [worksheet.title, first + offset] + (list(row) + [None] * len(HEADERS))[:len(HEADERS)]
+                        for offset, row in enumerate(values)
+                        if any(str(value).strip() for value in row)
+                    ]
+                    self._insert(records, replaced=True)
+                    repaired += 1
+                self._save_checksum(worksheet.title, block, checksum)
+        return repaired
+
+    # Satu siklus sinkron: baris baru dari setiap shard, lalu pemeriksaan blok lama
+    def sync(self, worksheets, verify_budget=VERIFY_BLOCKS):
+        pulled = self.pull_delta(worksheets)
+        repaired = self.verify_blocks(worksheets, verify_budget)
+        return pulled, repaired
+
+    # Perubahan sejak versi `since`: (versi terbaru, baris, reset), baris baru urut sesuai waktu masuk mirror.
+    # reset=True berarti baris berisi seluruh data karena ada baris lama yang berubah sejak `since`.
+    def changes(self, since=0):
+        with self._lock:
+            # Versi dibaca dari database: baris dari proses lain ikut terhitung tepat sekali
+            latest = self._conn.execute(f"SELECT COALESCE(MAX(_version), 0) FROM {TABLE}").fetchone()[0]
+            version = self._version = max(self._version, latest)
+            reset = since == 0 or since < self._reset_version
+            if reset:
+                rows = self._conn.execute(
+                    f"SELECT {self._columns()} FROM {TABLE} WHERE _version <= ? ORDER BY _sheet, _row", (version,)
+                ).fetchall()
+            else:
+                rows = self._conn.execute(
+                    f"SELECT {self._columns()} FROM {TABLE} WHERE _version > ? AND _version <= ? "
+                    f"ORDER BY _version, _sheet, _row", (since, version)
+                ).fetchall()
+        return version, rows, reset
+
+    # Jalankan sync berkala di thread latar belakang
+    def start_sync(self, worksheets_provider, interval=SYNC_INTERVAL):
+        def loop():
+            while not self._stop.is_set():
+                try:
+                    worksheets = worksheets_provider()
+                    if worksheets:
+                        pulled, repaired = self.sync(worksheets)
+                        if pulled:
+                            logger.info("Mirror: %d baris baru dari Google Sheets", pulled)
+                        if repaired:
+                            logger.info("Mirror: %d blok berubah di Google Sheets dan disalin ulang", repaired)
+                        self.last_sync = time.time()
+                        self.last_error = None
+                except Exception as e:
+                    self.last_error = str(e)
+                    logger.warning("Mirror: gagal menarik delta dari Google Sheets: %s", e)
+                self._stop.wait(interval)
+
+        self._thread = threading.Thread(target=loop, name="gsheet-mirror", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self, timeout=None):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    # Jalankan query baca di salinan lokal
+    def query(self, sql, params=()):
+        with self._lock:
+            return self._conn.execute(sql, params).fetchall()
+
+    # Semua baris dengan urutan kolom sama seperti HEADERS
+    def rows(self):
+        return self.query(f"SELECT {self._columns()} FROM {TABLE} ORDER BY _sheet, _row")
+
+    def count(self):
+        return self.query(f"SELECT COUNT(*) FROM {TABLE}")[0][0]
+
+    def close(self):
+        self.stop()
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,496 @@
+import hashlib
+import io
+import json
+import threading
+from bisect import bisect_right
+from collections import OrderedDict
+from dataclasses import astuple
+from functools import lru_cache
+from itertools import accumulate
+
+from reportlab.lib import colors
+from reportlab.lib.pagesizes import letter
+from reportlab.pdfbase.pdfmetrics import stringWidth
+from reportlab.pdfgen.canvas import Canvas
+from reportlab.platypus import Flowable, PageBreak, SimpleDocTemplate, Spacer, Table, TableStyle
+
+from spans import spans
+
+# Konstanta untuk mengelola tata letak PDF
+PAGE_MARGIN = 50  # Margin dari tepi halaman
+HEADER_HEIGHT = 100  # Ruang untuk header halaman
+BLOCK_SPACING = 30  # Spasi antar blok
+
+# Batas memori cache PDF per proses
+PDF_CACHE_MAX_BYTES = 64 * 1024 * 1024
+
+# Lebar kolom tabel BLOK IV
+COL_WIDTHS = [30, 100, 100, 30, 30, 30, 30, 30, 30, 30, 60]
+
+
+# Judul halaman; posisinya dihitung sekali per proses
+PAGE_WIDTH, PAGE_HEIGHT = letter
+JUDUL = "PENDATAAN INDUSTRI PENGOLAHAN DI KELURAHAN KEJAMBON"
+SUBJUDUL = "KELURAHAN CINTA STATISTIK 2025"
+JUDUL_X = (PAGE_WIDTH - stringWidth(JUDUL, "Times-Bold", 14)) / 2
+SUBJUDUL_X = (PAGE_WIDTH - stringWidth(SUBJUDUL, "Times-Bold", 14)) / 2
+
+
+# Fungsi untuk membuat header pada setiap halaman (dipanggil oleh template halaman)
+def draw_page_header(canvas, doc):
+    # Judul dan subjudul direkam sekali per dokumen sebagai form XObject,
+    # halaman berikutnya cukup merujuk form tersebut
+    if not canvas.hasForm("page_header"):
+        canvas.beginForm("page_header")
+        canvas.setFont("Times-Bold", 14)
+        canvas.drawString(JUDUL_X, PAGE_HEIGHT - 50, JUDUL)
+        canvas.drawString(SUBJUDUL_X, PAGE_HEIGHT - 80, SUBJUDUL)
+        canvas.endForm()
+    canvas.saveState()
+    canvas.doForm("page_header")
+
+    # Nomor halaman
+    if doc.page > 1:
+        canvas.setFont("Times-Roman", 10)
+        canvas.drawString(PAGE_WIDTH - 80, PAGE_HEIGHT - 30, f"Halaman {doc.page}")
+    canvas.restoreState()
+
+
+# Style tabel BLOK I, II dan III (statis, dibuat sekali per proses)
+BLOK_I_STYLE = TableStyle([
+    ('GRID', (0, 1), (-1, -1), 0.5, colors.black),
+    ('BOX', (0, 0), (-1, 0), 0.5, colors.black),
+    ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
+    ('ALIGN', (0, 0), (-1, 0), 'CENTER'),
+    ('ALIGN', (1, 1), (1, -1), 'LEFT'),
+    ('ALIGN', (0, 1), (0, -1), 'CENTER'),
+    ('ALIGN', (2, 1), (2, -1), 'CENTER'),
+    ('SPAN', (0, 0), (2, 0)),
+    ('BACKGROUND', (0, 0), (-1, 0), colors.lightgrey),
+    ('FONTNAME', (0, 0), (-1, -1), 'Times-Roman'),
+    ('FONTNAME', (0, 0), (-1, 0), 'Times-Bold'),
+    ('PADDING', (0, 0), (-1, -1), 6),
+])
+
+BLOK_II_STYLE = TableStyle([
+    ('GRID', (0, 1), (-1, -1), 0.5, colors.black),
+    ('BOX', (0, 0), (-1, 0), 0.5, colors.black),
+    ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
+    ('ALIGN', (0, 0), (-1, 1), 'CENTER'),
+    ('ALIGN', (0, 2), (0, -1), 'CENTER'),
+    ('SPAN', (0, 0), (4, 0)),
+    ('BACKGROUND', (0, 0), (-1, 0), colors.lightgrey),
+    ('BACKGROUND', (0, 1), (-1, 1), colors.lightgrey),
+    ('FONTNAME', (0, 0), (-1, -1), 'Times-Roman'),
+    ('FONTNAME', (0, 0), (-1, 0), 'Times-Bold'),
+    ('PADDING', (0, 0), (-1, -1), 6),
+])
+
+BLOK_III_STYLE = TableStyle([
+    ('GRID', (0, 1), (-1, -1), 0.5, colors.black),
+    ('BOX', (0, 0), (-1, 0), 0.5, colors.black),
+    ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
+    ('ALIGN', (0, 0), (-1, 1), 'CENTER'),
+    ('ALIGN', (0, 2), (0, -1), 'CENTER'),
+    ('SPAN', (0, 0), (2, 0)),
+    ('BACKGROUND', (0, 0), (-1, 0), colors.lightgrey),
+    ('BACKGROUND', (0, 1), (-1, 1), colors.lightgrey),
+    ('FONTNAME', (0, 0), (-1, -1), 'Times-Roman'),
+    ('FONTNAME', (0, 0), (-1, 0), 'Times-Bold'),
+    ('PADDING', (0, 0), (-1, -1), 6),
+])
+
+# Tiga baris header tabel BLOK IV
+BLOK_IV_HEADER = [
+    ["BLOK IV. KETERANGAN USAHA", "", "", "", "", "", "", "", "", "", ""],
+    ["No", "Nama Usaha", "Nama Pemilik", "Kode Jenis Industri Mikro Kecil dan Menengah", "", "", "", "", "", "", "Jumlah\nTenaga Kerja"],
+    ["", "", "", "3.1", "3.2", "3.3", "3.4", "3.5", "3.6", "3.7", ""]
+]
+
+BLOK_IV_HEADER_STYLE = [
+    ('GRID', (0, 1), (-1, 2), 0.5, colors.black),
+    ('BOX', (0, 0), (-1, 0), 0.5, colors.black),
+    ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
+    ('ALIGN', (0, 0), (-1, 2), 'CENTER'),
+    ('SPAN', (0, 0), (10, 0)),
+    ('SPAN', (0, 1), (0, 2)),
+    ('SPAN', (1, 1), (1, 2)),
+    ('SPAN', (2, 1), (2, 2)),
+    ('SPAN', (3, 1), (9, 1)),
+    ('SPAN', (10, 1), (10, 2)),
+    ('BACKGROUND', (0, 0), (-1, 2), colors.lightgrey),
+    ('FONTNAME', (0, 0), (-1, -1), 'Times-Roman'),
+    ('FONTNAME', (0, 0), (-1, 0), 'Times-Bold'),
+    ('PADDING', (0, 0), (-1, 2), 3),  # Kurangi padding agar tidak terlihat berspasi
+]
+
+# Style baris data BLOK IV (tabel per halaman tanpa header)
+BLOK_IV_BODY_STYLE = [
+    ('GRID', (0, 0), (-1, -1), 0.5, colors.black),
+    ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
+    ('FONTNAME', (0, 0), (-1, -1), 'Times-Roman'),
+    ('ALIGN', (0, 0), (0, -1), 'CENTER'),  # Kolom No (0) tengah
+    ('ALIGN', (3, 0), (9, -1), 'CENTER'),  # Kode industri tengah
+    ('ALIGN', (10, 0), (10, -1), 'CENTER'),  # Jumlah tenaga kerja tengah
+    ('PADDING', (0, 0), (-1, -1), 2),  # Kurangi padding lebih lagi
+]
+
+# Style baris jumlah (baris terakhir tabel)
+BLOK_IV_FOOTER_STYLE = [
+    ('SPAN', (0, -1), (2, -1)),  # Gabungkan 3 kolom pertama untuk "Jumlah"
+    ('ALIGN', (0, -1), (-1, -1), 'CENTER'),
+    ('BACKGROUND', (0, -1), (-1, -1), colors.lightgrey),
+    ('FONTNAME', (0, -1), (-1, -1), 'Times-Bold'),
+]
+
+# TableStyle baris data BLOK IV dibuat sekali per proses dan dipakai ulang oleh tabel setiap halaman
+BLOK_IV_BODY_TABLE_STYLE = TableStyle(BLOK_IV_BODY_STYLE)
+BLOK_IV_LAST_TABLE_STYLE = TableStyle(BLOK_IV_BODY_STYLE + BLOK_IV_FOOTER_STYLE)
+
+
+# Font sel data BLOK IV dan ruang teks di kolom nama (lebar kolom dikurangi padding kiri-kanan sel)
+CELL_FONT = "Times-Roman"
+CELL_FONT_SIZE = 10
+NAME_WIDTH = COL_WIDTHS[1] - 12
+
+# Batas baris teks per sel nama: satu baris data (20 x 12 pt) bersama header dan baris jumlah
+# selalu muat di satu halaman kosong, jadi BlokIVTable.split tidak pernah buntu (LayoutError)
+MAX_NAME_LINES = 20
+
+
+# Lebar satu kata disimpan di cache; nama usaha banyak memakai kata yang sama
+@lru_cache(maxsize=8192)
+def word_width(word, font_name=CELL_FONT, font_size=CELL_FONT_SIZE):
+    return stringWidth(word, font_name, font_size)
+
+
+# Fungsi untuk memecah kata yang lebih lebar dari kolom menjadi beberapa potongan
+def split_long_word(word, max_width, font_name=CELL_FONT, font_size=CELL_FONT_SIZE):
+    pieces, current, width = [], "", 0
+    for char in word:
+        char_width = word_width(char, font_name, font_size)
+        if current and width + char_width > max_width:
+            pieces.append(current)
+            current, width = "", 0
+        current += char
+        width += char_width
+    pieces.append(current)
+    return pieces
+
+
+# Fungsi untuk membungkus teks per kata dengan akumulasi lebar baris.
+# Jika lebih dari max_lines baris, teks dipotong dan baris terakhir diakhiri "...".
+def wrap_text(text, max_width=NAME_WIDTH, font_name=CELL_FONT, font_size=CELL_FONT_SIZE, max_lines=None):
+    space = word_width(" ", font_name, font_size)
+    lines, current, width = [], [], 0
+    for word in str(text).split():
+        w = word_width(word, font_name, font_size)
+        if w > max_width:
+            # Kata terlalu panjang: dipotong per karakter, bukan dibuang
+            pieces = split_long_word(word, max_width, font_name, font_size)
+            if current:
+                lines.append(" ".join(current))
+            lines.extend(pieces[:-1])
+            current, width = [pieces[-1]], word_width(pieces[-1], font_name, font_size)
+        elif current and width + space + w > max_width:
+            lines.append(" ".join(current))
+            current, width = [word], w
+        else:
+            width += space + w if current else w
+            current.append(word)
+    if current:
+        lines.append(" ".join(current))
+    if max_lines is not None and len(lines) > max_lines:
+        last = lines[max_lines - 1]
+        ellipsis = word_width("...", font_name, font_size)
+        while last and word_width(last, font_name, font_size) + ellipsis > max_width:
+            last = last[:-1]
+        lines = lines[:max_lines - 1] + [last.rstrip() + "..."]
+    return "\n".join(lines)
+
+
+# Tabel header BLOK IV dibangun dan diukur sekali per proses
+@lru_cache(maxsize=None)
+def blok_iv_header_table():
+    table = Table(BLOK_IV_HEADER, colWidths=COL_WIDTHS)
+    table.setStyle(TableStyle(BLOK_IV_HEADER_STYLE))
+    table.wrap(0, 0)
+    return table
+
+
+# Tinggi header dan baris jumlah BLOK IV, dihitung sekali per proses
+# (baris jumlah selalu satu baris teks, jadi tingginya tidak bergantung pada isinya)
+@lru_cache(maxsize=None)
+def blok_iv_frame_heights():
+    footer = Table([[""] * len(COL_WIDTHS)], colWidths=COL_WIDTHS)
+    footer.setStyle(BLOK_IV_LAST_TABLE_STYLE)
+    return blok_iv_header_table()._height, footer.wrap(0, 0)[1]
+
+
+# Tabel header yang sama dipakai bersama oleh semua sesi; drawOn menyimpan canvas di objeknya
+_header_lock = threading.Lock()
+
+
+# Fungsi untuk menggambar header BLOK IV; digambar sekali per dokumen sebagai form XObject
+def draw_blok_iv_header(canvas, y):
+    if not canvas.hasForm("blok_iv_header"):
+        canvas.beginForm("blok_iv_header")
+        with _header_lock:
+            blok_iv_header_table().drawOn(canvas, 0, 0)
+        canvas.endForm()
+    canvas.saveState()
+    canvas.translate(0, y)
+    canvas.doForm("blok_iv_header")
+    canvas.restoreState()
+
+
+# Fungsi untuk menyusun baris data BLOK IV; nama usaha/pemilik sudah di-wrap sebagai teks biasa
+def build_blok_iv_rows(usaha_data):
+    body = []
+    for i, usaha in enumerate(usaha_data):
+        body.append([str(i+1), wrap_text(usaha.nama_usaha, max_lines=MAX_NAME_LINES),
+                     wrap_text(usaha.nama_pemilik, max_lines=MAX_NAME_LINES),
+                     *usaha.marks, str(usaha.jumlah_tenaga_kerja)])
+    return body
+
+
+class BlokIVPage(Flowable):
+    """Potongan BLOK IV untuk satu halaman: header dari form XObject lalu baris datanya."""
+
+    def __init__(self, rows, heights, footer=None):
+        super().__init__()
+        self.rows = rows
+        self.heights = heights
+        self.footer = footer
+
+    def wrap(self, availWidth, availHeight):
+        header_height, footer_height = blok_iv_frame_heights()
+        self.width = sum(COL_WIDTHS)
+        self.body_height = sum(self.heights) + (footer_height if self.footer else 0)
+        self.height = header_height + self.body_height
+        return self.width, self.height
+
+    def draw(self):
+        if self.footer:
+            table = Table(self.rows + [self.footer], colWidths=COL_WIDTHS, rowHeights=list(self.heights) + [None])
+            table.setStyle(BLOK_IV_LAST_TABLE_STYLE)
+        else:
+            table = Table(self.rows, colWidths=COL_WIDTHS, rowHeights=list(self.heights))
+            table.setStyle(BLOK_IV_BODY_TABLE_STYLE)
+        table.wrapOn(self.canv, self.width, self.body_height)
+        table.drawOn(self.canv, 0, 0)
+        draw_blok_iv_header(self.canv, self.body_height)
+
+
+class BlokIVTable(Flowable):
+    """
+    Tabel BLOK IV yang dialirkan per halaman.
+
+    Tinggi setiap baris diukur sekali di awal dari teks yang sudah di-wrap.
+    Saat platypus meminta split, hanya baris yang muat di halaman itu yang
+    dijadikan BlokIVPage, sehingga biaya per halaman tidak bergantung pada
+    jumlah baris yang tersisa. Header tiga baris tidak ikut dibangun ulang per
+    halaman; semua halaman merujuk form XObject yang sama.
+    """
+
+    def __init__(self, body, footer, heights=None, start=0):
+        super().__init__()
+        self.body = body
+        self.footer = footer
+        self.start = start
+        if heights is None:
+            heights = self._measure(body)
+        self.heights = heights
+        # Tinggi kumulatif baris data, untuk mencari titik potong halaman dengan bisect
+        self.offsets = list(accumulate(heights[start:], initial=0))
+        self.header_height, self.footer_height = blok_iv_frame_heights()
+
+    # Ukur tinggi semua baris data sekali jalan (sel berisi teks biasa dan tanpa style, jadi murah)
+    @staticmethod
+    def _measure(body):
+        if not body:
+            return []
+        table = Table(body, colWidths=COL_WIDTHS)
+        table.wrap(sum(COL_WIDTHS), 1e9)
+        return list(table._rowHeights)
+
+    def wrap(self, availWidth, availHeight):
+        self.width = sum(COL_WIDTHS)
+        self.height = self.header_height + self.offsets[-1] + self.footer_height
+        return self.width, self.height
+
+    def split(self, availWidth, availHeight):
+        remaining = len(self.body) - self.start
+        fit = bisect_right(self.offsets, availHeight - self.header_height) - 1
+        # Baris jumlah harus ikut bersama minimal satu baris data
+        if fit >= remaining:
+            fit = remaining - 1
+        if fit <= 0:
+            return []
+        end = self.start + fit
+        page = BlokIVPage(self.body[self.start:end], self.heights[self.start:end])
+        return [page, BlokIVTable(self.body, self.footer, self.heights, end)]
+
+    def draw(self):
+        page = BlokIVPage(self.body[self.start:], self.heights[self.start:], self.footer)
+        page.wrapOn(self.canv, self.width, self.height)
+        page.drawOn(self.canv, 0, 0)
+
+
+# Canvas yang mencatat serialisasi file PDF (akhir doc.build) sebagai span "pdf.save"
+class SpanCanvas(Canvas):
+    def save(self):
+        with spans.span("pdf.save"):
+            super().save()
+
+
+# Fungsi untuk membuat PDF
+def create_pdf(form_data, usaha_data):
+    buffer = io.BytesIO()
+    doc = SimpleDocTemplate(
+        buffer,
+        pagesize=letter,
+        leftMargin=PAGE_MARGIN,
+        rightMargin=PAGE_MARGIN,
+        topMargin=HEADER_HEIGHT,
+        bottomMargin=PAGE_MARGIN,
+    )
+    story = []
+
+    # BLOK I
+    data = [
+        ["BLOK I. KETERANGAN TEMPAT", "", ""],
+        ["1.1", "Provinsi", form_data["provinsi"]],
+        ["1.2", "Kabupaten/Kota", form_data["kabupaten"]],
+        ["1.3", "Kecamatan", form_data["kecamatan"]],
+        ["1.4", "Desa/Kelurahan", form_data["desa"]],
+        ["1.5", "SLS (RT/RW)", f"RT {form_data['rt']} RW {form_data['rw']}"]
+    ]
+
+    table = Table(data, colWidths=[40, 150, 300], hAlign='LEFT')
+    table.setStyle(BLOK_I_STYLE)
+    story += [table, Spacer(1, BLOCK_SPACING)]
+
+    # BLOK II
+    data = [
+        ["BLOK II. KETERANGAN PENDATAAN", "", "", "", ""],
+        ["", "Uraian", "Nama", "Tanggal", "Tanda Tangan"],
+        ["2.1", "Pendata", form_data["nama_pendata"], form_data["tanggal"], ""],
+        ["2.2", "Pemeriksa", form_data["nama_pemeriksa"], form_data["tanggal"], ""]
+    ]
+
+    table = Table(data, colWidths=[40, 100, 150, 100, 100], hAlign='LEFT')
+    table.setStyle(BLOK_II_STYLE)
+    story += [table, Spacer(1, BLOCK_SPACING)]
+
+    # BLOK III
+    data = [
+        ["BLOK III. REKAPITULASI", "", ""],
+        ["", "Industri Mikro Kecil dan Menengah", "Jumlah (diisi oleh Pemeriksa)"],
+        ["3.1", "Industri Makanan", form_data["jml_industri_makanan"]],
+        ["3.2", "Industri Alat Rumah Tangga", form_data["jml_industri_alat_rt"]],
+        ["3.3", "Industri Material Bahan Bangunan", form_data["jml_industri_material"]],
+        ["3.4", "Industri Alat Pertanian", form_data["jml_industri_alat_pertanian"]],
+        ["3.5", "Industri Kerajinan selain logam", form_data["jml_industri_kerajinan"]],
+        ["3.6", "Industri Logam", form_data["jml_industri_logam"]],
+        ["3.7", "Industri Lainnya", form_data["jml_industri_lainnya"]],
+    ]
+
+    table = Table(data, colWidths=[40, 250, 200], hAlign='LEFT')
+    table.setStyle(BLOK_III_STYLE)
+    story.append(table)
+
+    # Halaman Baru untuk BLOK IV
+    story.append(PageBreak())
+
+    # Hitung total industri dan tenaga kerja
+    total_industri = [0] * 7
+    total_tenaga_kerja = 0
+    for usaha in usaha_data:
+        for j, flag in enumerate(usaha.flags):
+            total_industri[j] += flag
+        total_tenaga_kerja += int(usaha.jumlah_tenaga_kerja)
+
+    body = build_blok_iv_rows(usaha_data)
+    footer = ["Jumlah", "", ""] + [str(j) for j in total_industri] + [str(total_tenaga_kerja)]
+
+    story.append(BlokIVTable(body, footer))
+
+    # Tata letak satu kali jalan; BlokIVTable memecah baris ke halaman berikutnya.
+    # Span "pdf.layout" mencakup seluruh doc.build, termasuk "pdf.save".
+    with spans.span("pdf.layout", usaha=len(usaha_data)):
+        doc.build(story, onFirstPage=draw_page_header, onLaterPages=draw_page_header, canvasmaker=SpanCanvas)
+    buffer.seek(0)
+    return buffer
+
+
+# Fungsi untuk membuat kunci konten yang stabil dari isi kuesioner
+# (urutan key dict tidak berpengaruh; tanggal/angka diserialisasi sebagai teks)
+def pdf_content_key(form_data, usaha_data):
+    usaha_fields = [astuple(usaha) for usaha in usaha_data]
+    payload = json.dumps([form_data, usaha_fields], sort_keys=True, default=str, ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class PdfCache:
+    """
+    Cache LRU byte PDF per proses, dengan kunci hash isi form_data dan usaha_data.
+
+    Data yang sama menghasilkan kunci yang sama, jadi unduhan ulang dan ekspor
+    massal tidak merender lagi; data yang diedit otomatis mendapat kunci baru.
+    Entri terlama dibuang ketika total ukuran melebihi max_bytes.
+    """
+
+    def __init__(self, max_bytes=PDF_CACHE_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self._size = 0
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        with self._lock:
+            pdf_bytes = self._entries.get(key)
+            if pdf_bytes is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return pdf_bytes
+
+    def put(self, key, pdf_bytes):
+        # PDF yang lebih besar dari batas cache tidak disimpan
+        if len(pdf_bytes) > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                self._size -= len(self._entries.pop(key))
+            self._entries[key] = pdf_bytes
+            self._size += len(pdf_bytes)
+            while self._size > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._size -= len(evicted)
+
+    # Ambil PDF dari cache atau render lalu simpan; mengembalikan (kunci, byte PDF)
+    def get_or_create(self, form_data, usaha_data):
+        key = pdf_content_key(form_data, usaha_data)
+        pdf_bytes = self.get(key)
+        if pdf_bytes is None:
+            # Render di luar lock; dua sesi yang kebetulan bersamaan paling buruk merender dua kali
+            pdf_bytes = create_pdf(form_data, usaha_data).getvalue()
+            self.put(key, pdf_bytes)
+        return key, pdf_bytes
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
+
+    def stats(self):
+        with self._lock:
+            return {"entries": len(self._entries), "bytes": self._size, "hits": self.hits, "misses": self.misses}
+
+
+# Cache bersama untuk semua sesi aplikasi dalam satu proses (ekspor massal tidak memakainya)
+pdf_cache = PdfCache()
@@ -0,0 +1,148 @@
+import heapq
+import itertools
+import logging
+import random
+import threading
+import time
+
+import gspread
+import requests
+
+from spans import spans
+
+logger = logging.getLogger(__name__)
+
+# Prioritas panggilan: angka kecil didahulukan
+PRIORITY_WRITE = 0    # penulisan data dari pendata
+PRIORITY_CONNECT = 1  # auth, open_by_key, worksheet
+PRIORITY_READ = 2     # pembacaan latar belakang (indeks baris, sinkronisasi)
+
+# Kuota default Google Sheets API: 60 permintaan per menit per pengguna
+RATE_PER_MINUTE = 60
+BURST = 10
+
+RETRY_STATUS = {429, 500, 502, 503, 504}
+
+
+# Fungsi untuk menentukan apakah error layak dicoba ulang (429 / 5xx / gangguan jaringan).
+# Panggilan yang tidak idempoten (append) hanya diulang pada 429: permintaan ditolak sebelum
+# diproses. Setelah 5xx atau timeout, baris mungkin sudah tertulis, jadi pemanggil yang memutuskan.
+def is_retryable(error, idempotent=True):
+    if isinstance(error, gspread.exceptions.APIError):
+        return error.code in RETRY_STATUS if idempotent else error.code == 429
+    if not idempotent:
+        return False
+    return isinstance(error, (requests.exceptions.ConnectionError, requests.exceptions.Timeout))
+
+
+class QuotaLimiter:
+    """
+    Token bucket bersama untuk semua panggilan gspread.
+
+    Panggilan menunggu token sesuai prioritas (penulisan mendahului
+    pembacaan latar belakang), lalu dicoba ulang dengan exponential backoff
+    + jitter bila API membalas 429/5xx. Panggilan dengan idempotent=False
+    (append) hanya diulang pada 429. Waktu tunggu dan jumlah retry
+    dicatat per jenis panggilan.
+    """
+
+    def __init__(self, rate_per_minute=RATE_PER_MINUTE, burst=BURST,
+                 max_retries=5, base_delay=1.0, max_delay=64.0):
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self._cond = threading.Condition()
+        self._waiters = []  # heap (prioritas, urutan)
+        self._seq = itertools.count()
+        self._stats = {}
+        self.configure(rate_per_minute, burst)
+
+    # Ubah kuota; rate_per_minute=None berarti tanpa batas (misalnya untuk benchmark)
+    def configure(self, rate_per_minute=RATE_PER_MINUTE, burst=BURST):
+        with self._cond:
+            self.rate = rate_per_minute / 60.0 if rate_per_minute else None
+            self.burst = burst
+            self._tokens = float(burst)
+            self._updated = time.monotonic()
+            self._cond.notify_all()
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    # Tunggu giliran dan satu token; mengembalikan lama menunggu (detik)
+    def acquire(self, priority=PRIORITY_READ):
+        start = time.monotonic()
+        with self._cond:
+            if self.rate is None:
+                return 0.0
+            entry = (priority, next(self._seq))
+            heapq.heappush(self._waiters, entry)
+            try:
+                while True:
+                    self._refill()
+                    if self._waiters[0] == entry and self._tokens >= 1:
+                        self._tokens -= 1
+                        break
+                    timeout = None if self._waiters[0] != entry else (1 - self._tokens) / self.rate
+                    self._cond.wait(timeout)
+            finally:
+                self._waiters.remove(entry)
+                heapq.heapify(self._waiters)
+                self._cond.notify_all()
+        return time.monotonic() - start
+
+    def _backoff(self, attempt, error):
+        retry_after = None
+        response = getattr(error, "response", None)
+        if response is not None:
+            retry_after = response.headers.get("Retry-After")
+        if retry_after and retry_after.isdigit():
+            return float(retry_after)
+        delay = min(self.max_delay, self.base_delay * (2 ** attempt))
+        return delay / 2 + random.uniform(0, delay / 2)
+
+    def _record(self, label, waited=0.0, retries=0, error=False):
+        with self._cond:
+            stats = self._stats.setdefault(label, {"calls": 0, "retries": 0, "errors": 0, "wait_total": 0.0, "wait_max": 0.0})
+            stats["calls"] += 1
+            stats["retries"] += retries
+            stats["errors"] += int(error)
+            stats["wait_total"] += waited
+            stats["wait_max"] = max(stats["wait_max"], waited)
+
+    # Jalankan fn lewat limiter, misal limiter.call(ws.append_rows, rows, priority=PRIORITY_WRITE).
+    # Durasi total (termasuk antre token dan retry) dicatat sebagai span "sheet.<label>".
+    # idempotent=False untuk penulisan yang tidak aman diulang (lihat is_retryable).
+    def call(self, fn, *args, priority=PRIORITY_READ, label=None, idempotent=True, **kwargs):
+        label = label or getattr(fn, "__name__", "call")
+        with spans.span(f"sheet.{label}"):
+            return self._call(fn, args, kwargs, priority, label, idempotent)
+
+    def _call(self, fn, args, kwargs, priority, label, idempotent=True):
+        waited, attempt = 0.0, 0
+        while True:
+            waited += self.acquire(priority)
+            try:
+                result = fn(*args, **kwargs)
+            except Exception as e:
+                if attempt >= self.max_retries or not is_retryable(e, idempotent):
+                    self._record(label, waited, attempt, error=True)
+                    raise
+                delay = self._backoff(attempt, e)
+                logger.info("%s gagal (%s), coba lagi dalam %.1f s", label, e, delay)
+                time.sleep(delay)
+                waited += delay
+                attempt += 1
+                continue
+            self._record(label, waited, attempt)
+            return result
+
+    def stats(self):
+        with self._cond:
+            return {label: dict(values) for label, values in self._stats.items()}
+
+
+# Limiter bersama untuk seluruh proses
+sheets_limiter = QuotaLimiter()
@@ -0,0 +1,154 @@
+import threading
+
+import pandas as pd
+
+from gsheet import FLAG_COLUMNS, HEADERS
+
+# Kolom berulang bernilai sedikit -> dtype category (hemat memori, group-by cepat)
+CATEGORY_COLUMNS = [
+    "Provinsi", "Kabupaten/Kota", "Kecamatan", "Desa/Kelurahan", "RT/RW",
+    "Nama Pendata", "Nama Pemeriksa", "Tanggal",
+]
+
+# Tujuh flag Ind.* (3.1-3.7) dan jumlah tenaga kerja dijumlahkan per wilayah
+SUM_COLUMNS = FLAG_COLUMNS + ["Jumlah Tenaga Kerja"]
+
+# Jumlah industri 3.1-3.7 yang dideklarasikan di BLOK III (berulang di setiap baris usaha)
+DECLARED_COLUMNS = HEADERS[9:16]
+
+# Satu kuesioner = satu ID Submisi; baris lama tanpa ID (kolom kosong) dibedakan lewat
+# pendata dan timestamp, sama seperti group_submissions
+KUESIONER_COLUMNS = ["Nama Pendata", "Timestamp", "ID Submisi"]
+
+# Satu kuesioner di total keseluruhan = kombinasi unik kolom ini
+TOTAL_KEYS = ["Desa/Kelurahan", "RT/RW"] + KUESIONER_COLUMNS
+
+# Tingkat rekap dan kolom pengelompokannya
+LEVELS = {
+    "Kecamatan": ["Kecamatan"],
+    "Desa/Kelurahan": ["Kecamatan", "Desa/Kelurahan"],
+    "RT/RW": ["Kecamatan", "Desa/Kelurahan", "RT/RW"],
+}
+
+
+# Fungsi untuk menyusun DataFrame dari baris sheet/mirror (urutan kolom = HEADERS)
+def build_frame(rows):
+    df = pd.DataFrame.from_records(rows)
+    # Baris shard lama belum punya kolom "ID Submisi"
+    df.columns = HEADERS[:df.shape[1]]
+    df = df.reindex(columns=HEADERS, fill_value="")
+    df["ID Submisi"] = df["ID Submisi"].fillna("")
+    for column in CATEGORY_COLUMNS:
+        df[column] = df[column].astype("category")
+    for column in SUM_COLUMNS + DECLARED_COLUMNS:
+        df[column] = pd.to_numeric(df[column], errors="coerce").fillna(0).astype("int32")
+    return df
+
+
+# Fungsi untuk menghitung rekap per wilayah secara vektor (tanpa loop per baris)
+def recap(df, level="Desa/Kelurahan"):
+    keys = LEVELS[level]
+    grouped = df.groupby(keys, observed=True)
+    result = grouped[SUM_COLUMNS].sum()
+    # Satu kuesioner = kombinasi unik KUESIONER_COLUMNS di wilayah yang sama
+    kuesioner = df.drop_duplicates(keys + KUESIONER_COLUMNS).groupby(keys, observed=True).size()
+    result.insert(0, "Jumlah Usaha", grouped.size())
+    result.insert(0, "Jumlah Kuesioner", kuesioner)
+    return result.reset_index()
+
+
+# Fungsi untuk menghitung total keseluruhan (baris ringkasan di atas tabel rekap)
+def totals(df):
+    return {
+        "usaha": len(df),
+        "kuesioner": len(df.drop_duplicates(TOTAL_KEYS)),
+        "tenaga_kerja": int(df["Jumlah Tenaga Kerja"].sum()),
+    }
+
+
+# Baris pertama setiap kombinasi `columns` yang belum ada di `seen` (seen ikut diperbarui)
+def first_seen(df, columns, seen):
+    first = df.drop_duplicates(columns)
+    keys = list(zip(*(first[column].tolist() for column in columns)))
+    mask = [key not in seen for key in keys]
+    seen.update(keys)
+    return first[mask]
+
+
+class RekapCache:
+    """
+    Total dan rekap per wilayah yang diperbarui dari baris baru saja.
+
+    update() menerima DataFrame baris baru (build_frame) dan menambahkan
+    jumlahnya ke hasil rekap yang sudah ada; kuesioner dihitung sekali
+    lewat himpunan kunci yang sudah terlihat. Hasil totals() dan recap()
+    sama dengan fungsi totals()/recap() atas seluruh data.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self._totals = {"usaha": 0, "kuesioner": 0, "tenaga_kerja": 0}
+            self._recaps = {}
+            self._seen = {"total": set(), **{level: set() for level in LEVELS}}
+
+    def update(self, df):
+        with self._lock:
+            self._totals["usaha"] += len(df)
+            self._totals["kuesioner"] += len(first_seen(df, TOTAL_KEYS, self._seen["total"]))
+            self._totals["tenaga_kerja"] += int(df["Jumlah Tenaga Kerja"].sum())
+            # Kunci wilayah sebagai teks: kategori DataFrame baru bisa berbeda dari yang lama
+            text = df.astype({column: str for column in ["Kecamatan", "Desa/Kelurahan", "RT/RW"]})
+            for level, keys in LEVELS.items():
+                grouped = text.groupby(keys)
+                part = grouped[SUM_COLUMNS].sum()
+                kuesioner = first_seen(text, keys + KUESIONER_COLUMNS, self._seen[level]).groupby(keys).size()
+                part.insert(0, "Jumlah Usaha", grouped.size())
+                part.insert(0, "Jumlah Kuesioner", kuesioner.reindex(part.index, fill_value=0))
+                old = self._recaps.get(level)
+                self._recaps[level] = part if old is None else old.add(part, fill_value=0).astype("int64")
+
+    def totals(self):
+        with self._lock:
+            return dict(self._totals)
+
+    def recap(self, level="Desa/Kelurahan"):
+        with self._lock:
+            result = self._recaps.get(level)
+        if result is None:
+            return pd.DataFrame(columns=LEVELS[level] + ["Jumlah Kuesioner", "Jumlah Usaha"] + SUM_COLUMNS)
+        return result.sort_index().reset_index()
+
+
+class MirrorFeed:
+    """
+    Meneruskan perubahan SheetMirror ke cache turunan (RekapCache, ConsistencyIndex, ...).
+
+    refresh() hanya membaca baris dengan versi di atas versi terakhir yang
+    sudah diteruskan, mengubahnya menjadi DataFrame dan memanggil
+    update(df) di setiap cache. Jika mirror menandai baris lama berubah
+    (blok yang disalin ulang), semua cache di-reset lalu diisi ulang.
+    """
+
+    def __init__(self, mirror, caches):
+        self.mirror = mirror
+        self.caches = caches
+        self.version = 0
+        self._lock = threading.Lock()
+
+    # Terapkan perubahan terbaru; mengembalikan jumlah baris yang diteruskan
+    def refresh(self):
+        with self._lock:
+            version, rows, reset = self.mirror.changes(self.version)
+            if reset:
+                for cache in self.caches:
+                    cache.reset()
+            if rows:
+                df = build_frame(rows)
+                for cache in self.caches:
+                    cache.update(df)
+            self.version = version
+            return len(rows)
@@ -0,0 +1,59 @@
+import threading
+import time
+from contextlib import contextmanager
+
+from spans import spans
+
+
+class RunTimings:
+    """
+    Statistik durasi eksekusi script per jenis ("app" = seluruh app.py,
+    "fragment:<nama>" = rerun satu fragment saja).
+
+    Waktu CPU diukur dengan time.thread_time(). Streamlit menjalankan script
+    setiap sesi di thread sendiri, jadi angka CPU adalah biaya server untuk
+    sesi itu saja, tanpa waktu menunggu I/O atau sesi lain.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stats = {}
+
+    def record(self, kind, wall, cpu):
+        with self._lock:
+            stats = self._stats.setdefault(kind, {"runs": 0, "wall_total": 0.0, "wall_max": 0.0, "cpu_total": 0.0})
+            stats["runs"] += 1
+            stats["wall_total"] += wall
+            stats["wall_max"] = max(stats["wall_max"], wall)
+            stats["cpu_total"] += cpu
+
+    # Salinan statistik dengan rata-rata per eksekusi (milidetik)
+    def stats(self):
+        with self._lock:
+            return {
+                kind: {
+                    "runs": stats["runs"],
+                    "wall_avg_ms": 1000 * stats["wall_total"] / stats["runs"],
+                    "wall_max_ms": 1000 * stats["wall_max"],
+                    "cpu_avg_ms": 1000 * stats["cpu_total"] / stats["runs"],
+                    "cpu_total_ms": 1000 * stats["cpu_total"],
+                }
+                for kind, stats in self._stats.items()
+            }
+
+
+# Ukur satu eksekusi dan catat ke semua RunTimings yang diberikan (mis. per proses dan per sesi).
+# wall_start/cpu_start dipakai jika pengukuran sudah dimulai sebelumnya (awal app.py).
+# Eksekusi yang dihentikan st.rerun/st.stop tetap tercatat, juga sebagai span "rerun".
+@contextmanager
+def measure(kind, *timings, wall_start=None, cpu_start=None):
+    wall_start = time.perf_counter() if wall_start is None else wall_start
+    cpu_start = time.thread_time() if cpu_start is None else cpu_start
+    try:
+        yield
+    finally:
+        wall = time.perf_counter() - wall_start
+        cpu = time.thread_time() - cpu_start
+        for run_timings in timings:
+            run_timings.record(kind, wall, cpu)
+        spans.record("rerun", wall, kind=kind, cpu_ms=round(cpu * 1000, 3))
@@ -0,0 +1,159 @@
+import functools
+import json
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager, nullcontext
+
+import numpy as np
+
+# Lokasi default file JSONL span dan jumlah durasi terakhir per tahap untuk persentil
+SPANS_PATH = os.path.join("data", "spans.jsonl")
+WINDOW = 4096
+
+# Baris JSONL ditulis per kelompok, bukan satu write per span
+FLUSH_LINES = 64
+FLUSH_INTERVAL = 2.0
+
+QUANTILES = [0.5, 0.95, 0.99]
+
+_NOOP = nullcontext()
+
+
+class SpanRecorder:
+    """
+    Pencatat durasi per tahap pipeline (connect, validate, pdf.*, sheet.*, rerun, ...).
+
+    Nonaktif secara default: span() lalu hanya mengembalikan context manager
+    kosong yang sama, tanpa membaca jam. Jika aktif, setiap span disimpan ke
+    jendela durasi terakhir per tahap (untuk p50/p95/p99) dan, jika path
+    diberikan, ditulis sebagai satu baris JSON ke file JSONL secara berkelompok.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.enabled = False
+        self.path = None
+        self._file = None
+        self._buffer = []
+        self._flushed = time.monotonic()
+        self._windows = {}
+        self._totals = {}
+
+    # Aktifkan/nonaktifkan pencatatan; path=None berarti hanya di memori (tanpa file JSONL)
+    def configure(self, enabled=True, path=SPANS_PATH):
+        with self._lock:
+            self._flush()
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+            self.enabled = enabled
+            self.path = path if enabled else None
+            if self.path:
+                directory = os.path.dirname(self.path)
+                if directory:
+                    os.makedirs(directory, exist_ok=True)
+                self._file = open(self.path, "a", encoding="utf-8")
+
+    # Ukur satu tahap, mis. `with spans.span("pdf.layout", usaha=12): ...`
+    def span(self, stage, **attrs):
+        if not self.enabled:
+            return _NOOP
+        return self._span(stage, attrs)
+
+    @contextmanager
+    def _span(self, stage, attrs):
+        start = time.perf_counter()
+        try:
+            yield
+        except BaseException as e:
+            # st.rerun/st.stop juga berupa exception; hanya Exception biasa yang dihitung gagal
+            if isinstance(e, Exception):
+                attrs["error"] = type(e).__name__
+            raise
+        finally:
+            self.record(stage, time.perf_counter() - start, **attrs)
+
+    # Bungkus fungsi agar setiap pemanggilannya dicatat sebagai satu tahap
+    def traced(self, stage):
+        def decorator(func):
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                with self.span(stage):
+                    return func(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    # Catat durasi (detik) yang sudah diukur di tempat lain
+    def record(self, stage, seconds, **attrs):
+        if not self.enabled:
+            return
+        with self._lock:
+            window = self._windows.get(stage)
+            if window is None:
+                window = self._windows[stage] = deque(maxlen=WINDOW)
+                self._totals[stage] = [0, 0.0]
+            window.append(seconds)
+            totals = self._totals[stage]
+            totals[0] += 1
+            totals[1] += seconds
+            if self._file is not None:
+                record = {"ts": round(time.time(), 3), "stage": stage, "ms": round(seconds * 1000, 3), **attrs}
+                self._buffer.append(json.dumps(record, ensure_ascii=False, default=str))
+                now = time.monotonic()
+                if len(self._buffer) >= FLUSH_LINES or now - self._flushed >= FLUSH_INTERVAL:
+                    self._flush(now)
+
+    def _flush(self, now=None):
+        if self._buffer and self._file is not None:
+            self._file.write("\n".join(self._buffer) + "\n")
+            self._file.flush()
+        self._buffer.clear()
+        self._flushed = now if now is not None else time.monotonic()
+
+    # Tulis baris JSONL yang masih tertahan di buffer
+    def flush(self):
+        with self._lock:
+            self._flush()
+
+    # Persentil durasi per tahap (milidetik) dari jendela terakhir; count/total sejak proses mulai
+    def percentiles(self):
+        with self._lock:
+            snapshot = {stage: (np.array(window), *self._totals[stage]) for stage, window in self._windows.items()}
+        stats = {}
+        for stage, (window, count, total) in sorted(snapshot.items()):
+            p50, p95, p99 = (np.quantile(window, QUANTILES) * 1000).tolist()
+            stats[stage] = {
+                "count": count,
+                "p50_ms": p50,
+                "p95_ms": p95,
+                "p99_ms": p99,
+                "max_ms": float(window.max()) * 1000,
+                "total_ms": total * 1000,
+            }
+        return stats
+
+    # Statistik dalam format teks Prometheus (summary per tahap, satuan detik)
+    def prometheus_text(self, metric="pendataan_stage_duration_seconds"):
+        lines = [
+            f"# HELP {metric} Durasi tahap pipeline pendataan.",
+            f"# TYPE {metric} summary",
+        ]
+        for stage, stats in self.percentiles().items():
+            label = stage.replace("\\", "\\\\").replace('"', '\\"')
+            for quantile in QUANTILES:
+                value = stats[f"p{round(quantile * 100)}_ms"] / 1000
+                lines.append(f'{metric}{{stage="{label}",quantile="{quantile}"}} {value:.6f}')
+            lines.append(f'{metric}_sum{{stage="{label}"}} {stats["total_ms"] / 1000:.6f}')
+            lines.append(f'{metric}_count{{stage="{label}"}} {stats["count"]}')
+        return "\n".join(lines) + "\n"
+
+    def reset(self):
+        with self._lock:
+            self._windows.clear()
+            self._totals.clear()
+
+
+# Pencatat span bersama untuk seluruh proses; diaktifkan lewat konfigurasi [tracing]
+spans = SpanRecorder()
@@ -0,0 +1,152 @@
+"""
+Uji regresi jalur pengiriman dan salinan lokal dengan worksheet palsu (benchmarks/fake_worksheet.py).
+
+- jurnal: submisi yang belum di-ack dimuat ulang setelah crash dan dikirim sekali;
+- dedupe: submission_id yang sama tidak pernah menambah baris ganda;
+- mirror: edit baris lama di Google Sheets terdeteksi lewat checksum blok;
+- shard: shard tanpa header dilengkapi sebelum menerima data.
+Jalankan dari root repo: python -m pytest -q
+"""
+import gspread
+import pytest
+import requests
+
+from benchmarks.fake_worksheet import make_worksheet
+from gsheet import HEADERS, RowCountIndex, ShardDirectory, append_to_sheet, read_all_rows
+from mirror import BLOCK_ROWS, SheetMirror
+from ratelimit import sheets_limiter
+from writer import SheetWriter, SubmissionIndex, SubmissionJournal
+
+
+@pytest.fixture(autouse=True)
+def unlimited_quota():
+    sheets_limiter.configure(rate_per_minute=None)
+    yield
+    sheets_limiter.configure()
+
+
+@pytest.fixture
+def worksheet():
+    worksheet = make_worksheet()
+    worksheet.values.append(HEADERS)
+    return worksheet
+
+
+def make_rows(submission_id, n_rows=2):
+    return [[f"{submission_id}-{i}"] * (len(HEADERS) - 1) + [submission_id] for i in range(n_rows)]
+
+
+def make_writer(tmp_path, worksheet, **kwargs):
+    journal = SubmissionJournal(str(tmp_path / "journal.jsonl"))
+    index = SubmissionIndex(str(tmp_path / "index.sqlite3"))
+    return SheetWriter(journal, lambda n_rows: (worksheet, None), RowCountIndex(), index=index, **kwargs)
+
+
+def data_rows(worksheet):
+    return worksheet.values[1:]
+
+
+def test_journal_replays_unacked_submissions_after_crash(tmp_path, worksheet):
+    writer = make_writer(tmp_path, worksheet)
+    writer.submit(make_rows("a"), "a")
+    writer.submit(make_rows("b", 3), "b")
+    # Crash saat menulis record berikutnya: baris terakhir jurnal terpotong
+    with open(tmp_path / "journal.jsonl", "a", encoding="utf-8") as f:
+        f.write('{"type": "submit", "id": "c", "ro')
+
+    restarted = make_writer(tmp_path, worksheet)
+    assert [record["id"] for record in restarted.journal.pending()] == ["a", "b"]
+    assert restarted.journal.pending_rows() == 5
+    assert restarted.flush() == 5
+    assert [row[-1] for row in data_rows(worksheet)] == ["a", "a", "b", "b", "b"]
+    assert restarted.journal.pending() == []
+    assert SubmissionJournal(str(tmp_path / "journal.jsonl")).pending() == []
+
+
+def test_same_submission_id_is_written_once(tmp_path, worksheet):
+    writer = make_writer(tmp_path, worksheet)
+    first = writer.submit(make_rows("a"), "a")
+    # Klik ganda sebelum terkirim: Future yang sama, tidak masuk jurnal lagi
+    assert writer.submit(make_rows("a"), "a") is first
+    writer.flush()
+    assert first.result(1)["first_row"] == 2
+
+    retry = writer.submit(make_rows("a"), "a").result(1)
+    assert retry["duplicate"] and (retry["first_row"], retry["last_row"]) == (2, 3)
+    assert len(data_rows(worksheet)) == 2
+    assert writer.stats["duplicates"] == 2
+
+
+def test_crash_between_append_and_ack_does_not_resend(tmp_path, worksheet):
+    writer = make_writer(tmp_path, worksheet)
+    writer.submit(make_rows("a"), "a")
+    # Baris sudah tertulis dan ID tercatat di index, tetapi proses mati sebelum ack jurnal
+    writer.journal.ack = lambda submission_ids: None
+    writer.flush()
+
+    restarted = make_writer(tmp_path, worksheet)
+    assert [record["id"] for record in restarted.journal.pending()] == ["a"]
+    assert restarted.flush() == 0
+    assert restarted.journal.pending() == []
+    assert len(data_rows(worksheet)) == 2
+
+
+@pytest.mark.parametrize("error", [
+    requests.exceptions.Timeout("timeout"),
+    gspread.exceptions.APIError(type("Response", (), {
+        "json": lambda self: {"error": {"code": 503, "message": "unavailable"}},
+        "status_code": 503, "text": "", "headers": {},
+    })()),
+])
+def test_ambiguous_append_failure_is_reconciled_not_resent(tmp_path, worksheet, error):
+    append_rows = worksheet.append_rows
+
+    # Append diproses server, tetapi klien menerima timeout/5xx
+    def lost_response(rows, **kwargs):
+        append_rows(rows, **kwargs)
+        raise error
+
+    writer = make_writer(tmp_path, worksheet)
+    future = writer.submit(make_rows("a"), "a")
+    worksheet.append_rows = lost_response
+    with pytest.raises(type(error)):
+        writer.flush()
+    worksheet.append_rows = append_rows
+
+    assert writer.flush() == 0
+    assert future.result(1)["duplicate"]
+    assert len(data_rows(worksheet)) == 2
+    assert writer.stats["reconciled"] == 1
+
+
+def test_mirror_detects_edit_of_old_row(tmp_path, worksheet):
+    for i in range(3 * BLOCK_ROWS):
+        worksheet.values.extend(make_rows(f"s{i}", 1))
+    mirror = SheetMirror(str(tmp_path / "mirror.sqlite3"))
+    assert mirror.sync([worksheet]) == (3 * BLOCK_ROWS, 0)
+    version, rows, reset = mirror.changes()
+    assert reset and len(rows) == 3 * BLOCK_ROWS
+
+    # Tanpa perubahan: tidak ada baris yang diteruskan ke cache turunan
+    assert mirror.sync([worksheet], verify_budget=3) == (0, 0)
+    assert mirror.changes(version)[1:] == ([], False)
+
+    edited_row = BLOCK_ROWS + 10
+    worksheet.values[edited_row - 1][HEADERS.index("Nama Usaha")] = "Usaha Diedit Manual"
+    assert mirror.sync([worksheet], verify_budget=3) == (0, 1)
+    version, rows, reset = mirror.changes(version)
+    assert reset and len(rows) == 3 * BLOCK_ROWS
+    assert "Usaha Diedit Manual" in rows[edited_row - 2]
+    mirror.close()
+
+
+def test_headerless_shard_gets_header_before_data(worksheet):
+    worksheet.values.extend(make_rows("a"))
+    # add_worksheet berhasil tetapi penulisan header gagal: shard 2 kosong
+    worksheet.spreadsheet.add_worksheet("Data Industri 2")
+    directory = ShardDirectory(RowCountIndex(), max_rows=3)
+
+    active, _ = directory.route(worksheet.spreadsheet, 2)
+    assert active.title == "Data Industri 2" and active.values == [HEADERS]
+    append_to_sheet(active, make_rows("b"), directory.row_index)
+    assert [row[-1] for row in read_all_rows(directory.shards(worksheet.spreadsheet))] == ["a", "a", "b", "b"]
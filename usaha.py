@@ -0,0 +1,60 @@
+from dataclasses import dataclass
+
+# Kode jenis industri BLOK IV; bit ke-i mask Usaha.industri = KODE_INDUSTRI[i]
+KODE_INDUSTRI = ["3.1", "3.2", "3.3", "3.4", "3.5", "3.6", "3.7"]
+
+_BIT = {kode: 1 << i for i, kode in enumerate(KODE_INDUSTRI)}
+
+# Tabel untuk semua 128 kombinasi mask: kolom 0/1 sheet, tanda centang PDF, dan daftar kode
+_FLAGS = [tuple((mask >> i) & 1 for i in range(len(KODE_INDUSTRI))) for mask in range(1 << len(KODE_INDUSTRI))]
+_MARKS = [tuple("✓" if flag else "" for flag in flags) for flags in _FLAGS]
+_KODE = [tuple(kode for kode, flag in zip(KODE_INDUSTRI, flags) if flag) for flags in _FLAGS]
+
+
+@dataclass(slots=True)
+class Usaha:
+    """
+    Satu usaha di BLOK IV.
+
+    Kode jenis industri disimpan sebagai mask 7 bit (bit 0 = 3.1, ..., bit 6 = 3.7),
+    sehingga kolom flag sheet, centang PDF dan daftar kode cukup diambil dari tabel.
+    """
+
+    nama_usaha: str = ""
+    nama_pemilik: str = ""
+    industri: int = 0
+    jumlah_tenaga_kerja: int = 0
+
+    # Buat dari daftar kode, mis. ["3.1", "3.4"]
+    @classmethod
+    def from_kode(cls, nama_usaha, nama_pemilik, kode_industri, jumlah_tenaga_kerja):
+        mask = 0
+        for kode in kode_industri:
+            mask |= _BIT[kode]
+        return cls(nama_usaha, nama_pemilik, mask, jumlah_tenaga_kerja)
+
+    # Buat dari tujuh nilai flag berurutan 3.1-3.7 (checkbox form atau kolom 0/1 sheet)
+    @classmethod
+    def from_flags(cls, nama_usaha, nama_pemilik, flags, jumlah_tenaga_kerja):
+        mask = 0
+        for i, flag in enumerate(flags):
+            if flag and str(flag).strip() not in ("0", ""):
+                mask |= 1 << i
+        return cls(nama_usaha, nama_pemilik, mask, jumlah_tenaga_kerja)
+
+    # Kolom Ind.* (3.1-3.7) untuk sheet, berisi 1 atau 0
+    @property
+    def flags(self):
+        return _FLAGS[self.industri]
+
+    # Tanda centang per kolom 3.1-3.7 untuk tabel BLOK IV di PDF
+    @property
+    def marks(self):
+        return _MARKS[self.industri]
+
+    @property
+    def kode_industri(self):
+        return _KODE[self.industri]
+
+    def has(self, kode):
+        return bool(self.industri & _BIT[kode])
@@ -0,0 +1,182 @@
+"""
+Impor data usaha BLOK IV dari file CSV/Excel dan dari tabel edit di aplikasi.
+
+Kolom yang dikenali (tidak peka huruf besar/kecil dan spasi di tepi):
+Nama Usaha, Nama Pemilik, Jumlah Tenaga Kerja, dan kode industri berupa
+kolom "Kode Industri" (mis. "3.1, 3.4") atau tujuh kolom flag 0/1
+Ind.Makanan(3.1) ... Ind.Lainnya(3.7) seperti di sheet "Data Industri".
+Seluruh tabel divalidasi sekaligus dengan pandas (aturan usaha yang sama dengan
+form dan API ada di validation.validate_usaha_frame); kesalahan dilaporkan per baris.
+"""
+import io
+
+import numpy as np
+import pandas as pd
+
+from gsheet import FLAG_COLUMNS
+from usaha import KODE_INDUSTRI, Usaha
+from validation import USAHA_MESSAGES, validate_usaha_frame
+
+NAME_COLUMNS = ["Nama Usaha", "Nama Pemilik"]
+KODE_COLUMN = "Kode Industri"
+JUMLAH_COLUMN = "Jumlah Tenaga Kerja"
+TEMPLATE_COLUMNS = NAME_COLUMNS + [KODE_COLUMN, JUMLAH_COLUMN]
+
+# Kolom tabel edit BLOK IV di aplikasi (flag 3.1-3.7 sebagai checkbox)
+GRID_COLUMNS = NAME_COLUMNS + FLAG_COLUMNS + [JUMLAH_COLUMN]
+
+# Nama kolom dinormalkan (huruf kecil, tanpa spasi di tepi) -> nama baku
+_CANONICAL = {name.casefold(): name for name in TEMPLATE_COLUMNS + FLAG_COLUMNS}
+
+# Kode dipisah koma, titik koma, garis miring atau spasi
+KODE_SEPARATOR = r"[,;/\s]+"
+
+_BIT = {kode: 1 << i for i, kode in enumerate(KODE_INDUSTRI)}
+
+
+class UsahaImportError(ValueError):
+    """File tidak bisa dibaca atau kolom wajib tidak ada."""
+
+
+# Fungsi untuk membaca file upload (CSV atau XLSX) sebagai DataFrame teks
+def read_table(data, filename):
+    try:
+        if filename.lower().endswith((".xlsx", ".xlsm")):
+            return pd.read_excel(io.BytesIO(data), dtype=str, keep_default_na=False)
+        # sep=None: pemisah koma atau titik koma (CSV dari Excel berbahasa Indonesia) dideteksi otomatis
+        return pd.read_csv(io.BytesIO(data), dtype=str, keep_default_na=False, sep=None, engine="python",
+                           encoding="utf-8-sig")
+    except ImportError:
+        raise UsahaImportError("Membaca file Excel membutuhkan paket openpyxl (pip install openpyxl).")
+    except (ValueError, pd.errors.ParserError, UnicodeDecodeError) as e:
+        raise UsahaImportError(f"File tidak dapat dibaca: {e}")
+
+
+# Fungsi untuk mengubah isi kolom "Kode Industri" menjadi mask; mengembalikan (mask, kode tidak dikenal per baris)
+def parse_kode(kode):
+    tokens = kode.str.split(KODE_SEPARATOR, regex=True).explode()
+    tokens = tokens[tokens.notna() & (tokens != "")]
+    known = tokens.isin(KODE_INDUSTRI)
+    # Kode yang ditulis dua kali di satu baris hanya dihitung sekali
+    bits = tokens[known].map(_BIT).reset_index().drop_duplicates()
+    mask = bits.groupby("index")[KODE_COLUMN].sum().reindex(kode.index, fill_value=0)
+    unknown = tokens[~known].groupby(level=0).agg(", ".join)
+    return mask, unknown
+
+
+# Fungsi untuk memvalidasi tabel usaha; mengembalikan (daftar Usaha valid, DataFrame kesalahan per baris).
+# first_line = nomor baris untuk baris pertama data (2 untuk file dengan header, 1 untuk tabel edit).
+def parse_usaha(df, first_line=2):
+    df = df.rename(columns=lambda name: _CANONICAL.get(str(name).strip().casefold(), name))
+    has_kode = KODE_COLUMN in df.columns
+    has_flags = all(name in df.columns for name in FLAG_COLUMNS)
+    missing = [name for name in NAME_COLUMNS + [JUMLAH_COLUMN] if name not in df.columns]
+    if not (has_kode or has_flags):
+        missing.append(KODE_COLUMN)
+    if missing:
+        raise UsahaImportError(f"Kolom tidak ditemukan: {', '.join(missing)}. "
+                               f"Kolom yang dibutuhkan: {', '.join(TEMPLATE_COLUMNS)}.")
+
+    used = NAME_COLUMNS + [JUMLAH_COLUMN] + ([KODE_COLUMN] if has_kode else FLAG_COLUMNS)
+    text = df[used].reset_index(drop=True).astype(str).apply(lambda column: column.str.strip())
+    blank = (text == "").all(axis=1)  # baris kosong di file dilewati
+    line = pd.Series(text.index + first_line, index=text.index)
+    errors = []
+
+    def report(mask, column, message):
+        mask = mask & ~blank
+        if isinstance(message, pd.Series):
+            message = message[mask]
+        if mask.any():
+            errors.append(pd.DataFrame({"Baris": line[mask], "Kolom": column, "Pesan": message}))
+
+    # Kesalahan khusus file: bentuk angka dan kode industri
+    jumlah = pd.to_numeric(text[JUMLAH_COLUMN], errors="coerce")
+    report(jumlah.isna(), JUMLAH_COLUMN, "Jumlah Tenaga Kerja harus berupa angka")
+    is_fraction = jumlah.notna() & (jumlah % 1 != 0)
+    report(is_fraction, JUMLAH_COLUMN, "Jumlah Tenaga Kerja harus bilangan bulat")
+
+    if has_kode:
+        industri, unknown = parse_kode(text[KODE_COLUMN])
+        has_unknown = pd.Series(False, index=text.index)
+        has_unknown[unknown.index] = True
+        report(has_unknown, KODE_COLUMN, "Kode tidak dikenal: " + unknown.reindex(text.index).fillna(""))
+        kode_column = KODE_COLUMN
+    else:
+        flags = text[FLAG_COLUMNS]
+        for name in FLAG_COLUMNS:
+            report(~flags[name].isin(["0", "1", ""]), name, f"{name} harus 0 atau 1")
+        industri = pd.Series((flags == "1").to_numpy() @ (1 << np.arange(len(FLAG_COLUMNS))), index=text.index)
+        kode_column = "Ind.*"
+
+    # Aturan usaha BLOK IV; jumlah tenaga kerja hanya dinilai jika sudah berupa bilangan bulat
+    flags = validate_usaha_frame(pd.DataFrame({
+        "nama_usaha": text["Nama Usaha"],
+        "nama_pemilik": text["Nama Pemilik"],
+        "industri": industri,
+        "jumlah_tenaga_kerja": jumlah,
+    }))
+    flags["jumlah_tenaga_kerja_kurang"] &= jumlah.notna() & ~is_fraction
+    columns = {
+        "nama_usaha_kosong": "Nama Usaha",
+        "nama_pemilik_kosong": "Nama Pemilik",
+        "industri_kosong": kode_column,
+        "jumlah_tenaga_kerja_kurang": JUMLAH_COLUMN,
+    }
+    for code, column in columns.items():
+        report(flags[code], column, USAHA_MESSAGES[code])
+
+    if errors:
+        errors = pd.concat(errors).sort_values("Baris", kind="stable").reset_index(drop=True)
+    else:
+        errors = pd.DataFrame(columns=["Baris", "Kolom", "Pesan"])
+    valid = ~blank & ~line.isin(errors["Baris"])
+
+    usaha_data = [
+        Usaha(nama_usaha, nama_pemilik, int(mask), int(n))
+        for nama_usaha, nama_pemilik, mask, n in zip(
+            text["Nama Usaha"][valid], text["Nama Pemilik"][valid], industri[valid], jumlah[valid]
+        )
+    ]
+    return usaha_data, errors
+
+
+# Fungsi untuk membaca dan memvalidasi file upload sekaligus
+def import_usaha(data, filename):
+    return parse_usaha(read_table(data, filename))
+
+
+# Isi file contoh yang bisa diunduh pendata
+def template_csv():
+    example = pd.DataFrame([
+        ["Keripik Tempe Bu Sri", "Sri Wahyuni", "3.1", 3],
+        ["Bengkel Las Jaya", "Slamet", "3.4, 3.6", 2],
+    ], columns=TEMPLATE_COLUMNS)
+    return example.to_csv(index=False).encode("utf-8")
+
+
+# Fungsi untuk menyusun DataFrame tabel edit dari usaha_data
+def usaha_frame(usaha_data):
+    return pd.DataFrame(
+        [(usaha.nama_usaha, usaha.nama_pemilik, *map(bool, usaha.flags), usaha.jumlah_tenaga_kerja)
+         for usaha in usaha_data],
+        columns=GRID_COLUMNS,
+    )
+
+
+# Fungsi untuk menerapkan hasil tabel edit ke usaha_data dalam satu langkah.
+# Mengembalikan (usaha_data baru, indeks usaha yang berubah, DataFrame kesalahan);
+# jika ada kesalahan, usaha_data dikembalikan apa adanya.
+def apply_usaha_frame(usaha_data, frame):
+    frame = frame[GRID_COLUMNS].reset_index(drop=True)
+    flags = frame[FLAG_COLUMNS].fillna(False).astype(bool).astype(int)
+    text = frame[NAME_COLUMNS + [JUMLAH_COLUMN]].astype(object).where(frame.notna(), "")
+    records, errors = parse_usaha(pd.concat([text, flags], axis=1), first_line=1)
+    if not errors.empty:
+        return usaha_data, [], errors
+    # Kolom flag selalu terisi 0/1, jadi tidak ada baris kosong yang dilewati: records sejajar dengan usaha_data
+    changed = [i for i, (old, new) in enumerate(zip(usaha_data, records)) if old != new]
+    updated = list(usaha_data)
+    for i in changed:
+        updated[i] = records[i]
+    return updated, changed, errors
@@ -0,0 +1,243 @@
+"""
+Aturan validasi kuesioner tanpa ketergantungan ke Streamlit.
+
+Setiap aturan punya kode kesalahan (mis. "rt_kosong", "total_usaha_nol") dan
+pesan yang sama untuk semua jalur: form di app.py (nilai dari
+st.session_state), impor usaha dari CSV/Excel, dan API submisi.
+Ada dua bentuk yang menghasilkan kode yang sama:
+- per record: form_error_codes/validate_form dan usaha_error_codes/validate_usaha;
+- vektor: validate_form_frame dan validate_usaha_frame memeriksa seluruh
+  DataFrame sekaligus dan mengembalikan DataFrame boolean (baris x kode).
+"""
+from datetime import date, datetime
+
+import numpy as np
+import pandas as pd
+
+# Field wajib BLOK I dan II: (key form_data, label pesan)
+BLOK_I_FIELDS = [
+    ("provinsi", "Provinsi"),
+    ("kabupaten", "Kabupaten/Kota"),
+    ("kecamatan", "Kecamatan"),
+    ("desa", "Desa/Kelurahan"),
+    ("rt", "RT"),
+    ("rw", "RW"),
+]
+BLOK_II_FIELDS = [
+    ("nama_pendata", "Nama Pendata"),
+    ("nama_pemeriksa", "Nama Pemeriksa"),
+]
+
+# Jumlah industri BLOK III, urutan sesuai kode 3.1-3.7
+BLOK_III_FIELDS = [
+    ("jml_industri_makanan", "Jumlah Industri Makanan"),
+    ("jml_industri_alat_rt", "Jumlah Industri Alat Rumah Tangga"),
+    ("jml_industri_material", "Jumlah Industri Material Bahan Bangunan"),
+    ("jml_industri_alat_pertanian", "Jumlah Industri Alat Pertanian"),
+    ("jml_industri_kerajinan", "Jumlah Industri Kerajinan selain logam"),
+    ("jml_industri_logam", "Jumlah Industri Logam"),
+    ("jml_industri_lainnya", "Jumlah Industri Lainnya"),
+]
+JML_KEYS = [key for key, _ in BLOK_III_FIELDS]
+
+# Kolom form_data yang diperiksa
+FORM_KEYS = [key for key, _ in BLOK_I_FIELDS + BLOK_II_FIELDS] + ["tanggal"] + JML_KEYS
+
+TANGGAL_FORMAT = "%Y-%m-%d"
+
+# Kode kesalahan BLOK I-III -> pesan, urutan sesuai urutan pemeriksaan
+FORM_MESSAGES = {}
+for _key, _label in BLOK_I_FIELDS:
+    FORM_MESSAGES[f"{_key}_kosong"] = f"BLOK I: {_label} harus diisi"
+for _key, _label in BLOK_II_FIELDS:
+    FORM_MESSAGES[f"{_key}_kosong"] = f"BLOK II: {_label} harus diisi"
+FORM_MESSAGES["tanggal_kosong"] = "BLOK II: Tanggal harus diisi"
+FORM_MESSAGES["tanggal_format"] = "BLOK II: Tanggal harus berformat YYYY-MM-DD"
+for _key, _label in BLOK_III_FIELDS:
+    FORM_MESSAGES[f"{_key}_kosong"] = f"BLOK III: {_label} harus diisi (minimal 0)"
+    FORM_MESSAGES[f"{_key}_bukan_bulat"] = f"BLOK III: {_label} harus berupa bilangan bulat"
+    FORM_MESSAGES[f"{_key}_negatif"] = f"BLOK III: {_label} tidak boleh bernilai negatif"
+FORM_MESSAGES["total_usaha_nol"] = "BLOK III: Total jumlah usaha tidak boleh 0. Minimal harus ada 1 usaha yang didata."
+FORM_CODES = list(FORM_MESSAGES)
+
+# Kode kesalahan satu usaha BLOK IV -> pesan
+USAHA_MESSAGES = {
+    "nama_usaha_kosong": "Nama Usaha harus diisi",
+    "nama_pemilik_kosong": "Nama Pemilik harus diisi",
+    "industri_kosong": "Minimal pilih satu jenis industri",
+    "jumlah_tenaga_kerja_kurang": "Jumlah Tenaga Kerja minimal 1 (termasuk pemilik usaha)",
+}
+USAHA_CODES = list(USAHA_MESSAGES)
+USAHA_FIELDS = ["nama_usaha", "nama_pemilik", "industri", "jumlah_tenaga_kerja"]
+
+
+# Fungsi untuk mengubah nilai menjadi int; None jika kosong atau bukan bilangan bulat
+def as_int(value):
+    if value is None or isinstance(value, bool):
+        return None
+    try:
+        number = float(value)
+    except (TypeError, ValueError):
+        return None
+    return int(number) if number.is_integer() else None
+
+
+def _is_blank(value):
+    return value is None or (isinstance(value, float) and np.isnan(value)) or str(value).strip() == ""
+
+
+# Fungsi untuk menjumlahkan BLOK III dari form_data atau st.session_state (nilai kosong = 0)
+def count_usaha(values):
+    return sum(as_int(values.get(key)) or 0 for key in JML_KEYS)
+
+
+# Fungsi untuk memeriksa BLOK I-III dari satu record; mengembalikan daftar kode kesalahan
+def form_error_codes(form_data):
+    codes = [f"{key}_kosong" for key, _ in BLOK_I_FIELDS + BLOK_II_FIELDS if _is_blank(form_data.get(key))]
+
+    tanggal = form_data.get("tanggal")
+    if _is_blank(tanggal):
+        codes.append("tanggal_kosong")
+    elif not isinstance(tanggal, date):
+        try:
+            datetime.strptime(str(tanggal).strip(), TANGGAL_FORMAT)
+        except ValueError:
+            codes.append("tanggal_format")
+
+    # Total usaha hanya diperiksa jika BLOK III lengkap dan tidak ada kesalahan lain di BLOK I dan II
+    other_errors = bool(codes)
+    blok_iii_complete = True
+    total = 0
+    for key in JML_KEYS:
+        value = form_data.get(key)
+        number = as_int(value)
+        if _is_blank(value):
+            codes.append(f"{key}_kosong")
+        elif number is None:
+            codes.append(f"{key}_bukan_bulat")
+        elif number < 0:
+            codes.append(f"{key}_negatif")
+        else:
+            total += number
+            continue
+        blok_iii_complete = False
+    if blok_iii_complete and not other_errors and total == 0:
+        codes.append("total_usaha_nol")
+    return codes
+
+
+# Fungsi untuk memvalidasi BLOK I-III dari satu record form_data; mengembalikan daftar pesan kesalahan
+def validate_form(form_data):
+    return [FORM_MESSAGES[code] for code in form_error_codes(form_data)]
+
+
+# Fungsi untuk memeriksa satu usaha BLOK IV; mengembalikan daftar kode kesalahan
+def usaha_error_codes(usaha):
+    codes = []
+    if _is_blank(usaha.nama_usaha):
+        codes.append("nama_usaha_kosong")
+    if _is_blank(usaha.nama_pemilik):
+        codes.append("nama_pemilik_kosong")
+    if not usaha.industri:
+        codes.append("industri_kosong")
+    jumlah = as_int(usaha.jumlah_tenaga_kerja)
+    if jumlah is None or jumlah < 1:
+        codes.append("jumlah_tenaga_kerja_kurang")
+    return codes
+
+
+# Fungsi untuk memvalidasi satu usaha BLOK IV; mengembalikan daftar pesan kesalahan
+def validate_usaha(usaha):
+    return [USAHA_MESSAGES[code] for code in usaha_error_codes(usaha)]
+
+
+# Fungsi untuk memvalidasi satu kuesioner utuh (BLOK I-IV); jumlah usaha BLOK IV harus sama dengan total BLOK III
+def validate_submission(form_data, usaha_data):
+    errors = validate_form(form_data)
+    for i, usaha in enumerate(usaha_data):
+        errors.extend(f"BLOK IV usaha ke-{i + 1}: {message}" for message in validate_usaha(usaha))
+    if not errors and len(usaha_data) != count_usaha(form_data):
+        errors.append(f"BLOK IV: jumlah usaha ({len(usaha_data)}) harus sama dengan total BLOK III ({count_usaha(form_data)})")
+    return errors
+
+
+# Kolom angka/tanggal tidak perlu diubah ke teks; hanya kolom teks dan campuran (object) yang di-strip
+def _blank(column):
+    if column.dtype == object:
+        return column.isna() | (column.astype(str).str.strip() == "")
+    if pd.api.types.is_string_dtype(column.dtype):
+        return column.isna() | (column.str.strip() == "")
+    return column.isna()
+
+
+# Fungsi untuk mengubah kolom menjadi angka seperti as_int (teks di-strip; bool dan selain bilangan bulat -> NaN)
+def _as_number(column):
+    if pd.api.types.is_bool_dtype(column.dtype):
+        return pd.Series(np.nan, index=column.index)
+    if pd.api.types.is_numeric_dtype(column.dtype):
+        number = column.astype(float)
+    else:
+        if column.dtype == object:
+            is_bool = column.map(type) == bool
+            column = column.where(column.isna(), column.astype(str).str.strip()).where(~is_bool)
+        else:
+            column = column.str.strip()
+        number = pd.to_numeric(column, errors="coerce").astype(float)
+    return number.where(np.isfinite(number) & (number % 1 == 0))
+
+
+# Fungsi untuk memeriksa BLOK I-III seluruh DataFrame kuesioner (kolom = FORM_KEYS) sekaligus.
+# Mengembalikan DataFrame boolean dengan indeks yang sama dan satu kolom per kode di FORM_CODES.
+def validate_form_frame(df):
+    flags = {}
+    for key, _ in BLOK_I_FIELDS + BLOK_II_FIELDS:
+        flags[f"{key}_kosong"] = _blank(df[key])
+
+    tanggal = df["tanggal"]
+    flags["tanggal_kosong"] = _blank(tanggal)
+    if pd.api.types.is_datetime64_any_dtype(tanggal.dtype):
+        flags["tanggal_format"] = pd.Series(False, index=df.index)
+    else:
+        # Objek date/datetime (mis. dari st.date_input) selalu valid; teks harus YYYY-MM-DD
+        is_date = tanggal.map(type).isin([date, datetime, pd.Timestamp]) if tanggal.dtype == object else False
+        parsed = pd.to_datetime(tanggal.astype(str).str.strip(), format=TANGGAL_FORMAT, errors="coerce")
+        flags["tanggal_format"] = ~flags["tanggal_kosong"] & ~is_date & parsed.isna()
+    other_errors = pd.DataFrame(flags).any(axis=1)
+
+    blok_iii_complete = pd.Series(True, index=df.index)
+    total = pd.Series(0.0, index=df.index)
+    for key in JML_KEYS:
+        kosong = _blank(df[key])
+        number = _as_number(df[key])
+        flags[f"{key}_kosong"] = kosong
+        flags[f"{key}_bukan_bulat"] = ~kosong & number.isna()
+        flags[f"{key}_negatif"] = number < 0
+        valid = number >= 0
+        blok_iii_complete &= valid
+        total += number.where(valid, 0)
+    flags["total_usaha_nol"] = blok_iii_complete & ~other_errors & (total == 0)
+    return pd.DataFrame(flags, index=df.index)[FORM_CODES]
+
+
+# Fungsi untuk memeriksa banyak usaha sekaligus (kolom = USAHA_FIELDS, industri berupa mask).
+# Mengembalikan DataFrame boolean dengan satu kolom per kode di USAHA_CODES.
+def validate_usaha_frame(df):
+    jumlah = _as_number(df["jumlah_tenaga_kerja"])
+    industri = pd.to_numeric(df["industri"], errors="coerce").fillna(0)
+    return pd.DataFrame({
+        "nama_usaha_kosong": _blank(df["nama_usaha"]),
+        "nama_pemilik_kosong": _blank(df["nama_pemilik"]),
+        "industri_kosong": industri == 0,
+        "jumlah_tenaga_kerja_kurang": ~(jumlah >= 1),
+    }, index=df.index)
+
+
+# Fungsi untuk mengubah DataFrame boolean hasil validate_*_frame menjadi daftar kode per baris
+# (baris tanpa kesalahan mendapat list kosong)
+def error_codes(flags):
+    names = flags.columns.tolist()
+    codes = [[] for _ in range(len(flags))]
+    # np.nonzero berurutan per baris lalu per kolom, jadi urutan kode sama dengan urutan pemeriksaan
+    for row, column in zip(*(index.tolist() for index in np.nonzero(flags.to_numpy()))):
+        codes[row].append(names[column])
+    return pd.Series(codes, index=flags.index, dtype=object)
@@ -0,0 +1,465 @@
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from concurrent.futures import Future
+
+from gsheet import HEADERS, append_to_sheet
+from ratelimit import PRIORITY_WRITE, is_retryable, sheets_limiter
+from spans import spans
+
+logger = logging.getLogger(__name__)
+
+# Lokasi jurnal lokal untuk submisi yang belum terkirim ke Google Sheets
+JOURNAL_PATH = os.path.join("data", "journal_submisi.jsonl")
+
+# Lokasi indeks ID submisi yang sudah tertulis di Google Sheets
+INDEX_PATH = os.path.join("data", "submisi_terkirim.sqlite3")
+
+# Lama ID submisi disimpan di indeks (detik); retry/klik ulang setelah itu tidak lagi dicegah
+INDEX_RETENTION = 30 * 24 * 3600
+
+# Batas satu batch append_rows dan lama maksimal menunggu submisi lain (detik)
+MAX_BATCH_ROWS = 500
+MAX_WAIT = 1.0
+
+# Nomor kolom (mulai 1) "ID Submisi" untuk rekonsiliasi setelah append yang hasilnya tidak pasti
+ID_COLUMN = HEADERS.index("ID Submisi") + 1
+
+
+class SubmissionJournal:
+    """
+    Jurnal append-only (JSONL + fsync) untuk submisi.
+
+    Setiap submisi ditulis sebagai record "submit" sebelum dikirim ke sheet,
+    lalu ditandai dengan record "ack" setelah berhasil ditulis. Saat aplikasi
+    dijalankan ulang, submisi tanpa "ack" dimuat kembali sebagai antrean.
+    """
+
+    def __init__(self, path=JOURNAL_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        self._pending = {}  # id -> record submit, urutan sesuai waktu masuk
+        self._pending_rows = 0
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._replay()
+        self._file = open(path, "a", encoding="utf-8")
+
+    # Baca ulang jurnal; baris terakhir yang terpotong (crash saat menulis) diabaikan
+    def _replay(self):
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                if record.get("type") == "submit":
+                    self._pending[record["id"]] = record
+                elif record.get("type") == "ack":
+                    for submission_id in record["ids"]:
+                        self._pending.pop(submission_id, None)
+        self._pending_rows = sum(len(record["rows"]) for record in self._pending.values())
+        if self._pending:
+            logger.info("Jurnal: %d submisi belum terkirim dimuat ulang", len(self._pending))
+
+    def _write(self, *records):
+        self._file.write("".join(json.dumps(record, ensure_ascii=False) + "\n" for record in records))
+        self._file.flush()
+        os.fsync(self._file.fileno())
+
+    # Simpan submisi secara durable; kembali setelah data aman di disk
+    def append(self, rows, submission_id=None):
+        return self.append_many([(rows, submission_id)])[0]
+
+    # Simpan beberapa submisi [(rows, submission_id), ...] dengan satu fsync; mengembalikan daftar ID
+    def append_many(self, submissions):
+        now = time.time()
+        records = [
+            {"type": "submit", "id": submission_id or uuid.uuid4().hex, "ts": now, "rows": rows}
+            for rows, submission_id in submissions
+        ]
+        with self._lock:
+            self._write(*records)
+            for record in records:
+                self._pending[record["id"]] = record
+                self._pending_rows += len(record["rows"])
+        return [record["id"] for record in records]
+
+    # Tandai submisi sudah tertulis di sheet
+    def ack(self, submission_ids):
+        if not submission_ids:
+            return
+        with self._lock:
+            self._write({"type": "ack", "ids": list(submission_ids), "ts": time.time()})
+            for submission_id in submission_ids:
+                record = self._pending.pop(submission_id, None)
+                if record is not None:
+                    self._pending_rows -= len(record["rows"])
+            if not self._pending:
+                self._truncate()
+
+    # Semua submisi sudah terkirim: kosongkan jurnal secara atomik
+    def _truncate(self):
+        self._file.close()
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.path)
+        self._file = open(self.path, "a", encoding="utf-8")
+
+    def pending(self):
+        with self._lock:
+            return list(self._pending.values())
+
+    def is_pending(self, submission_id):
+        with self._lock:
+            return submission_id in self._pending
+
+    def pending_rows(self):
+        return self._pending_rows
+
+
+class SubmissionIndex:
+    """
+    Indeks ID submisi yang sudah tertulis di sheet (SQLite + cache di memori).
+
+    Menyimpan lokasi tulisan (sheet, baris pertama, baris terakhir) per ID,
+    sehingga klik ganda, retry setelah timeout, atau replay jurnal setelah
+    crash dijawab dengan lokasi lama tanpa append_rows lagi. ID yang lebih
+    tua dari retention detik dibuang saat dibuka dan setiap jam sesudahnya.
+    """
+
+    def __init__(self, path=INDEX_PATH, retention=INDEX_RETENTION):
+        self.path = path
+        self.retention = retention
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        with self._conn:
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS submisi (id TEXT PRIMARY KEY, sheet TEXT, "
+                "first_row INTEGER, last_row INTEGER, ts REAL NOT NULL)"
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_submisi_ts ON submisi (ts)")
+        self._cache = {}
+        self._pruned = 0.0
+        self.prune()
+
+    # Buang ID yang lebih tua dari retention; mengembalikan jumlah ID yang dibuang
+    def prune(self):
+        with self._lock, self._conn:
+            self._pruned = time.time()
+            removed = self._conn.execute(
+                "DELETE FROM submisi WHERE ts < ?", (self._pruned - self.retention,)
+            ).rowcount
+            # Cache diisi ulang dari SQLite sesuai kebutuhan
+            self._cache.clear()
+        return removed
+
+    # Lokasi tulisan submisi, atau None jika belum pernah tertulis
+    def get(self, submission_id):
+        with self._lock:
+            if submission_id not in self._cache:
+                row = self._conn.execute(
+                    "SELECT sheet, first_row, last_row FROM submisi WHERE id = ?", (submission_id,)
+                ).fetchone()
+                if row is None:
+                    return None
+                self._cache[submission_id] = {"sheet": row[0], "first_row": row[1], "last_row": row[2]}
+            return self._cache[submission_id]
+
+    # Catat submisi yang baru tertulis; entries = [(id, sheet, first_row, last_row), ...]
+    def add(self, entries):
+        now = time.time()
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO submisi (id, sheet, first_row, last_row, ts) VALUES (?, ?, ?, ?, ?)",
+                [entry + (now,) for entry in entries],
+            )
+            for submission_id, sheet, first_row, last_row in entries:
+                self._cache[submission_id] = {"sheet": sheet, "first_row": first_row, "last_row": last_row}
+        if now - self._pruned >= 3600:
+            self.prune()
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+class SheetWriter:
+    """
+    Pekerja latar belakang yang mengirim isi jurnal ke Google Sheets.
+
+    Baris dari banyak sesi dikumpulkan selama paling lama max_wait detik
+    (atau sampai max_batch_rows baris) lalu dikirim dalam satu append_rows.
+    Setiap submit() mendapat Future yang selesai ketika barisnya sudah
+    tertulis; Future didaftarkan sebelum submisi masuk jurnal, jadi batch
+    yang langsung terkirim tetap menemukannya. worksheet_provider(n_rows)
+    menentukan shard tujuan dan mengembalikan (worksheet, sisa kapasitas
+    atau None). Jika gagal (misalnya kuota habis), data tetap di jurnal dan
+    dicoba lagi dengan jeda yang makin panjang; setelah 5xx/timeout, kolom
+    ID Submisi shard dibaca dulu sebelum batch dikirim ulang.
+
+    on_written(sheet, first_row, rows), jika diberikan, dipanggil setelah
+    setiap batch tertulis (misalnya untuk mirror lokal). ID submisi yang
+    sudah tercatat di index (SubmissionIndex) tidak dikirim lagi; index
+    wajib diberikan agar semua proses memakai file dedupe yang sama.
+    """
+
+    def __init__(self, journal, worksheet_provider, row_index, index,
+                 max_batch_rows=MAX_BATCH_ROWS, max_wait=MAX_WAIT, max_backoff=120.0, on_written=None):
+        self.journal = journal
+        self.index = index
+        self.on_written = on_written
+        self.worksheet_provider = worksheet_provider
+        self.row_index = row_index
+        self.max_batch_rows = max_batch_rows
+        self.max_wait = max_wait
+        self.max_backoff = max_backoff
+        self.last_error = None
+        self.last_flush = None
+        self.stats = {"submissions": 0, "batches": 0, "rows": 0, "duplicates": 0, "reconciled": 0}
+        self._unconfirmed = None  # worksheet dengan append gagal yang mungkin sudah tertulis
+        self._futures = {}  # id submisi -> Future acknowledgement
+        self._futures_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._batch_full = threading.Event()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._loop, name="gsheet-writer", daemon=True)
+
+    def start(self):
+        self._thread.start()
+        if self.journal.pending():
+            self._wakeup.set()
+        return self
+
+    def stop(self, timeout=None):
+        self._stop.set()
+        self._wakeup.set()
+        self._batch_full.set()
+        self._thread.join(timeout)
+
+    # Dipanggil dari sesi Streamlit: tulis ke jurnal lalu bangunkan pekerja.
+    # Future selesai dengan {"id", "sheet", "rows", "first_row", "last_row"} setelah tertulis di sheet.
+    # submission_id yang sama dengan submisi sebelumnya tidak ditulis dua kali: jika sudah
+    # tertulis, Future langsung selesai dengan lokasi lama dan "duplicate": True; jika masih
+    # di antrean, Future milik submisi tersebut yang dikembalikan.
+    def submit(self, rows, submission_id=None):
+        return self.submit_many([(rows, submission_id)])[0]
+
+    # Seperti submit untuk beberapa submisi [(rows, submission_id), ...] sekaligus (mis. dari API);
+    # submisi baru ditulis ke jurnal dengan satu fsync. Mengembalikan Future per submisi sesuai urutan.
+    def submit_many(self, submissions):
+        futures, new = [], []
+        with self._futures_lock:
+            for rows, submission_id in submissions:
+                future = self._existing(rows, submission_id)
+                if future is None:
+                    # Daftarkan Future sebelum append jurnal: pekerja bisa mengirim dan
+                    # menyelesaikan submisi begitu record-nya ada di jurnal
+                    submission_id = submission_id or uuid.uuid4().hex
+                    future = self._futures[submission_id] = Future()
+                    new.append((rows, submission_id))
+                futures.append(future)
+            if new:
+                try:
+                    with spans.span("journal.append", rows=sum(len(rows) for rows, _ in new)):
+                        self.journal.append_many(new)
+                except Exception:
+                    for _, submission_id in new:
+                        self._futures.pop(submission_id, None)
+                    raise
+                self.stats["submissions"] += len(new)
+        if new:
+            self._wakeup.set()
+            if self.journal.pending_rows() >= self.max_batch_rows:
+                self._batch_full.set()
+        return futures
+
+    # Future untuk submission_id yang sudah tertulis atau masih di antrean, atau None jika submisi baru
+    def _existing(self, rows, submission_id):
+        if submission_id is None:
+            return None
+        written = self.index.get(submission_id)
+        if written is not None:
+            self.stats["duplicates"] += 1
+            future = Future()
+            future.set_result(dict(written, id=submission_id, rows=len(rows), duplicate=True))
+            return future
+        if submission_id in self._futures:
+            self.stats["duplicates"] += 1
+            return self._futures[submission_id]
+        if self.journal.is_pending(submission_id):
+            # Dimuat ulang dari jurnal setelah restart: tunggu pengiriman yang sudah antre
+            self.stats["duplicates"] += 1
+            future = self._futures[submission_id] = Future()
+            return future
+        return None
+
+    def _loop(self):
+        backoff = self.max_wait
+        while not self._stop.is_set():
+            self._wakeup.wait()
+            self._wakeup.clear()
+            pending = self.journal.pending()
+            if self._stop.is_set() or not pending:
+                continue
+
+            # Jendela batch dihitung dari submisi tertua yang belum terkirim
+            remaining = pending[0]["ts"] + self.max_wait - time.time()
+            if remaining > 0:
+                self._batch_full.wait(remaining)
+            self._batch_full.clear()
+
+            try:
+                while self.flush():
+                    pass
+                backoff = self.max_wait
+            except Exception as e:
+                self.last_error = str(e)
+                logger.warning("Gagal mengirim jurnal ke Google Sheets: %s", e)
+                self._stop.wait(backoff)
+                backoff = min(backoff * 2, self.max_backoff)
+                self._wakeup.set()
+
+    # Ambil submisi tertunda sampai batas baris (minimal satu submisi).
+    # Baris satu submisi tidak pernah dipecah ke dua batch/shard.
+    def _next_batch(self, limit):
+        batch, total = [], 0
+        for record in self.journal.pending():
+            if batch and total + len(record["rows"]) > limit:
+                break
+            batch.append(record)
+            total += len(record["rows"])
+        return batch
+
+    # Tandai submisi tertunda yang ID-nya sudah tertulis (mis. crash setelah append, sebelum ack)
+    def _drop_written(self, pending):
+        written = [record for record in pending if self.index.get(record["id"]) is not None]
+        if not written:
+            return pending
+        self.journal.ack([record["id"] for record in written])
+        with self._futures_lock:
+            for record in written:
+                future = self._futures.pop(record["id"], None)
+                if future is not None:
+                    future.set_result(dict(self.index.get(record["id"]), id=record["id"],
+                                           rows=len(record["rows"]), duplicate=True))
+        return self.journal.pending()
+
+    # Append terakhir gagal tanpa kepastian (5xx/timeout): baca kolom ID Submisi shard tersebut
+    # dan catat submisi jurnal yang ternyata sudah tertulis, supaya tidak dikirim dua kali
+    def _reconcile(self, worksheet):
+        pending = {record["id"]: record for record in self.journal.pending()}
+        ids = sheets_limiter.call(worksheet.col_values, ID_COLUMN, priority=PRIORITY_WRITE)
+        found = {}
+        for row_number, submission_id in enumerate(ids, start=1):
+            if submission_id in pending:
+                found.setdefault(submission_id, []).append(row_number)
+        if found:
+            self.index.add([(submission_id, worksheet.title, rows[0], rows[-1]) for submission_id, rows in found.items()])
+            self.stats["reconciled"] += len(found)
+            logger.info("Rekonsiliasi: %d submisi ternyata sudah tertulis di %s", len(found), worksheet.title)
+        self._unconfirmed = None
+
+    # Kirim satu batch dalam satu append_rows; mengembalikan jumlah baris terkirim
+    def flush(self):
+        if self._unconfirmed is not None:
+            self._reconcile(self._unconfirmed)
+        pending = self._drop_written(self.journal.pending())
+        if not pending:
+            return 0
+        # worksheet_provider(n_rows) -> (worksheet, sisa kapasitas shard atau None)
+        worksheet, capacity = self.worksheet_provider(len(pending[0]["rows"]))
+        if worksheet is None:
+            raise RuntimeError("Koneksi worksheet belum tersedia")
+
+        limit = self.max_batch_rows if capacity is None else min(self.max_batch_rows, capacity)
+        batch = self._next_batch(limit)
+
+        rows = [row for record in batch for row in record["rows"]]
+        try:
+            last_row = append_to_sheet(worksheet, rows, self.row_index)
+        except Exception as e:
+            # Selain 429, append mungkin sudah diproses: batch tetap di jurnal dan
+            # dicocokkan dengan isi sheet sebelum dikirim ulang
+            if not is_retryable(e, idempotent=False):
+                self._unconfirmed = worksheet
+                self.row_index.invalidate(worksheet)
+            raise
+        # Catat ID di index sebelum ack jurnal, jadi replay setelah crash tidak menulis ulang
+        self.index.add(self._locations(batch, worksheet.title, last_row))
+        self.journal.ack([record["id"] for record in batch])
+        self.last_error = None
+        self.last_flush = time.time()
+        self.stats["batches"] += 1
+        self.stats["rows"] += len(rows)
+        self._resolve(batch, worksheet.title, last_row)
+        # Lama submisi menunggu di jurnal sampai tertulis di sheet
+        written_at = time.time()
+        for record in batch:
+            spans.record("writer.queue", written_at - record["ts"], rows=len(record["rows"]))
+        if self.on_written is not None:
+            first_row = last_row - len(rows) + 1 if last_row is not None else None
+            try:
+                self.on_written(worksheet.title, first_row, rows)
+            except Exception as e:
+                # Data sudah aman di sheet; kegagalan pendengar tidak boleh mengulang pengiriman
+                logger.warning("on_written gagal: %s", e)
+        return len(rows)
+
+    # Baris satu batch bersebelahan, jadi rentang baris tiap submisi bisa dihitung mundur.
+    # Mengembalikan [(id, sheet, first_row, last_row), ...] sesuai urutan batch.
+    def _locations(self, batch, sheet_title, last_row):
+        locations = []
+        end_row = last_row
+        for record in reversed(batch):
+            n_rows = len(record["rows"])
+            first_row = end_row - n_rows + 1 if end_row is not None else None
+            locations.append((record["id"], sheet_title, first_row, end_row))
+            if end_row is not None:
+                end_row -= n_rows
+        return locations[::-1]
+
+    def _resolve(self, batch, sheet_title, last_row):
+        with self._futures_lock:
+            for record, (submission_id, sheet, first_row, end_row) in zip(
+                batch, self._locations(batch, sheet_title, last_row)
+            ):
+                future = self._futures.pop(submission_id, None)
+                if future is not None:
+                    future.set_result({
+                        "id": submission_id,
+                        "sheet": sheet,
+                        "rows": len(record["rows"]),
+                        "first_row": first_row,
+                        "last_row": end_row,
+                    })
+
+
+# Fungsi untuk membuat SheetWriter ke Google Sheets; dipakai bersama oleh app.py dan api.py.
+# Worksheet ditunggu dari connection (SheetConnection) saat ada data yang akan dikirim, lalu
+# diarahkan ke shard aktif lewat shards (ShardDirectory). on_written biasanya mirror.record_rows.
+# app.py dan api.py memakai indeks ID submisi yang sama (index_path), jadi dedupe berlaku lintas proses.
+def start_sheet_writer(connection, shards, journal_path=JOURNAL_PATH, on_written=None, index_path=INDEX_PATH):
+    def worksheet_provider(n_rows):
+        if connection.ready() and connection.worksheet is None:
+            connection.retry()
+        worksheet = connection.get(timeout=60)
+        if worksheet is None:
+            return None, None
+        return shards.route(worksheet.spreadsheet, n_rows)
+
+    return SheetWriter(SubmissionJournal(journal_path), worksheet_provider, shards.row_index,
+                       SubmissionIndex(index_path), on_written=on_written).start()